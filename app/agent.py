@@ -1,94 +1,135 @@
+import asyncio
+import copy
+import inspect
+import itertools
 import json
+import time
 from pathlib import Path
-from app.llm_client import  generate_chat_stream,generate_chat
+from app.llm_client import generate_chat_stream
+from app import tracing
+from app.log import DEBUG, get_logger
+from app.segmenter import Segmenter, segment_text
+from app.history import TOOL_STATE_PREFIX, compact, estimate_tokens, exchange_note, tool_content
+from app.fast_path import try_fast_path
+from app.response_cache import response_cache
+from app.prompt import PREFIX_MESSAGES, TOOLS
 from app.tools.reservation_tools import (update_context_from_text,compute_availability,select_room,finalize_booking)
 
+log = get_logger("agent")
+
 FLOW = json.loads(Path("app/flow.json").read_text())
-SYSTEM_PROMPT = Path("app/system_prompt.txt").read_text()
-
-
-def tool_spec():
-    return [
-        {
-            "type": "function",
-            "function": {
-                "name": "get_availability",
-                "description": "List available rooms given guest count, beds, and lounge preference.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "guests": {"type": "integer", "description": "Number of guests."},
-                        "beds": {
-                            "type": "integer",
-                            "description": "Beds requested (1 for single, 2 for double/twin).",
-                            "nullable": True,
-                        },
-                        "lounge": {
-                            "type": "boolean",
-                            "description": "Whether lounge access is requested.",
-                            "nullable": True,
-                        },
-                        "nights": {
-                            "type": "integer",
-                            "description": "Number of nights.",
-                            "nullable": True,
-                        },
-                    },
-                    "required": ["guests"],
-                },
-            },
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "choose_room",
-                "description": "Select a room by id after presenting options.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "room_id": {"type": "string", "description": "Room id to select."},
-                    },
-                    "required": ["room_id"],
-                },
-            },
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "finalize_booking",
-                "description": "Confirm booking with guest name and selected room id.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "guest_name": {"type": "string", "description": "Guest full name."},
-                        "room_id": {"type": "string", "description": "Selected room id."},
-                    },
-                    "required": ["guest_name", "room_id"],
-                },
-            },
-        },
-    ]
+
+# Tools with effects outside the conversation; a speculative fork must never run these
+MUTATING_TOOLS = {"finalize_booking"}
+
+
+class SpeculationAborted(Exception):
+    """Raised inside a speculative fork when the turn would run a mutating tool.
+
+    Carries the step that stopped (its content, already spoken, and its tool calls) so the
+    live agent can run the calls for real and carry on instead of regenerating the turn.
+    """
+
+    def __init__(self, tool: str, content: str = "", tool_calls: "StreamedToolCalls | None" = None):
+        super().__init__(tool)
+        self.content = content
+        self.tool_calls = tool_calls
+
+
+_local_call_ids = itertools.count(1)
+# Bookings still completing after the turn that started them was cancelled
+_booking_tasks: set[asyncio.Task] = set()
+
+
+class StreamedToolCall:
+    def __init__(self, index: int):
+        self.index = index
+        self.id = None
+        self.type = "function"
+        self.name = ""
+        self.arguments = ""
+        self.result = None
+
+    def ready(self) -> bool:
+        """Arguments are complete once the accumulated JSON parses"""
+        if not self.name or not self.arguments.rstrip().endswith("}"):
+            return False
+        try:
+            json.loads(self.arguments)
+        except json.JSONDecodeError:
+            return False
+        return True
+
+
+class StreamedToolCalls:
+    """Assembles tool calls from streamed deltas, keyed by their index"""
+
+    def __init__(self):
+        self.calls: dict[int, StreamedToolCall] = {}
+
+    def add(self, tc_delta) -> StreamedToolCall:
+        index = getattr(tc_delta, "index", None)
+        if index is None:
+            index = len(self.calls)
+        call = self.calls.get(index)
+        if call is None:
+            call = self.calls[index] = StreamedToolCall(index)
+        if getattr(tc_delta, "id", None):
+            call.id = tc_delta.id
+        if getattr(tc_delta, "type", None):
+            call.type = tc_delta.type
+        fn = getattr(tc_delta, "function", None)
+        if fn is not None:
+            if fn.name:
+                call.name += fn.name
+            if fn.arguments:
+                call.arguments += fn.arguments
+        return call
+
+    def __bool__(self) -> bool:
+        return bool(self.calls)
+
+    def __iter__(self):
+        return iter(self.calls[i] for i in sorted(self.calls))
+
+    def as_messages(self) -> list[dict]:
+        return [
+            {
+                "id": call.id,
+                "type": call.type,
+                "function": {"name": call.name, "arguments": call.arguments},
+            }
+            for call in self
+        ]
 
 
 class ToolRuntime:
     def __init__(self, context: dict):
         self.context = context
 
-    def get_availability(self, guests: int, beds=None, lounge=None, nights=None):
-        self.context["guests"] = guests
+    async def preview_availability(self, guests: int, beds=None, lounge=None, nights=None) -> dict:
+        """The context get_availability would leave behind, computed without touching self.context"""
+        ctx = dict(self.context)
+        ctx["guests"] = guests
         if beds is not None:
-            self.context["beds"] = beds
+            ctx["beds"] = beds
         if lounge is not None:
-            self.context["lounge"] = lounge
+            ctx["lounge"] = lounge
         if nights is not None:
-            self.context["nights"] = nights
-        rooms = compute_availability(self.context)
-        self.context["available_rooms"] = rooms
+            ctx["nights"] = nights
+        ctx["available_rooms"] = await compute_availability(ctx)
+        return ctx
+
+    def commit_availability(self, preview: dict) -> dict:
+        self.context.update(preview)
         return {
-            "available_rooms": rooms,
+            "available_rooms": preview["available_rooms"],
             "context": self.context,
         }
 
+    async def get_availability(self, guests: int, beds=None, lounge=None, nights=None):
+        return self.commit_availability(await self.preview_availability(guests, beds, lounge, nights))
+
     def choose_room(self, room_id: str):
         picked = select_room(self.context, room_id)
         return {
@@ -96,10 +137,15 @@ class ToolRuntime:
             "context": self.context,
         }
 
-    def finalize_booking(self, guest_name: str, room_id: str):
+    async def finalize_booking(self, guest_name: str, room_id: str):
         self.context["guest_name"] = guest_name
         self.context["selected_room"] = room_id
-        booking_details = finalize_booking(self.context)
+        # A superseded turn must not abandon a hold half-written: the booking always completes,
+        # and its booking_id lands in self.context for the next turn
+        task = asyncio.ensure_future(finalize_booking(self.context))
+        _booking_tasks.add(task)
+        task.add_done_callback(_booking_tasks.discard)
+        booking_details = await asyncio.shield(task)
         if booking_details:
             return booking_details
         return {
@@ -126,15 +172,38 @@ class HotelAgent:
         self.booking_confirmed = False
         self.asked_anything_else = False
         self.completed = False
-        self.messages = [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {
-                "role": "system",
-                "content": "Use the provided tools to fetch availability, choose a room, and finalize bookings. Always keep responses concise, spoken style. Convert all numbers to numeric example 'five'->5 'thirty'->30",
-            },
-        ]
-        self.tools = tool_spec()
+        # Shared, byte-stable prefix; per-call state is only ever appended after it
+        self.messages = list(PREFIX_MESSAGES)
+        self.tools = TOOLS
         self.tool_runtime = ToolRuntime(self.context)
+        # First tool_call id of each exchange -> state note taken when its results came in
+        self.tool_notes: dict[str, str] = {}
+        self.speculative = False
+
+    def fork(self) -> "HotelAgent":
+        """Copy of the conversation state for speculative generation"""
+        clone = copy.copy(self)
+        clone.context = copy.deepcopy(self.context)
+        clone.messages = list(self.messages)
+        clone.tool_runtime = ToolRuntime(clone.context)
+        clone.tool_notes = dict(self.tool_notes)
+        clone.speculative = True
+        return clone
+
+    def adopt(self, fork: "HotelAgent", user_text: str):
+        """Commit a speculative fork, recording the final transcript as the user turn"""
+        self.context.clear()
+        self.context.update(fork.context)
+        self.messages = fork.messages
+        self.tool_notes = fork.tool_notes
+        for i in range(len(self.messages) - 1, -1, -1):
+            if self.messages[i]["role"] == "user":
+                self.messages[i] = {"role": "user", "content": user_text}
+                break
+        update_context_from_text(user_text, self.context)
+        self.booking_confirmed = fork.booking_confirmed
+        self.asked_anything_else = fork.asked_anything_else
+        self.completed = fork.completed
 
     # async def handle(self, user_text: str) -> str:
     #     update_context_from_text(user_text, self.context)
@@ -207,104 +276,242 @@ class HotelAgent:
             
     #         return reply
 
-    async def handle_stream(self, user_text: str, sequence_id: int = 0, is_valid_fn=None):
-        """Stream LLM responses in chunks for low-latency output with interruption support"""
+    async def _run_tool(self, name: str, arguments: str):
+        args = json.loads(arguments or "{}")
+        func = getattr(self.tool_runtime, name, None)
+        if not func:
+            return {"error": f"Unknown tool {name}"}
+        started = time.perf_counter()
+        try:
+            result = func(**args)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        except Exception as e:
+            return {"error": str(e)}
+        finally:
+            if not self.speculative:
+                tracing.observe_tool(name, time.perf_counter() - started)
+
+    def record_user_turn(self, user_text: str):
+        """Record a caller turn whose reply was interrupted before anything was committed"""
         update_context_from_text(user_text, self.context)
         self.messages.append({"role": "user", "content": user_text})
 
-        while True:
-            res = await generate_chat(self.messages, tools=self.tools)
-            msg = res.choices[0].message
-            tool_calls = getattr(msg, "tool_calls", None)
-            
-            if tool_calls:
-                def _tool_call_dict(tc):
-                    return {
-                        "id": tc.id,
-                        "type": tc.type,
-                        "function": {
-                            "name": tc.function.name,
-                            "arguments": tc.function.arguments,
-                        },
-                    }
+    def trim_reply(self, first_sentence: str, heard: str) -> bool:
+        """The caller cut this turn's reply off: keep only the words they heard in the history.
 
+        The last message only counts as this turn's reply if it starts with the reply's first
+        spoken sentence; a speculative turn, for one, is not in self.messages yet.
+        """
+        last = self.messages[-1] if self.messages else None
+        if not last or last["role"] != "assistant" or last.get("tool_calls") or not last.get("content"):
+            return False
+        if not " ".join(last["content"].split()).startswith(" ".join(first_sentence.split())):
+            return False
+        if heard:
+            self.messages[-1] = {"role": "assistant", "content": heard}
+        else:
+            self.messages.pop()
+        return True
+
+    def record_exchange(self, calls: list[tuple[str, str, dict]], reply: str):
+        """Append a tool round-trip and reply produced without the LLM, as if the model had made it"""
+        if calls:
+            ids = [f"local_{next(_local_call_ids)}" for _ in calls]
+            self.messages.append(
+                {
+                    "role": "assistant",
+                    "content": "",
+                    "tool_calls": [
+                        {"id": call_id, "type": "function", "function": {"name": name, "arguments": arguments}}
+                        for call_id, (name, arguments, _) in zip(ids, calls)
+                    ],
+                }
+            )
+            for call_id, (name, _, result) in zip(ids, calls):
                 self.messages.append(
-                    {
-                        "role": "assistant",
-                        "content": msg.content or "",
-                        "tool_calls": [_tool_call_dict(tc) for tc in tool_calls],
-                    }
+                    {"role": "tool", "tool_call_id": call_id, "name": name, "content": tool_content(name, result)}
                 )
+            self.tool_notes[ids[0]] = exchange_note([name for name, _, _ in calls], self.context)
+        self.messages.append({"role": "assistant", "content": reply})
+        compact(self.messages, self.context, self.tool_notes)
+
+    def _last_reply(self) -> str:
+        """The agent's previous spoken reply (collapsed tool notes are not speech)"""
+        for m in reversed(self.messages):
+            if m["role"] == "assistant" and m.get("content") and not m.get("tool_calls"):
+                if not m["content"].startswith(TOOL_STATE_PREFIX):
+                    return m["content"]
+            elif m["role"] == "system":
+                break
+        return ""
+
+    def _turn_flags(self) -> tuple:
+        return (self.booking_confirmed, self.asked_anything_else)
+
+    def _finish_turn(self, user_text: str, reply: str):
+        if self.context.get("booking_id") and not self.booking_confirmed:
+            self.booking_confirmed = True
+        
+        lower_reply = reply.lower()
+        if self.booking_confirmed and ("anything else" in lower_reply or "help you with" in lower_reply):
+            self.asked_anything_else = True
+        
+        lower_text = user_text.lower()
+        decline_keywords = ["no", "nope", "nah", "nothing", "that's all", "that is all", "no thanks", "i'm good", "im good", "all set", "that'll be all"]
+        if self.asked_anything_else and any(kw in lower_text for kw in decline_keywords):
+            self.completed = True
+            log.info("caller declined further help; marking conversation complete")
+
+    async def handle_stream(self, user_text: str, sequence_id: int = 0, is_valid_fn=None):
+        """Stream LLM responses in chunks for low-latency output with interruption support.
+
+        Each model step is a single streaming request with tools enabled: content is chunked
+        to TTS as it arrives, and tool calls are assembled from deltas and run as soon as
+        their arguments parse.
+        """
+        slots = update_context_from_text(user_text, self.context)
+        self.messages.append({"role": "user", "content": user_text})
+        turn_start = time.perf_counter()
+        cache_key = response_cache.key_for(user_text, self.context, self._turn_flags(), self._last_reply())
+
+        local_segments = await try_fast_path(self, user_text, slots)
+        if local_segments is None and cache_key:
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                calls = [(name, arguments, await self._run_tool(name, arguments)) for name, arguments in cached.tool_calls]
+                self.record_exchange(calls, cached.reply)
+                self._finish_turn(user_text, cached.reply)
+                log.info("response cache hit", tool_replays=len(calls), stats=response_cache.stats())
+                local_segments = segment_text(cached.reply)
+        if local_segments is not None:
+            for segment in local_segments:
+                if is_valid_fn and not is_valid_fn(sequence_id):
+                    log.info("interrupted; stopping local reply", sequence_id=sequence_id)
+                    return
+                yield segment
+            return
+
+        async for segment in self._llm_steps(user_text, sequence_id, is_valid_fn, cache_key, turn_start):
+            yield segment
+
+    async def resume_stream(self, user_text: str, aborted: SpeculationAborted, sequence_id: int = 0, is_valid_fn=None):
+        """Finish a turn an adopted fork stopped short of a mutating tool.
+
+        The fork's content for that step has already been spoken, so its tool calls run here
+        against the live state and the LLM only generates what comes after them.
+        """
+        if is_valid_fn and not is_valid_fn(sequence_id):
+            return
+        await self._run_exchange(aborted.content, aborted.tool_calls, [])
+        async for segment in self._llm_steps(user_text, sequence_id, is_valid_fn, None, time.perf_counter()):
+            yield segment
 
-                for tc in tool_calls:
-                    name = tc.function.name
-                    args = json.loads(tc.function.arguments or "{}")
-                    func = getattr(self.tool_runtime, name, None)
-                    if not func:
-                        result = {"error": f"Unknown tool {name}"}
-                    else:
-                        try:
-                            result = func(**args)
-                        except Exception as e:
-                            result = {"error": str(e)}
-
-                    self.messages.append(
-                        {
-                            "role": "tool",
-                            "tool_call_id": tc.id,
-                            "name": name,
-                            "content": json.dumps(result),
-                        }
-                    )
-                    if isinstance(result, dict) and result.get("booking_id"):
-                        self.booking_confirmed = True
-                continue 
-
-            buffer = ""
+    async def _run_exchange(self, content: str, tool_calls: "StreamedToolCalls", turn_calls: list) -> bool:
+        """Run one step's tool calls and record the exchange; True if any call was mutating"""
+        # The exchange goes into the history whole, once every result is in: a turn
+        # cancelled mid-tool must not leave tool_calls without their results
+        exchange = [
+            {
+                "role": "assistant",
+                "content": content,
+                "tool_calls": tool_calls.as_messages(),
+            }
+        ]
+        mutated = False
+        for call in tool_calls:
+            if call.name in MUTATING_TOOLS:
+                mutated = True
+            turn_calls.append((call.name, call.arguments))
+            if call.result is None:
+                try:
+                    call.result = await self._run_tool(call.name, call.arguments)
+                except json.JSONDecodeError as e:
+                    call.result = {"error": f"Invalid arguments: {e}"}
+
+            exchange.append(
+                {
+                    "role": "tool",
+                    "tool_call_id": call.id,
+                    "name": call.name,
+                    "content": tool_content(call.name, call.result),
+                }
+            )
+            if isinstance(call.result, dict) and call.result.get("booking_id"):
+                self.booking_confirmed = True
+        self.messages.extend(exchange)
+        calls = list(tool_calls)
+        self.tool_notes[calls[0].id] = exchange_note([call.name for call in calls], self.context)
+        return mutated
+
+    async def _llm_steps(self, user_text: str, sequence_id: int, is_valid_fn, cache_key, turn_start: float):
+        """Model steps of a turn until one ends without tool calls"""
+        first_token_logged = False
+        turn_calls: list[tuple[str, str]] = []
+        while True:
+            segmenter = Segmenter()
             full_response = ""
+            tool_calls = StreamedToolCalls()
+            interrupted = False
             
-            async for chunk in generate_chat_stream(self.messages, tools=None):
+            if log.enabled(DEBUG):
+                log.debug("llm request", prompt_tokens_est=estimate_tokens(self.messages), messages=len(self.messages))
+            async for chunk in generate_chat_stream(self.messages, tools=self.tools):
                 # Check if interrupted
                 if is_valid_fn and not is_valid_fn(sequence_id):
-                    print(f"[agent] Sequence {sequence_id} interrupted - stopping LLM stream")
+                    log.info("interrupted; stopping LLM stream", sequence_id=sequence_id)
+                    interrupted = True
                     break
+                if not chunk.choices:
+                    continue
                 
                 delta = chunk.choices[0].delta
+                tracing.mark(tracing.FIRST_LLM_TOKEN)
+                for tc_delta in getattr(delta, "tool_calls", None) or []:
+                    call = tool_calls.add(tc_delta)
+                    if call.ready() and call.result is None and call.name not in MUTATING_TOOLS:
+                        call.result = await self._run_tool(call.name, call.arguments)
+
                 content = getattr(delta, "content", None)
-                
                 if content:
-                    buffer += content
+                    if not first_token_logged:
+                        first_token_logged = True
+                        log.info("first token", ttft_ms=round((time.perf_counter() - turn_start) * 1000))
                     full_response += content
                     
-                    if buffer.endswith((".", "?", "!", "\n")) and len(buffer.strip()) > 5:
+                    for segment in segmenter.feed(content):
                         # Check again before yielding
                         if is_valid_fn and not is_valid_fn(sequence_id):
-                            print(f"[agent] Sequence {sequence_id} interrupted before yield")
+                            log.info("interrupted before yield", sequence_id=sequence_id)
+                            interrupted = True
                             break
-                        yield buffer.strip()
-                        buffer = ""
-            
+                        yield segment
+                    if interrupted:
+                        break
+
             # Check if interrupted before final yield
-            if is_valid_fn and not is_valid_fn(sequence_id):
-                print(f"[agent] Sequence {sequence_id} interrupted - discarding final buffer")
+            if interrupted or (is_valid_fn and not is_valid_fn(sequence_id)):
+                log.info("interrupted; discarding final buffer", sequence_id=sequence_id)
                 break
             
-            if buffer.strip():
-                yield buffer.strip()
+            tail = segmenter.flush()
+            if tail:
+                yield tail
+
+            if tool_calls:
+                if self.speculative:
+                    mutating = next((call.name for call in tool_calls if call.name in MUTATING_TOOLS), None)
+                    if mutating:
+                        raise SpeculationAborted(mutating, full_response, tool_calls)
+                if await self._run_exchange(full_response, tool_calls, turn_calls):
+                    cache_key = None
+                continue
             
             self.messages.append({"role": "assistant", "content": full_response})
-            
-            if self.context.get("booking_id") and not self.booking_confirmed:
-                self.booking_confirmed = True
-            
-            lower_reply = full_response.lower()
-            if self.booking_confirmed and ("anything else" in lower_reply or "help you with" in lower_reply):
-                self.asked_anything_else = True
-            
-            lower_text = user_text.lower()
-            decline_keywords = ["no", "nope", "nah", "nothing", "that's all", "that is all", "no thanks", "i'm good", "im good", "all set", "that'll be all"]
-            if self.asked_anything_else and any(kw in lower_text for kw in decline_keywords):
-                self.completed = True
-                print("[agent] User declined further help; marking conversation complete")
+            compact(self.messages, self.context, self.tool_notes)
+            if cache_key:
+                response_cache.put(cache_key, full_response, turn_calls)
+            self._finish_turn(user_text, full_response)
             
             break  
@@ -0,0 +1,76 @@
+"""
+Audio Frame Buffer - per-call ring buffer that slices outbound mu-law audio into Twilio frames
+"""
+
+FRAME_SIZE = 160  # 20 ms of 8 kHz mu-law
+
+
+class AudioFrameBuffer:
+    def __init__(self, frame_size: int = FRAME_SIZE, capacity_frames: int = 50):
+        self.frame_size = frame_size
+        self._buf = bytearray(frame_size * capacity_frames)
+        self._view = memoryview(self._buf)
+        self._read = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buf)
+
+    def _grow(self, needed: int):
+        """Re-pack unread bytes into a larger frame-aligned buffer"""
+        frames = -(-needed // self.frame_size) * 2
+        pending = self._copy_out(self._size)
+        self._buf = bytearray(frames * self.frame_size)
+        self._view = memoryview(self._buf)
+        self._view[:len(pending)] = pending
+        self._read = 0
+
+    def _copy_out(self, n: int) -> bytes:
+        end = self._read + n
+        if end <= len(self._buf):
+            return bytes(self._view[self._read:end])
+        return bytes(self._view[self._read:]) + bytes(self._view[:end - len(self._buf)])
+
+    def write(self, audio: bytes):
+        """Append audio to the ring, growing only if unread data would be overwritten"""
+        n = len(audio)
+        if not n:
+            return
+        if self._size + n > len(self._buf):
+            self._grow(self._size + n)
+        src = memoryview(audio)
+        cap = len(self._buf)
+        start = (self._read + self._size) % cap
+        first = min(n, cap - start)
+        self._view[start:start + first] = src[:first]
+        if first < n:
+            self._view[:n - first] = src[first:]
+        self._size += n
+
+    def frames(self):
+        """Yield complete frames as memoryviews into the ring.
+
+        Capacity is a multiple of frame_size and reads always advance by one frame,
+        so a frame never wraps. Each view is only valid until the next write().
+        """
+        fs = self.frame_size
+        while self._size >= fs:
+            start = self._read
+            self._read = (start + fs) % len(self._buf)
+            self._size -= fs
+            yield self._view[start:start + fs]
+
+    def flush(self) -> bytes:
+        """Return the partial tail (if any) and empty the buffer"""
+        tail = self._copy_out(self._size) if self._size else b""
+        self.clear()
+        return tail
+
+    def clear(self):
+        """Drop everything buffered (O(1), used on barge-in)"""
+        self._read = 0
+        self._size = 0
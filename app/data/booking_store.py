@@ -0,0 +1,199 @@
+"""
+Booking Store - durable SQLite (WAL) booking repository with group-committed async writes
+"""
+import asyncio
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from app.log import get_logger
+
+load_dotenv()
+
+log = get_logger("bookings")
+
+DB_PATH = os.getenv("BOOKING_DB_PATH", "bookings.db")
+BATCH_SIZE = int(os.getenv("BOOKING_BATCH_SIZE", "64"))
+BATCH_WINDOW = float(os.getenv("BOOKING_BATCH_WINDOW_MS", "5")) / 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookings (
+    booking_id TEXT PRIMARY KEY,
+    name       TEXT NOT NULL,
+    room_id    TEXT NOT NULL,
+    check_in   TEXT,
+    nights     INTEGER NOT NULL,
+    hold_id    TEXT,
+    status     TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    expires_at TEXT
+)
+"""
+COLUMNS = ("booking_id", "name", "room_id", "check_in", "nights", "hold_id", "status", "created_at", "expires_at")
+
+
+class BookingStore:
+    """All SQLite work runs on one dedicated thread, so the event loop never blocks on disk.
+
+    insert() queues the row and waits for its batch: a writer task collects up to
+    batch_size rows (or whatever arrives within batch_window) and commits them in a
+    single transaction.
+    """
+
+    def __init__(self, path: str = DB_PATH, batch_size: int = BATCH_SIZE, batch_window: float = BATCH_WINDOW):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="booking-db")
+        self.conn: sqlite3.Connection | None = None
+        self.queue: asyncio.Queue | None = None
+        self.writer_task: asyncio.Task | None = None
+        self.start_lock = asyncio.Lock()
+        self.batches = 0
+        self.rows_written = 0
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(SCHEMA)
+        conn.commit()
+        self.conn = conn
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def start(self):
+        if self.writer_task and not self.writer_task.done():
+            return
+        async with self.start_lock:
+            if self.writer_task and not self.writer_task.done():
+                return
+            if self.conn is None:
+                await self._run(self._open)
+            self.queue = asyncio.Queue()
+            self.writer_task = asyncio.create_task(self._writer(), name="booking-writer")
+            log.info("store ready", path=self.path)
+
+    def _write_batch(self, rows: list[tuple]):
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO bookings ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows,
+            )
+
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self.queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    # close(): commit what we have, then stop
+                    stopping = True
+                    break
+                batch.append(item)
+            rows = [row for row, _ in batch]
+            try:
+                await self._run(self._write_batch, rows)
+                self.batches += 1
+                self.rows_written += len(rows)
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_result(True)
+            except Exception as e:
+                log.error("batch failed", rows=len(rows), error=str(e))
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    async def insert(self, record: dict):
+        """Persist one booking; returns once its batch has committed"""
+        await self.start()
+        fut = asyncio.get_running_loop().create_future()
+        await self.queue.put((tuple(record.get(c) for c in COLUMNS), fut))
+        await fut
+
+    def _update_status(self, booking_id: str, status: str, expires_at, only_if):
+        sql = "UPDATE bookings SET status = ?, expires_at = COALESCE(?, expires_at) WHERE booking_id = ?"
+        args = (status, expires_at, booking_id)
+        if only_if is not None:
+            sql += " AND status = ?"
+            args += (only_if,)
+        with self.conn:
+            return self.conn.execute(sql, args).rowcount > 0
+
+    async def update_status(self, booking_id: str, status: str, expires_at: str | None = None, only_if: str | None = None) -> bool:
+        """Set a booking's status; expires_at is left as-is when None, and only_if guards the current status"""
+        await self.start()
+        return await self._run(self._update_status, booking_id, status, expires_at, only_if)
+
+    def _get(self, booking_id: str):
+        cur = self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM bookings WHERE booking_id = ?", (booking_id,))
+        row = cur.fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    async def get(self, booking_id: str) -> dict | None:
+        await self.start()
+        return await self._run(self._get, booking_id)
+
+    def _held(self):
+        cur = self.conn.execute(
+            "SELECT booking_id, hold_id, expires_at FROM bookings WHERE status = 'held' AND hold_id IS NOT NULL"
+        )
+        return cur.fetchall()
+
+    async def held(self) -> list[tuple[str, str, str | None]]:
+        """(booking_id, hold_id, expires_at) for every booking still waiting on confirmation"""
+        await self.start()
+        return await self._run(self._held)
+
+    def _active(self):
+        cur = self.conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM bookings WHERE status IN ('held', 'confirmed')"
+        )
+        return [dict(zip(COLUMNS, row)) for row in cur.fetchall()]
+
+    async def active(self) -> list[dict]:
+        """Every booking that still takes inventory: held or confirmed"""
+        await self.start()
+        return await self._run(self._active)
+
+    def _set_hold(self, booking_id: str, hold_id: str):
+        with self.conn:
+            self.conn.execute("UPDATE bookings SET hold_id = ? WHERE booking_id = ?", (hold_id, booking_id))
+
+    async def set_hold(self, booking_id: str, hold_id: str):
+        """Point a booking at the inventory hold that now backs it"""
+        await self.start()
+        await self._run(self._set_hold, booking_id, hold_id)
+
+    async def close(self):
+        if self.writer_task:
+            await self.queue.put(None)
+            await self.writer_task
+            self.writer_task = None
+        if self.conn is not None:
+            await self._run(self.conn.close)
+            self.conn = None
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "avg_batch": self.rows_written / self.batches if self.batches else 0.0,
+        }
+
+
+booking_store = BookingStore()
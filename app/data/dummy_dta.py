@@ -1,5 +1,15 @@
+import hashlib
+import json
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime
+from app.data.inventory import parse_check_in
+from app.data.shared_state import make_inventory
+from app.data.booking_store import booking_store
+from app.data.hold_expiry import HoldExpiry
+from app import tracing
+from app.log import get_logger
+
+log = get_logger("bookings")
 
 ROOMS = [
     {
@@ -34,27 +44,84 @@ ROOMS = [
     },
 ]
 
-BOOKINGS = {}
-
-def find_rooms(guests, beds=None, lounge=None):
-    results = []
-    for r in ROOMS:
-        if r["max_guests"] < guests:
-            continue
-        if beds and r["beds"] != beds:
-            continue
-        if lounge is not None and r["lounge"] != lounge:
-            continue
-        if r.get("inventory", 0) <= 0:
-            continue
-        results.append(r)
-    return results
-
-def create_booking(name, room):
+# "inventory" above is the number of rooms of each type per night
+INVENTORY = make_inventory(ROOMS)
+# Unconfirmed holds go back to INVENTORY once their TTL runs out
+HOLD_EXPIRY = HoldExpiry(INVENTORY, booking_store)
+tracing.register(*HOLD_EXPIRY.metrics())
+
+def catalog_version():
+    """Fingerprint of the room catalog (rates, features) plus the inventory version, for cache keys"""
+    raw = json.dumps(ROOMS, sort_keys=True, default=str).encode("utf-8")
+    return f"{hashlib.sha1(raw).hexdigest()[:12]}.{INVENTORY.version}"
+
+async def find_rooms(guests, beds=None, lounge=None, check_in=None, nights=1):
+    try:
+        matches = await INVENTORY.run(INVENTORY.search, guests, beds=beds, lounge=lounge, check_in=check_in, nights=nights)
+    except ValueError:
+        return []
+    return [room for room, _ in matches]
+
+def resolve_check_in(check_in) -> str:
+    """The concrete ISO date a stay starts on; an unspecified check-in means today.
+
+    Bookings store this, never None: a hold re-taken after a restart, or compared on
+    extension, must cover the nights actually booked rather than whatever "today" is then.
+    """
+    return parse_check_in(check_in).isoformat()
+
+async def create_booking(name, room, check_in=None, nights=1):
+    """Hold one room of this type for every night of the stay and persist it; None if sold out"""
+    try:
+        check_in = resolve_check_in(check_in)
+        hold_id = await INVENTORY.run(INVENTORY.hold, room["id"], check_in=check_in, nights=nights)
+    except ValueError:
+        return None
+    if hold_id is None:
+        return None
     booking_id = f"RP-{uuid.uuid4().hex[:6].upper()}"
-    BOOKINGS[booking_id] = {
-        "name": name,
-        "room": room,
-        "expires_at": datetime.utcnow() + timedelta(hours=2),
-    }
+    deadline = HOLD_EXPIRY.deadline()
+    try:
+        await booking_store.insert({
+            "booking_id": booking_id,
+            "name": name,
+            "room_id": room["id"],
+            "check_in": check_in,
+            "nights": nights,
+            "hold_id": hold_id,
+            "status": "held",
+            "created_at": datetime.utcnow().isoformat(),
+            "expires_at": datetime.utcfromtimestamp(deadline).isoformat(),
+        })
+    except Exception as e:
+        log.error("failed to persist booking", booking_id=booking_id, error=str(e))
+        await INVENTORY.run(INVENTORY.release, hold_id)
+        return None
+    HOLD_EXPIRY.track(hold_id, booking_id, deadline)
     return booking_id
+
+async def extend_booking(booking_id, name, room_id, check_in=None, nights=1):
+    """Push a still-held booking's expiry out by another TTL; False if it lapsed or the details changed"""
+    row = await booking_store.get(booking_id)
+    if not row or row["status"] != "held":
+        return False
+    try:
+        check_in = resolve_check_in(check_in)
+    except ValueError:
+        return False
+    if (row["name"], row["room_id"], row["check_in"], row["nights"]) != (name, room_id, check_in, nights):
+        return False
+    deadline = HOLD_EXPIRY.deadline()
+    if not HOLD_EXPIRY.extend(row["hold_id"], booking_id, deadline):
+        return False
+    await booking_store.update_status(booking_id, "held", datetime.utcfromtimestamp(deadline).isoformat())
+    return True
+
+async def confirm_booking(booking_id):
+    """Make a held booking permanent: the rooms stay taken and the expiry timer is dropped"""
+    row = await booking_store.get(booking_id)
+    if not row or row["status"] != "held" or not await INVENTORY.run(INVENTORY.commit, row["hold_id"]):
+        return False
+    HOLD_EXPIRY.confirm(row["hold_id"])
+    await booking_store.update_status(booking_id, "confirmed", only_if="held")
+    return True
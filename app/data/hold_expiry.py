@@ -0,0 +1,250 @@
+"""
+Hold Expiry - timing-wheel scheduler that releases unconfirmed booking holds back to inventory
+"""
+import asyncio
+import math
+import os
+import time
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from app import tracing
+from app.log import get_logger
+
+load_dotenv()
+
+log = get_logger("holds")
+
+HOLD_TTL = float(os.getenv("HOLD_TTL_SECONDS", "7200"))
+TICK = float(os.getenv("HOLD_WHEEL_TICK_SECONDS", "1"))
+SLOTS = int(os.getenv("HOLD_WHEEL_SLOTS", "512"))
+
+HOLD_EXPIRY_LAG_SECONDS = tracing.Histogram(
+    "voice_hold_expiry_lag_seconds", "Seconds from a hold's deadline to its release", "inventory"
+)
+tracing.register(HOLD_EXPIRY_LAG_SECONDS)
+
+
+def _timestamp(expires_at: str | None) -> float | None:
+    """Stored expires_at (naive UTC ISO) as seconds since the epoch"""
+    if not expires_at:
+        return None
+    return datetime.fromisoformat(expires_at).replace(tzinfo=timezone.utc).timestamp()
+
+
+class TimerWheel:
+    """Hashed timing wheel keyed on hold_id.
+
+    A deadline lands in slot ceil(deadline / tick) % slots, so schedule() and cancel()
+    are O(1) dict operations and advance() only visits the slots whose tick has passed.
+    Entries a whole rotation (or more) away share a slot and are skipped until their
+    deadline is actually due.
+    """
+
+    def __init__(self, tick: float = TICK, slots: int = SLOTS, now: float | None = None):
+        self.tick = tick
+        self.slots = slots
+        self.wheel: list[dict[str, tuple[float, str]]] = [{} for _ in range(slots)]
+        self.where: dict[str, int] = {}
+        self.current = int((time.time() if now is None else now) // tick)
+
+    def __len__(self):
+        return len(self.where)
+
+    def schedule(self, key: str, deadline: float, value: str):
+        """(Re)arm key to fire at deadline (seconds since the epoch)"""
+        self.cancel(key)
+        due_tick = max(math.ceil(deadline / self.tick), self.current + 1)
+        slot = due_tick % self.slots
+        self.wheel[slot][key] = (deadline, value)
+        self.where[key] = slot
+
+    def cancel(self, key: str) -> bool:
+        slot = self.where.pop(key, None)
+        if slot is None:
+            return False
+        del self.wheel[slot][key]
+        return True
+
+    def advance(self, now: float) -> list[tuple[str, str, float]]:
+        """Pop everything due by now as (key, value, deadline)"""
+        target = int(now // self.tick)
+        steps = min(target - self.current, self.slots)
+        expired = []
+        for i in range(1, steps + 1):
+            bucket = self.wheel[(self.current + i) % self.slots]
+            if not bucket:
+                continue
+            due = [key for key, (deadline, _) in bucket.items() if deadline <= now]
+            for key in due:
+                deadline, value = bucket.pop(key)
+                del self.where[key]
+                expired.append((key, value, deadline))
+        self.current = max(self.current, target)
+        return expired
+
+
+class HoldExpiry:
+    """Tracks every unconfirmed hold and releases it when its TTL runs out.
+
+    A background task ticks the wheel; each expired hold goes back to inventory and its
+    booking row is marked "expired". confirm() cancels the timer, extend() re-arms it.
+    """
+
+    def __init__(self, inventory, store, ttl: float = HOLD_TTL, tick: float = TICK, slots: int = SLOTS):
+        self.inventory = inventory
+        self.store = store
+        self.ttl = ttl
+        self.wheel = TimerWheel(tick, slots)
+        self.task: asyncio.Task | None = None
+        self.expired = 0
+        self.confirmed = 0
+        self.extended = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+
+    def deadline(self) -> float:
+        return time.time() + self.ttl
+
+    def track(self, hold_id: str, booking_id: str, deadline: float):
+        self.wheel.schedule(hold_id, deadline, booking_id)
+
+    def extend(self, hold_id: str, booking_id: str, deadline: float) -> bool:
+        if hold_id not in self.wheel.where:
+            return False
+        self.wheel.schedule(hold_id, deadline, booking_id)
+        self.extended += 1
+        return True
+
+    def confirm(self, hold_id: str) -> bool:
+        if not self.wheel.cancel(hold_id):
+            return False
+        self.confirmed += 1
+        return True
+
+    async def _expire(self, hold_id: str, booking_id: str, deadline: float, now: float) -> bool:
+        row = await self.store.get(booking_id)
+        if row is not None:
+            if row["status"] != "held":
+                # Confirmed or expired by another worker
+                return False
+            stored = _timestamp(row["expires_at"])
+            if stored and stored > deadline:
+                # Extended by another worker since we scheduled it
+                self.wheel.schedule(hold_id, stored, booking_id)
+                return False
+        if not await self.inventory.run(self.inventory.release, hold_id):
+            return False
+        lag = max(0.0, now - deadline)
+        HOLD_EXPIRY_LAG_SECONDS.observe("shared" if getattr(self.inventory, "shared", False) else "local", lag)
+        self.lag_total += lag
+        self.lag_max = max(self.lag_max, lag)
+        self.expired += 1
+        await self.store.update_status(booking_id, "expired", only_if="held")
+        return True
+
+    async def expire_due(self, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        due = self.wheel.advance(now)
+        if not due:
+            return 0
+        results = await asyncio.gather(
+            *(self._expire(hold_id, booking_id, deadline, now) for hold_id, booking_id, deadline in due),
+            return_exceptions=True,
+        )
+        expired = sum(r is True for r in results)
+        failed = sum(isinstance(r, Exception) for r in results)
+        log.info("expired due holds", expired=expired, due=len(due), failed=failed, active=len(self.wheel))
+        return expired
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.wheel.tick)
+            try:
+                await self.expire_due()
+            except Exception as e:
+                log.error("expiry tick failed", error=str(e), per_second=1)
+
+    async def recover(self) -> int:
+        """Track holds persisted by earlier processes or other workers, so none outlives its TTL"""
+        rows = await self.store.held()
+        for booking_id, hold_id, expires_at in rows:
+            if hold_id in self.wheel.where:
+                continue
+            self.wheel.schedule(hold_id, _timestamp(expires_at) or self.deadline(), booking_id)
+        return len(rows)
+
+    async def restore(self) -> int:
+        """Re-take persisted bookings in a per-process inventory, which starts empty.
+
+        Confirmed bookings are held and committed again; holds still inside their TTL are
+        held again under a new hold_id and tracked; holds that lapsed while the process was
+        down, or whose rooms can no longer be taken, are marked expired.
+        """
+        now = time.time()
+        restored = 0
+        for row in await self.store.active():
+            booking_id, held = row["booking_id"], row["status"] == "held"
+            deadline = _timestamp(row["expires_at"]) or self.deadline()
+            hold_id = None
+            if not held or deadline > now:
+                try:
+                    hold_id = await self.inventory.run(
+                        self.inventory.hold, row["room_id"], check_in=row["check_in"], nights=row["nights"]
+                    )
+                except ValueError:
+                    pass  # the stay is already over
+            if hold_id is None:
+                if held:
+                    await self.store.update_status(booking_id, "expired", only_if="held")
+                    self.expired += 1
+                continue
+            await self.store.set_hold(booking_id, hold_id)
+            if held:
+                self.wheel.schedule(hold_id, deadline, booking_id)
+            else:
+                await self.inventory.run(self.inventory.commit, hold_id)
+            restored += 1
+        return restored
+
+    async def start(self):
+        if self.task and not self.task.done():
+            return
+        try:
+            # A shared inventory still has its holds; a per-process one has to take them again
+            shared = getattr(self.inventory, "shared", False)
+            recovered = await (self.recover() if shared else self.restore())
+            if recovered:
+                log.info("tracking holds from the booking store", recovered=recovered)
+        except Exception as e:
+            log.error("could not load pending holds", error=str(e))
+        self.task = asyncio.create_task(self._run(), name="hold-expiry")
+
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def metrics(self) -> list:
+        """Live hold counts for /metrics"""
+        return [
+            tracing.Sampled("voice_holds_active", "gauge", "Holds waiting for payment or expiry", lambda: len(self.wheel)),
+            tracing.Sampled(
+                "voice_hold_events_total", "counter", "Holds expired, confirmed or extended",
+                lambda: {"expired": self.expired, "confirmed": self.confirmed, "extended": self.extended},
+                label="event",
+            ),
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "active_holds": len(self.wheel),
+            "expired": self.expired,
+            "confirmed": self.confirmed,
+            "extended": self.extended,
+            "avg_expiry_lag_ms": self.lag_total / self.expired * 1000 if self.expired else 0.0,
+            "max_expiry_lag_ms": self.lag_max * 1000,
+        }
@@ -0,0 +1,157 @@
+"""
+Inventory Engine - per-room-type, per-night availability with indexed, vectorized range queries
+"""
+import threading
+import uuid
+from datetime import date, datetime
+
+import numpy as np
+
+HORIZON_DAYS = 365
+
+
+def parse_check_in(check_in) -> date:
+    if check_in is None or check_in == "TBD":
+        return datetime.utcnow().date()
+    if isinstance(check_in, datetime):
+        return check_in.date()
+    if isinstance(check_in, date):
+        return check_in
+    return datetime.strptime(check_in, "%Y-%m-%d").date()
+
+
+class InventoryEngine:
+    """Availability matrix of shape (room types, nights in horizon).
+
+    Rooms are stored sorted by max_guests so "fits N guests" is a suffix found with
+    searchsorted; beds and lounge have precomputed boolean masks. A range query is a
+    min() over the night columns for all candidate types at once. hold() checks and
+    decrements a whole date range under one lock, so concurrent calls cannot oversell.
+    The horizon rolls with the calendar: once the date changes, past nights drop off the
+    front and the same number open at the end, so a long-running process always has
+    horizon_days bookable from today.
+    """
+
+    # Counters live in this process only; see shared_state.SQLiteInventory for multi-worker use
+    shared = False
+
+    def __init__(self, rooms: list[dict], horizon_days: int = HORIZON_DAYS, start: date | None = None):
+        self.start = start or datetime.utcnow().date()
+        self.horizon_days = horizon_days
+        self.lock = threading.Lock()
+        self._version = 0
+        self.holds: dict[str, tuple[int, int, int, int]] = {}
+        self.load(rooms)
+
+    @property
+    def version(self) -> int:
+        """Bumped on every change to availability, for cache keys"""
+        return self._version
+
+    def _index(self, rooms: list[dict]):
+        order = sorted(range(len(rooms)), key=lambda i: rooms[i]["max_guests"])
+        self.rooms = [rooms[i] for i in order]
+        self.row_of = {r["id"]: row for row, r in enumerate(self.rooms)}
+        self.capacity = np.array([r["max_guests"] for r in self.rooms], dtype=np.int32)
+        beds = np.array([r["beds"] for r in self.rooms], dtype=np.int32)
+        lounge = np.array([bool(r["lounge"]) for r in self.rooms], dtype=bool)
+        self.beds_index = {int(b): beds == b for b in np.unique(beds)}
+        self.lounge_index = {True: lounge, False: ~lounge}
+
+    def load(self, rooms: list[dict]):
+        self._index(rooms)
+        self.base = np.array([r.get("inventory", 0) for r in self.rooms], dtype=np.int32)
+        self.available = np.repeat(self.base[:, None], self.horizon_days, axis=1)
+        self.holds.clear()
+        self._version += 1
+
+    def _roll(self):
+        """Move the horizon to start today; hold offsets shift with it"""
+        today = datetime.utcnow().date()
+        if today <= self.start:
+            return
+        with self.lock:
+            days = (today - self.start).days
+            if days <= 0:
+                return
+            kept = self.available[:, min(days, self.horizon_days):]
+            fresh = np.repeat(self.base[:, None], self.horizon_days - kept.shape[1], axis=1)
+            self.available = np.concatenate([kept, fresh], axis=1)
+            self.holds = {hold_id: (row, d0 - days, d1 - days, qty) for hold_id, (row, d0, d1, qty) in self.holds.items()}
+            self.start = today
+            self._version += 1
+
+    def _span(self, check_in, nights: int) -> tuple[int, int]:
+        d0 = (parse_check_in(check_in) - self.start).days
+        nights = max(1, int(nights or 1))
+        if d0 < 0 or d0 + nights > self.horizon_days:
+            raise ValueError(f"stay {check_in} +{nights} nights is outside the booking horizon")
+        return d0, d0 + nights
+
+    def _candidates(self, guests: int, beds=None, lounge=None) -> np.ndarray:
+        first = int(np.searchsorted(self.capacity, guests, side="left"))
+        mask = np.zeros(len(self.rooms), dtype=bool)
+        mask[first:] = True
+        if beds:
+            mask &= self.beds_index.get(int(beds), np.zeros(len(self.rooms), dtype=bool))
+        if lounge is not None:
+            mask &= self.lounge_index[bool(lounge)]
+        return np.flatnonzero(mask)
+
+    def free_counts(self, rows: np.ndarray, check_in=None, nights: int = 1) -> np.ndarray:
+        self._roll()
+        with self.lock:
+            d0, d1 = self._span(check_in, nights)
+            if len(rows) == 0:
+                return np.zeros(0, dtype=np.int32)
+            return self.available[rows, d0:d1].min(axis=1)
+
+    def search(self, guests: int, beds=None, lounge=None, check_in=None, nights: int = 1) -> list[tuple[dict, int]]:
+        """Room types that fit and have at least one room free on every night of the stay"""
+        rows = self._candidates(guests, beds, lounge)
+        free = self.free_counts(rows, check_in, nights)
+        ok = free > 0
+        # Ascending capacity, i.e. smallest room that fits first
+        return [(self.rooms[r], int(f)) for r, f in zip(rows[ok], free[ok])]
+
+    def hold(self, room_id: str, check_in=None, nights: int = 1, qty: int = 1) -> str | None:
+        """Atomically take qty rooms for every night of the stay; None if any night is short"""
+        row = self.row_of.get(room_id)
+        if row is None:
+            return None
+        self._roll()
+        with self.lock:
+            d0, d1 = self._span(check_in, nights)
+            span = self.available[row, d0:d1]
+            if span.min() < qty:
+                return None
+            span -= qty
+            hold_id = uuid.uuid4().hex
+            self.holds[hold_id] = (row, d0, d1, qty)
+            self._version += 1
+        return hold_id
+
+    def commit(self, hold_id: str) -> bool:
+        """Make a hold permanent; inventory stays taken"""
+        with self.lock:
+            return self.holds.pop(hold_id, None) is not None
+
+    def release(self, hold_id: str) -> bool:
+        """Give a held range back to inventory"""
+        with self.lock:
+            held = self.holds.pop(hold_id, None)
+            if held is None:
+                return False
+            row, d0, d1, qty = held
+            # Nights that rolled off the horizon meanwhile have nothing to give back
+            self.available[row, max(d0, 0):max(d1, 0)] += qty
+            self._version += 1
+            return True
+
+    async def run(self, fn, *args, **kwargs):
+        """Call one of the methods above from the event loop.
+
+        In-process counters are a few numpy ops, so they answer inline; backends that touch
+        disk or take cross-process locks override this to run off the loop.
+        """
+        return fn(*args, **kwargs)
@@ -0,0 +1,228 @@
+"""
+Shared State - inventory backend selection, with a SQLite store that several worker processes can share
+"""
+import asyncio
+import functools
+import os
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.data.inventory import InventoryEngine, HORIZON_DAYS
+from app.log import get_logger
+
+load_dotenv()
+
+log = get_logger("state")
+
+# "memory": per-process InventoryEngine (single worker only); "sqlite": one file shared by every worker
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "state.db")
+# How stale the cached inventory version may get before other workers' writes are picked up
+VERSION_REFRESH = float(os.getenv("STATE_VERSION_REFRESH_MS", "500")) / 1000
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS inventory (
+        room_id   TEXT NOT NULL,
+        night     INTEGER NOT NULL,
+        available INTEGER NOT NULL,
+        PRIMARY KEY (room_id, night)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS holds (
+        hold_id  TEXT PRIMARY KEY,
+        room_id  TEXT NOT NULL,
+        night_from INTEGER NOT NULL,
+        night_to   INTEGER NOT NULL,
+        qty      INTEGER NOT NULL
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)",
+)
+
+
+class SQLiteInventory(InventoryEngine):
+    """InventoryEngine whose counters live in a SQLite file instead of process memory.
+
+    Room filtering (capacity, beds, lounge) still uses the in-memory catalog indexes; only
+    per-night counts and holds are shared. Nights are stored as absolute date ordinals, so
+    workers started at different times agree. hold() and release() run inside BEGIN
+    IMMEDIATE, which takes SQLite's single write lock across processes: the check and the
+    decrement of every night in the stay happen atomically, so no worker can oversell.
+
+    Waiting on that lock can take seconds, so run() sends every query to one dedicated
+    thread, as BookingStore does. The inventory version is cached: our own writes update
+    it, and other workers' writes are picked up by a refresh on that thread at most
+    VERSION_REFRESH later, so building a cache key never queries SQLite on the loop.
+    """
+
+    shared = True
+
+    def __init__(self, rooms: list[dict], path: str = STATE_DB_PATH, horizon_days: int = HORIZON_DAYS, start=None):
+        self.path = path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inventory-db")
+        self.version_read_at = 0.0
+        self.refreshing = False
+        self.conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self.conn.execute(statement)
+        super().__init__(rooms, horizon_days=horizon_days, start=start)
+
+    @property
+    def version(self) -> int:
+        if not self.refreshing and time.monotonic() - self.version_read_at > VERSION_REFRESH:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._read_version()
+            else:
+                self.refreshing = True
+                loop.run_in_executor(self.executor, self._read_version)
+        return self._version
+
+    def _read_version(self):
+        try:
+            self._version = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+            self.version_read_at = time.monotonic()
+        finally:
+            self.refreshing = False
+
+    async def run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    def _write(self, fn, *args):
+        """Run fn inside a cross-process write transaction"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(*args)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    def _bump(self):
+        self._version = self.conn.execute(
+            "UPDATE meta SET value = value + 1 WHERE key = 'version' RETURNING value"
+        ).fetchone()[0]
+        self.version_read_at = time.monotonic()
+
+    def load(self, rooms: list[dict]):
+        """Index the catalog and seed counters for any night not yet in the shared store"""
+        self._index(rooms)
+        base = self.start.toordinal()
+        self._seed(base, base + self.horizon_days)
+
+    def _seed(self, n0: int, n1: int):
+        rows = [(r["id"], night, r.get("inventory", 0)) for r in self.rooms for night in range(n0, n1)]
+
+        def seed():
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO inventory (room_id, night, available) VALUES (?, ?, ?)", rows
+            )
+            self._bump()
+
+        self._write(seed)
+
+    def _roll(self):
+        """Nights are absolute ordinals, so rolling only moves the start and seeds the new nights"""
+        today = datetime.utcnow().date()
+        if today <= self.start:
+            return
+        end = self.start.toordinal() + self.horizon_days
+        self.start = today
+        self._seed(max(end, today.toordinal()), today.toordinal() + self.horizon_days)
+
+    def _nights(self, check_in, nights: int) -> tuple[int, int]:
+        d0, d1 = self._span(check_in, nights)
+        base = self.start.toordinal()
+        return base + d0, base + d1
+
+    def free_counts(self, rows: np.ndarray, check_in=None, nights: int = 1) -> np.ndarray:
+        self._roll()
+        n0, n1 = self._nights(check_in, nights)
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.int32)
+        ids = [self.rooms[r]["id"] for r in rows]
+        cur = self.conn.execute(
+            f"SELECT room_id, MIN(available), COUNT(*) FROM inventory "
+            f"WHERE night >= ? AND night < ? AND room_id IN ({', '.join('?' * len(ids))}) GROUP BY room_id",
+            (n0, n1, *ids),
+        )
+        # A night that was never seeded counts as sold out
+        free = {room_id: low if count == n1 - n0 else 0 for room_id, low, count in cur}
+        return np.array([free.get(room_id, 0) for room_id in ids], dtype=np.int32)
+
+    def hold(self, room_id: str, check_in=None, nights: int = 1, qty: int = 1) -> str | None:
+        if room_id not in self.row_of:
+            return None
+        self._roll()
+        n0, n1 = self._nights(check_in, nights)
+
+        def take():
+            low, count = self.conn.execute(
+                "SELECT MIN(available), COUNT(*) FROM inventory WHERE room_id = ? AND night >= ? AND night < ?",
+                (room_id, n0, n1),
+            ).fetchone()
+            if count != n1 - n0 or low < qty:
+                return None
+            self.conn.execute(
+                "UPDATE inventory SET available = available - ? WHERE room_id = ? AND night >= ? AND night < ?",
+                (qty, room_id, n0, n1),
+            )
+            hold_id = uuid.uuid4().hex
+            self.conn.execute(
+                "INSERT INTO holds (hold_id, room_id, night_from, night_to, qty) VALUES (?, ?, ?, ?, ?)",
+                (hold_id, room_id, n0, n1, qty),
+            )
+            self._bump()
+            return hold_id
+
+        return self._write(take)
+
+    def commit(self, hold_id: str) -> bool:
+        with self.lock:
+            return self.conn.execute("DELETE FROM holds WHERE hold_id = ?", (hold_id,)).rowcount > 0
+
+    def release(self, hold_id: str) -> bool:
+        def give_back():
+            held = self.conn.execute(
+                "SELECT room_id, night_from, night_to, qty FROM holds WHERE hold_id = ?", (hold_id,)
+            ).fetchone()
+            if held is None:
+                return False
+            room_id, n0, n1, qty = held
+            self.conn.execute(
+                "UPDATE inventory SET available = available + ? WHERE room_id = ? AND night >= ? AND night < ?",
+                (qty, room_id, n0, n1),
+            )
+            self.conn.execute("DELETE FROM holds WHERE hold_id = ?", (hold_id,))
+            self._bump()
+            return True
+
+        return self._write(give_back)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.conn.close()
+
+
+def make_inventory(rooms: list[dict]) -> InventoryEngine:
+    if STATE_BACKEND == "sqlite":
+        log.info("shared SQLite inventory", path=STATE_DB_PATH)
+        return SQLiteInventory(rooms)
+    if STATE_BACKEND != "memory":
+        raise ValueError(f"Unknown STATE_BACKEND {STATE_BACKEND!r} (expected 'memory' or 'sqlite')")
+    return InventoryEngine(rooms)
@@ -0,0 +1,107 @@
+"""
+Fast Path - answers fully-specified availability and pricing turns without calling the LLM
+"""
+import json
+import re
+from app.segmenter import segment_text
+from app.log import get_logger
+
+log = get_logger("fast-path")
+
+AVAILABILITY_RE = re.compile(r"\b(available|availability|do you have|any rooms?|a room|rooms? for)\b")
+PRICING_RE = re.compile(r"\b(price|prices|rate|rates|cost|tariff|how much)\b")
+# Anything that needs judgement, a side effect, or information the templates don't cover
+DEFER_RE = re.compile(
+    r"\b(book|reserve|confirm|name is|cancel|change|instead|but|pay|payment|discount|refund|"
+    r"breakfast|parking|pool|wifi|check ?out|why|compare|cheapest|best|recommend|or)\b"
+)
+MAX_WORDS = 25
+
+FAST_PATH_STATS = {"turns": 0, "hits": 0}
+
+
+def _money(amount: int) -> str:
+    return f"{amount:,} rupees"
+
+
+def _join(items: list[str]) -> str:
+    if len(items) == 1:
+        return items[0]
+    return ", ".join(items[:-1]) + " and " + items[-1]
+
+
+def render_availability(rooms: list[dict], guests: int, nights: int | None) -> str:
+    options = []
+    for r in rooms:
+        line = f"the {r['name']} at {_money(r['price'])} per night"
+        if nights and nights > 1:
+            line += f", which is {_money(r['price'] * nights)} for {nights} nights"
+        options.append(line)
+    noun = "option" if len(rooms) == 1 else "options"
+    people = "guest" if guests == 1 else "guests"
+    closing = "Would you like to go ahead with it?" if len(rooms) == 1 else "Which one would you prefer?"
+    return f"For {guests} {people}, we have {len(rooms)} {noun}: {_join(options)}. {closing}"
+
+
+def _classify(text: str, slots: dict) -> tuple[str, int | None, int | None] | None:
+    lower = text.lower()
+    if len(lower.split()) > MAX_WORDS or DEFER_RE.search(lower):
+        return None
+    guests = slots.get("guests")
+    nights = slots.get("nights")
+    if AVAILABILITY_RE.search(lower) and guests:
+        kind = "availability"
+    elif PRICING_RE.search(lower):
+        kind = "pricing"
+    else:
+        return None
+    return kind, guests, nights
+
+
+async def try_fast_path(agent, user_text: str, slots: dict) -> list[str] | None:
+    """Run the tools directly for a confidently-parsed turn and return the reply segments.
+
+    Returns None (so the LLM handles the turn) whenever the utterance is ambiguous or the
+    result needs more than a templated answer. On a hit the exchange is recorded in
+    agent.messages exactly as an LLM tool round-trip would be.
+    """
+    # Speculative forks run the same path; only the committed turn is counted
+    count = not agent.speculative
+    if count:
+        FAST_PATH_STATS["turns"] += 1
+    parsed = _classify(user_text, slots)
+    if parsed is None:
+        return None
+    kind, guests, nights = parsed
+    guests = guests or agent.context.get("guests")
+    if not guests:
+        return None
+    nights = nights or agent.context.get("nights")
+
+    args = {"guests": guests}
+    if agent.context.get("beds") is not None:
+        args["beds"] = agent.context["beds"]
+    if agent.context.get("lounge") is not None:
+        args["lounge"] = agent.context["lounge"]
+    if nights:
+        args["nights"] = nights
+    # Nothing is written to agent.context unless the fast path answers: on a fallback the
+    # LLM turn must start from the state the caller has actually heard
+    preview = await agent.tool_runtime.preview_availability(**args)
+    rooms = preview["available_rooms"]
+    if not rooms:
+        # Suggesting alternatives is the LLM's job
+        return None
+
+    reply = render_availability(rooms, guests, nights)
+    result = agent.tool_runtime.commit_availability(preview)
+    agent.record_exchange([("get_availability", json.dumps(args), result)], reply)
+    agent._finish_turn(user_text, reply)
+
+    if count:
+        FAST_PATH_STATS["hits"] += 1
+        log.info(
+            "hit", kind=kind, guests=guests, nights=nights,
+            hit_rate=round(FAST_PATH_STATS["hits"] / FAST_PATH_STATS["turns"], 2),
+        )
+    return segment_text(reply)
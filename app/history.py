@@ -0,0 +1,137 @@
+"""
+History - keeps HotelAgent.messages within a prompt-token budget
+"""
+import json
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "3000"))
+KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "4"))
+
+STATE_PREFIX = "Conversation state: "
+TOOL_STATE_PREFIX = "Tool results: "
+
+ROOM_FIELDS = ("id", "name", "beds", "lounge", "breakfast", "max_guests", "price", "total_price")
+STATE_SLOTS = ("intent", "check_in", "nights", "guests", "beds", "lounge", "selected_room", "guest_name", "booking_id")
+
+
+def estimate_tokens(messages: list[dict]) -> int:
+    """Cheap prompt-size estimate (~4 characters per token, plus per-message overhead)"""
+    total = 0
+    for m in messages:
+        total += 4 + len(m.get("content") or "") // 4
+        for tc in m.get("tool_calls") or []:
+            total += 8 + len(tc["function"]["arguments"] or "") // 4
+    return total
+
+
+def _slim_room(room: dict | None) -> dict | None:
+    if not room:
+        return room
+    return {k: room[k] for k in ROOM_FIELDS if k in room}
+
+
+def _slots(context: dict) -> dict:
+    return {k: context[k] for k in STATE_SLOTS if context.get(k) is not None}
+
+
+def slim_tool_result(name: str, result) -> dict:
+    """Only the fields the model needs to phrase the next reply; no full context echo"""
+    if not isinstance(result, dict):
+        return {"result": result}
+    if "error" in result:
+        slim = {"error": result["error"]}
+        if isinstance(result.get("context"), dict):
+            slim["known"] = _slots(result["context"])
+        return slim
+    if name == "get_availability":
+        return {"available_rooms": [_slim_room(r) for r in result.get("available_rooms", [])]}
+    if name == "choose_room":
+        return {"selected_room": _slim_room(result.get("selected_room"))}
+    return result
+
+
+def state_summary(context: dict) -> str:
+    parts = [f"{k}={v}" for k, v in _slots(context).items()]
+    rooms = context.get("available_rooms") or []
+    if rooms:
+        offered = ", ".join(
+            f"{r['id']} ({r['price']}/night, {r['beds']} beds, lounge={r['lounge']}, max {r['max_guests']})"
+            for r in rooms
+        )
+        parts.append(f"offered rooms: {offered}")
+    return "; ".join(parts) if parts else "nothing collected yet"
+
+
+def _prefix_len(messages: list[dict]) -> int:
+    n = 0
+    while n < len(messages) and messages[n]["role"] == "system" and not messages[n]["content"].startswith(STATE_PREFIX):
+        n += 1
+    return n
+
+
+def exchange_note(names: list[str], context: dict) -> str:
+    """State note for one tool exchange; taken as soon as its results are in"""
+    return f"{TOOL_STATE_PREFIX}{', '.join(names)} -> {state_summary(context)}"
+
+
+def collapse_tool_exchanges(messages: list[dict], context: dict, notes: dict[str, str] | None = None) -> None:
+    """Replace each finished assistant(tool_calls) + tool-results run with one assistant note.
+
+    notes maps an exchange's first tool_call id to the note recorded when it ran, so each
+    note reflects the state at that point of the call; context is only the fallback.
+    """
+    notes = notes if notes is not None else {}
+    i = 0
+    out = []
+    while i < len(messages):
+        m = messages[i]
+        if m["role"] == "assistant" and m.get("tool_calls"):
+            j = i + 1
+            while j < len(messages) and messages[j]["role"] == "tool":
+                j += 1
+            note = notes.pop(m["tool_calls"][0]["id"], None) or exchange_note(
+                [tc["function"]["name"] for tc in m["tool_calls"]], context
+            )
+            content = m.get("content")
+            out.append({"role": "assistant", "content": f"{content}\n{note}" if content else note})
+            i = j
+            continue
+        out.append(m)
+        i += 1
+    messages[:] = out
+
+
+def enforce_budget(messages: list[dict], context: dict, budget: int = TOKEN_BUDGET, keep_turns: int = KEEP_TURNS) -> None:
+    """Drop the oldest turns past the budget, keeping a state summary in their place"""
+    if estimate_tokens(messages) <= budget:
+        return
+    start = _prefix_len(messages)
+    has_state = start < len(messages) and messages[start]["content"].startswith(STATE_PREFIX)
+    body_start = start + 1 if has_state else start
+    user_idx = [i for i in range(body_start, len(messages)) if messages[i]["role"] == "user"]
+    dropped = False
+    while len(user_idx) > keep_turns and estimate_tokens(messages) > budget:
+        cut = user_idx[1]
+        del messages[body_start:cut]
+        shift = cut - body_start
+        user_idx = [i - shift for i in user_idx[1:]]
+        dropped = True
+    if dropped:
+        state = {"role": "system", "content": STATE_PREFIX + state_summary(context)}
+        if has_state:
+            messages[start] = state
+        else:
+            messages.insert(start, state)
+
+
+def compact(messages: list[dict], context: dict, notes: dict[str, str] | None = None) -> None:
+    """End-of-turn compaction: collapse resolved tool exchanges, then enforce the token budget"""
+    collapse_tool_exchanges(messages, context, notes)
+    enforce_budget(messages, context)
+
+
+def tool_content(name: str, result) -> str:
+    return json.dumps(slim_tool_result(name, result), separators=(",", ":"))
@@ -1,36 +1,85 @@
 """
 Interruption Manager - tracks valid response sequences and handles barge-in
 """
+from app.log import get_logger
+
+log = get_logger("interrupt")
+
 
 class InterruptionManager:
     def __init__(self):
         self.current_sequence_id = 0
         self.active_sequences = set()
         self.is_agent_speaking = False
+        self.heard: dict[int, tuple[float, float]] = {}  # interrupted sequence -> (seconds heard, seconds sent)
+        self.spoken: dict[int, list[tuple[str, float]]] = {}  # sequence -> (sentence, seconds sent at its end)
         
     def start_response(self) -> int:
         """Start a new agent response - returns sequence ID"""
         self.current_sequence_id += 1
         self.active_sequences.add(self.current_sequence_id)
         self.is_agent_speaking = True
-        print(f"[interrupt] Starting response sequence_id={self.current_sequence_id}")
+        log.debug("starting response", sequence_id=self.current_sequence_id)
         return self.current_sequence_id
     
-    def interrupt(self):
-        """User interrupted - invalidate all active sequences"""
+    def interrupt(self, positions: dict[int, tuple[float, float]] | None = None):
+        """User interrupted - invalidate all active sequences.
+
+        positions comes from the playout clock: {sequence_id: (seconds heard, seconds sent)}
+        """
         if self.active_sequences:
-            print(f"[interrupt] User interrupted! Invalidating {len(self.active_sequences)} sequences")
+            heard = {seq: positions[seq] for seq in self.active_sequences if positions and seq in positions}
+            self.heard.update(heard)
+            log.info(
+                "caller interrupted; invalidating sequences", active=len(self.active_sequences),
+                heard_ms={seq: round(h * 1000) for seq, (h, _) in heard.items()},
+                sent_ms={seq: round(s * 1000) for seq, (_, s) in heard.items()},
+            )
             self.active_sequences.clear()
             self.is_agent_speaking = False
         
+    def heard_ms(self, sequence_id: int) -> float | None:
+        """How much of an interrupted reply the caller heard, or None if it was not cut off"""
+        position = self.heard.get(sequence_id)
+        return position[0] * 1000 if position else None
+
+    def sentence_sent(self, sequence_id: int, sentence: str, sent_seconds: float):
+        """All of a sentence's audio is out; sent_seconds is the sequence's total so far"""
+        self.spoken.setdefault(sequence_id, []).append((sentence, sent_seconds))
+
+    def cut_reply(self, sequence_id: int) -> tuple[str, str] | None:
+        """(first sentence sent, words the caller heard) for an interrupted reply, or None.
+
+        Whole sentences count once the playout clock is past their end; the sentence being
+        played when the caller cut in is kept in proportion to how far into it they were.
+        """
+        heard_ms = self.heard_ms(sequence_id)
+        spoken = self.spoken.get(sequence_id)
+        if heard_ms is None or not spoken:
+            return None
+        heard = heard_ms / 1000
+        parts, start = [], 0.0
+        for sentence, end in spoken:
+            if heard >= end:
+                parts.append(sentence)
+                start = end
+                continue
+            words = sentence.split()
+            if end > start:
+                parts.append(" ".join(words[:int(len(words) * (heard - start) / (end - start))]))
+            break
+        return spoken[0][0], " ".join(p for p in parts if p)
+
     def is_valid(self, sequence_id: int) -> bool:
         """Check if this sequence should still continue"""
         return sequence_id in self.active_sequences
     
     def finish_response(self, sequence_id: int):
         """Mark response as complete"""
+        self.spoken.pop(sequence_id, None)
+        self.heard.pop(sequence_id, None)
         if sequence_id in self.active_sequences:
             self.active_sequences.discard(sequence_id)
             if not self.active_sequences:
                 self.is_agent_speaking = False
-                print(f"[interrupt] Response complete sequence_id={sequence_id}")
+                log.debug("response complete", sequence_id=sequence_id)
@@ -1,20 +1,50 @@
 import os
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
+from app.log import get_logger
 
 load_dotenv()
 
+log = get_logger("llm")
+
 API_KEY = os.getenv("OPENAI_API_KEY")
 BASE_URL = os.getenv("OPENAI_BASE_URL") or "https://integrate.api.nvidia.com/v1"
 MODEL = os.getenv("LLM_MODEL") or "openai/gpt-oss-120b"
+STREAM_USAGE = os.getenv("LLM_STREAM_USAGE", "true").lower() == "true"
+
+USAGE_STATS = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
 
 if not API_KEY:
-    print("WARNING: OPENAI_API_KEY is not set. LLM calls will fail.")
+    log.warning("OPENAI_API_KEY is not set; LLM calls will fail")
     client = None
 else:
     client = AsyncOpenAI(api_key=API_KEY, base_url=BASE_URL)
 
 
+def _field(obj, name):
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _record_usage(usage):
+    """Log prompt/cached token counts so prefix-cache hits are visible per request"""
+    if usage is None:
+        return
+    prompt = _field(usage, "prompt_tokens") or 0
+    completion = _field(usage, "completion_tokens") or 0
+    cached = _field(_field(usage, "prompt_tokens_details") or {}, "cached_tokens") or 0
+    USAGE_STATS["requests"] += 1
+    USAGE_STATS["prompt_tokens"] += prompt
+    USAGE_STATS["cached_tokens"] += cached
+    USAGE_STATS["completion_tokens"] += completion
+    ratio = USAGE_STATS["cached_tokens"] / USAGE_STATS["prompt_tokens"] if USAGE_STATS["prompt_tokens"] else 0.0
+    log.info(
+        "usage", prompt_tokens=prompt, cached_tokens=cached, completion_tokens=completion,
+        cached_ratio_total=round(ratio, 2),
+    )
+
+
 async def generate_chat(messages, tools=None, temperature=0.2, max_tokens=400):
     """Non-streaming chat completion (for tool calls)"""
     if not client:
@@ -27,6 +57,7 @@ async def generate_chat(messages, tools=None, temperature=0.2, max_tokens=400):
             temperature=temperature,
             max_tokens=max_tokens,
         )
+        _record_usage(getattr(res, "usage", None))
         return res
     except Exception as e:
         status = getattr(e, "status_code", None)
@@ -37,9 +68,7 @@ async def generate_chat(messages, tools=None, temperature=0.2, max_tokens=400):
                 status = status or getattr(e.response, "status_code", None)
             except Exception:
                 body = repr(e.response)
-        print(
-            f"[llm] request failed model={MODEL} base_url={BASE_URL} status={status} body={body} err={e}"
-        )
+        log.error("request failed", model=MODEL, base_url=BASE_URL, status=status, body=body, error=str(e))
         raise
 
 
@@ -55,8 +84,14 @@ async def generate_chat_stream(messages, tools=None, temperature=0.2, max_tokens
             temperature=temperature,
             max_tokens=max_tokens,
             stream=True,
+            **({"stream_options": {"include_usage": True}} if STREAM_USAGE else {}),
         )
         async for chunk in stream:
+            usage = getattr(chunk, "usage", None)
+            if usage is None:
+                # Groq reports streaming usage under x_groq
+                usage = _field(_field(chunk, "x_groq") or {}, "usage")
+            _record_usage(usage)
             yield chunk
     except Exception as e:
         status = getattr(e, "status_code", None)
@@ -67,7 +102,5 @@ async def generate_chat_stream(messages, tools=None, temperature=0.2, max_tokens
                 status = status or getattr(e.response, "status_code", None)
             except Exception:
                 body = repr(e.response)
-        print(
-            f"[llm] stream failed model={MODEL} base_url={BASE_URL} status={status} body={body} err={e}"
-        )
+        log.error("stream failed", model=MODEL, base_url=BASE_URL, status=status, body=body, error=str(e))
         raise
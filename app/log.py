@@ -0,0 +1,239 @@
+"""
+Log - non-blocking structured logger; records are queued on the caller and written by a background thread
+"""
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from contextvars import ContextVar, Token
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARN", ERROR: "ERROR"}
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "warn": WARNING, "error": ERROR}
+
+LOG_LEVEL = LEVELS.get(os.getenv("LOG_LEVEL", "info").lower(), INFO)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" or "json" (one object per line)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+BATCH_SIZE = 256
+
+# Per-call fields (stream_sid, sequence_id) attached to every record logged in this context
+log_context: ContextVar[dict] = ContextVar("log_context", default={})
+
+
+def bind_context(**fields) -> Token:
+    """Add fields to the logging context of the current task (and tasks it creates)"""
+    return log_context.set({**log_context.get(), **fields})
+
+
+def reset_context(token: Token):
+    log_context.reset(token)
+
+
+def _value(value) -> str:
+    if isinstance(value, str):
+        return value if value and " " not in value and "=" not in value else json.dumps(value)
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, default=str)
+    if isinstance(value, float):
+        return f"{value:.3f}".rstrip("0").rstrip(".")
+    return str(value)
+
+
+def format_text(record: tuple) -> str:
+    at, level, tag, event, context, fields = record
+    stamp = time.strftime("%H:%M:%S", time.localtime(at)) + f".{int(at % 1 * 1000):03d}"
+    parts = [stamp, LEVEL_NAMES[level].ljust(5), f"[{tag}]", event]
+    parts.extend(f"{key}={_value(value)}" for key, value in fields.items() if key != "traceback")
+    parts.extend(f"{key}={_value(value)}" for key, value in context.items() if key not in fields)
+    line = " ".join(parts)
+    if "traceback" in fields:
+        line += "\n" + fields["traceback"].rstrip()
+    return line
+
+
+def format_json(record: tuple) -> str:
+    at, level, tag, event, context, fields = record
+    payload = {"ts": round(at, 3), "level": LEVEL_NAMES[level].lower(), "tag": tag, "event": event}
+    payload.update(context)
+    payload.update(fields)
+    return json.dumps(payload, default=str)
+
+
+class LogWriter:
+    """Bounded queue drained by one daemon thread.
+
+    emit() never blocks: formatting and the stdout write happen on the writer thread, so a
+    slow terminal or pipe cannot stall the event loop. When the queue is full the record is
+    dropped and counted; the writer reports the drop count once it catches up.
+    """
+
+    def __init__(self, maxsize: int = LOG_QUEUE_SIZE, fmt: str = LOG_FORMAT):
+        self.queue: queue.Queue = queue.Queue(maxsize)
+        self.format = format_json if fmt == "json" else format_text
+        self.written = 0
+        self.dropped = 0
+        self.reported_drops = 0
+        self.thread: threading.Thread | None = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self.thread.start()
+
+    def emit(self, record: tuple):
+        if self.thread is None:
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _lines(self, records: list) -> list[str]:
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record))
+            except Exception as e:
+                lines.append(f"[log] could not format record from [{record[2]}] {record[3]}: {e}")
+        if self.dropped > self.reported_drops:
+            lines.append(self.format((time.time(), WARNING, "log", "queue full, records dropped", {}, {
+                "dropped": self.dropped - self.reported_drops,
+            })))
+            self.reported_drops = self.dropped
+        return lines
+
+    def _run(self):
+        while True:
+            record = self.queue.get()
+            if record is None:
+                return
+            records = [record]
+            stop = False
+            while len(records) < BATCH_SIZE:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                records.append(record)
+            try:
+                out = sys.stdout
+                out.write("\n".join(self._lines(records)) + "\n")
+                out.flush()
+                self.written += len(records)
+            except Exception:
+                pass
+            if stop:
+                return
+
+    def flush(self, timeout: float = 2.0):
+        """Stop the writer after everything queued so far has been written"""
+        thread = self.thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+        self.thread = None
+
+
+writer = LogWriter()
+atexit.register(writer.flush)
+
+
+class Logger:
+    """Leveled logger for one component tag.
+
+    Each call takes a short event name plus keyword fields, e.g.
+        log.info("final transcript", text=text)
+    Fields are formatted on the writer thread. High-frequency events can be thinned with
+    every=N (keep one record in N) or per_second=R (token bucket, bursts up to R); the next
+    record that gets through carries skipped=<count> for what was held back.
+    """
+
+    def __init__(self, tag: str):
+        self.tag = tag
+        self.counts: dict[str, int] = {}
+        self.buckets: dict[str, list] = {}  # event -> [tokens, last refill]
+        self.skipped: dict[str, int] = {}
+        self.suppressed = 0
+
+    def _allow(self, event: str, every: int, per_second: float | None) -> bool:
+        if every > 1:
+            count = self.counts.get(event, 0)
+            self.counts[event] = count + 1
+            if count % every:
+                return False
+        if per_second:
+            now = time.monotonic()
+            bucket = self.buckets.get(event)
+            if bucket is None:
+                bucket = self.buckets[event] = [per_second, now]
+            bucket[0] = min(per_second, bucket[0] + (now - bucket[1]) * per_second)
+            bucket[1] = now
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+        return True
+
+    def log(self, level: int, event: str, every: int = 1, per_second: float | None = None,
+            exc_info: bool = False, **fields):
+        if level < LOG_LEVEL:
+            return
+        if (every > 1 or per_second) and not self._allow(event, every, per_second):
+            self.skipped[event] = self.skipped.get(event, 0) + 1
+            self.suppressed += 1
+            return
+        skipped = self.skipped.pop(event, 0) if self.skipped else 0
+        if skipped:
+            fields["skipped"] = skipped
+        if exc_info:
+            fields["traceback"] = traceback.format_exc()
+        writer.emit((time.time(), level, self.tag, event, log_context.get(), fields))
+
+    def debug(self, event: str, **kwargs):
+        self.log(DEBUG, event, **kwargs)
+
+    def info(self, event: str, **kwargs):
+        self.log(INFO, event, **kwargs)
+
+    def warning(self, event: str, **kwargs):
+        self.log(WARNING, event, **kwargs)
+
+    def error(self, event: str, **kwargs):
+        self.log(ERROR, event, **kwargs)
+
+    def enabled(self, level: int) -> bool:
+        return level >= LOG_LEVEL
+
+
+_loggers: dict[str, Logger] = {}
+
+
+def get_logger(tag: str) -> Logger:
+    logger = _loggers.get(tag)
+    if logger is None:
+        logger = _loggers[tag] = Logger(tag)
+    return logger
+
+
+def stats() -> dict:
+    return {
+        "queued": writer.queue.qsize(),
+        "written": writer.written,
+        "dropped": writer.dropped,
+        "suppressed": sum(logger.suppressed for logger in _loggers.values()),
+    }
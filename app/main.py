@@ -1,9 +1,54 @@
-from fastapi import FastAPI
+import asyncio
+import hmac
+import os
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from app.websocket_twillio import router
+from app.tts_pool import tts_pool
+from app.stt_pool import stt_pool
+from app.data.booking_store import booking_store
+from app.data.dummy_dta import HOLD_EXPIRY, confirm_booking
+from app.prompt import PREFIX_FINGERPRINT
+from app import tracing
+from app.log import get_logger
 
-app = FastAPI()
+load_dotenv()
+
+log = get_logger("prompt")
+
+# Shared secret the payments portal sends as "Authorization: Bearer <token>"; unset disables the endpoint
+PAYMENTS_WEBHOOK_TOKEN = os.getenv("PAYMENTS_WEBHOOK_TOKEN", "")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log.info("static prefix", fingerprint=PREFIX_FINGERPRINT)
+    await asyncio.gather(tts_pool.start(), stt_pool.start(), booking_store.start(), HOLD_EXPIRY.start())
+    yield
+    await HOLD_EXPIRY.close()
+    await asyncio.gather(tts_pool.close(), stt_pool.close(), booking_store.close())
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(router)
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(tracing.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/bookings/{booking_id}/confirm")
+async def confirm(booking_id: str, authorization: str = Header(default="")):
+    """Called by the payments portal once a held booking is paid; the hold then never expires"""
+    if not PAYMENTS_WEBHOOK_TOKEN:
+        raise HTTPException(status_code=404)
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {PAYMENTS_WEBHOOK_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid payments portal token")
+    if not await confirm_booking(booking_id):
+        raise HTTPException(status_code=409, detail="Booking is not held (unknown, expired or already confirmed)")
+    return {"booking_id": booking_id, "status": "confirmed"}
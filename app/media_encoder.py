@@ -0,0 +1,83 @@
+"""
+Media Encoder - prebuilt Twilio Media Streams messages, with optional multi-frame batching
+"""
+import binascii
+import json
+import os
+from dotenv import load_dotenv
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib parser is used when it is not installed
+    orjson = None
+
+load_dotenv()
+
+FRAME_MS = 20
+BYTES_PER_SECOND = 8000  # 8 kHz mu-law
+# Audio per outbound media message; 100 sends one message per 5 frames (Twilio plays them back to back)
+MEDIA_BATCH_MS = int(os.getenv("MEDIA_BATCH_MS", str(FRAME_MS)))
+
+# Inbound messages (50 media events per second per call) are parsed with orjson when available
+loads = orjson.loads if orjson else json.loads
+
+
+class MediaEncoder:
+    """Outbound messages for one Twilio stream.
+
+    The JSON around the payload never changes within a call, so it is built once with the
+    streamSid escaped; a media message is then prefix + base64 + suffix. Base64 output needs
+    no JSON escaping, so the hot path does no serialization at all.
+    """
+
+    def __init__(self, stream_sid: str, batch_ms: int = MEDIA_BATCH_MS):
+        self.stream_sid = stream_sid
+        self.frames_per_message = max(1, batch_ms // FRAME_MS)
+        sid = json.dumps(stream_sid)
+        self.prefix = '{"event":"media","streamSid":' + sid + ',"media":{"payload":"'
+        self.suffix = '"}}'
+        self.mark_prefix = '{"event":"mark","streamSid":' + sid + ',"mark":{"name":'
+        self.clear_message = '{"event":"clear","streamSid":' + sid + '}'
+        self.messages_sent = 0
+        self.frames_sent = 0
+
+    def media(self, audio) -> str:
+        self.messages_sent += 1
+        return self.prefix + binascii.b2a_base64(audio, newline=False).decode("ascii") + self.suffix
+
+    def mark(self, name: str) -> str:
+        return self.mark_prefix + json.dumps(name) + "}}"
+
+    def clear(self) -> str:
+        return self.clear_message
+
+    def messages(self, frames, frame_size: int = 160):
+        """Encode frames as (message, seconds of audio), up to frames_per_message per message.
+
+        Never waits for more audio: whatever complete frames are available when the
+        iterator runs dry go out as a shorter message, so batching adds no latency.
+        """
+        if self.frames_per_message == 1:
+            seconds = frame_size / BYTES_PER_SECOND
+            for frame in frames:
+                self.frames_sent += 1
+                yield self.media(frame), seconds
+            return
+        limit = self.frames_per_message * frame_size
+        batch = bytearray()
+        for frame in frames:
+            batch += frame
+            if len(batch) >= limit:
+                self.frames_sent += len(batch) // frame_size
+                yield self.media(batch), len(batch) / BYTES_PER_SECOND
+                batch.clear()
+        if batch:
+            self.frames_sent += len(batch) // frame_size
+            yield self.media(batch), len(batch) / BYTES_PER_SECOND
+
+    def stats(self) -> dict:
+        return {
+            "messages": self.messages_sent,
+            "frames": self.frames_sent,
+            "frames_per_message": self.frames_sent / self.messages_sent if self.messages_sent else 0.0,
+        }
@@ -0,0 +1,101 @@
+"""
+Playout - paces outbound audio at real time with a bounded look-ahead and tracks what the caller heard
+"""
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# How far ahead of the caller's ear audio may be sent; Twilio buffers at most this much
+PLAYOUT_LOOKAHEAD = float(os.getenv("PLAYOUT_LOOKAHEAD_MS", "200")) / 1000
+
+
+class PlayoutScheduler:
+    """Per-call send clock for Twilio media.
+
+    Twilio plays media back to back in the order received, so the moment the caller
+    finishes hearing everything sent so far is known: play_end advances by each message's
+    duration from max(now, play_end). send() waits until play_end is within the look-ahead
+    window before handing a message to the socket, so the far side never holds more than
+    ~lookahead of audio. A barge-in then only has that window to clear, unsent audio is
+    dropped locally, and heard() is exact to the frame: everything sent for a sequence
+    minus what was still queued at Twilio.
+
+    pause() holds back further sends without dropping anything (a provisional barge-in);
+    the caller then hears at most the look-ahead already sent. resume() lets them go on,
+    interrupt() drops them.
+    """
+
+    def __init__(self, send_text, lookahead: float = PLAYOUT_LOOKAHEAD, clock=time.monotonic):
+        self.send_text = send_text
+        self.lookahead = lookahead
+        self.clock = clock
+        self.play_end = 0.0
+        self.sent: dict[int, float] = {}  # sequence_id -> seconds of audio sent
+        self.last_sequence: int | None = None
+        self.waited = 0.0
+        self.resumed = asyncio.Event()
+        self.resumed.set()
+        self.pauses = 0
+
+    def buffered(self) -> float:
+        """Seconds of sent audio the caller has not heard yet"""
+        return max(0.0, self.play_end - self.clock())
+
+    async def send(self, message: str, seconds: float, sequence_id: int, is_valid=None) -> bool:
+        """Send one media message once it fits in the look-ahead window.
+
+        Returns False without sending if is_valid() turns false while waiting.
+        """
+        await self.resumed.wait()
+        delay = self.play_end - self.lookahead - self.clock()
+        if delay > 0:
+            self.waited += delay
+            await asyncio.sleep(delay)
+            await self.resumed.wait()
+        if is_valid and not is_valid():
+            return False
+        await self.send_text(message)
+        now = self.clock()
+        self.play_end = max(self.play_end, now) + seconds
+        self.sent[sequence_id] = self.sent.get(sequence_id, 0.0) + seconds
+        self.last_sequence = sequence_id
+        return True
+
+    def pause(self):
+        """Hold back further sends until resume() or interrupt()"""
+        if self.resumed.is_set():
+            self.pauses += 1
+            self.resumed.clear()
+
+    def resume(self):
+        self.resumed.set()
+
+    def heard(self, sequence_id: int) -> float:
+        """Seconds of a sequence's audio the caller has heard so far"""
+        sent = self.sent.get(sequence_id, 0.0)
+        if sequence_id == self.last_sequence:
+            sent -= self.buffered()
+        return max(0.0, sent)
+
+    def interrupt(self) -> dict[int, tuple[float, float]]:
+        """Barge-in: stop the clock and return {sequence_id: (heard, sent)} for the cut replies"""
+        positions = {seq: (self.heard(seq), sent) for seq, sent in self.sent.items()}
+        self.sent.clear()
+        self.play_end = self.clock()  # Twilio drops its queue on clear
+        self.resumed.set()
+        return positions
+
+    def finish(self, sequence_id: int) -> float:
+        """Reply played to the end (mark ack); returns its duration"""
+        return self.sent.pop(sequence_id, 0.0)
+
+    def stats(self) -> dict:
+        return {
+            "lookahead_ms": self.lookahead * 1000,
+            "buffered_ms": self.buffered() * 1000,
+            "paced_wait_s": self.waited,
+            "pauses": self.pauses,
+        }
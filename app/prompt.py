@@ -0,0 +1,102 @@
+"""
+Prompt - the static request prefix (system prompt, instructions, tool schema), built once per process
+
+Providers that cache prompt prefixes only hit when the leading messages and tool schema are
+byte-identical across requests, so everything here is canonicalized once and shared by all calls.
+"""
+import hashlib
+import json
+from pathlib import Path
+from app.history import TOOL_STATE_PREFIX
+
+SYSTEM_PROMPT = Path("app/system_prompt.txt").read_text()
+
+STATIC_INSTRUCTIONS = (
+    "Use the provided tools to fetch availability, choose a room, and finalize bookings. "
+    "Always keep responses concise, spoken style. "
+    "Convert all numbers to numeric example 'five'->5 'thirty'->30. "
+    f"Earlier messages of yours starting with '{TOOL_STATE_PREFIX}' are notes of tool calls, never say them aloud."
+)
+
+
+def tool_spec():
+    return [
+        {
+            "type": "function",
+            "function": {
+                "name": "get_availability",
+                "description": "List available rooms given guest count, beds, and lounge preference.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "guests": {"type": "integer", "description": "Number of guests."},
+                        "beds": {
+                            "type": "integer",
+                            "description": "Beds requested (1 for single, 2 for double/twin).",
+                            "nullable": True,
+                        },
+                        "lounge": {
+                            "type": "boolean",
+                            "description": "Whether lounge access is requested.",
+                            "nullable": True,
+                        },
+                        "nights": {
+                            "type": "integer",
+                            "description": "Number of nights.",
+                            "nullable": True,
+                        },
+                    },
+                    "required": ["guests"],
+                },
+            },
+        },
+        {
+            "type": "function",
+            "function": {
+                "name": "choose_room",
+                "description": "Select a room by id after presenting options.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "room_id": {"type": "string", "description": "Room id to select."},
+                    },
+                    "required": ["room_id"],
+                },
+            },
+        },
+        {
+            "type": "function",
+            "function": {
+                "name": "finalize_booking",
+                "description": (
+                    "Place the booking on hold for the guest name and selected room id. "
+                    "The hold is not a confirmed reservation: it lapses unless paid on the payments portal in time."
+                ),
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "guest_name": {"type": "string", "description": "Guest full name."},
+                        "room_id": {"type": "string", "description": "Selected room id."},
+                    },
+                    "required": ["guest_name", "room_id"],
+                },
+            },
+        },
+    ]
+
+
+def _canonical(obj):
+    """Round-trip through sorted-key JSON so key order never depends on how the literal was written"""
+    return json.loads(json.dumps(obj, sort_keys=True, separators=(",", ":")))
+
+
+TOOLS = _canonical(tool_spec())
+
+PREFIX_MESSAGES = (
+    {"role": "system", "content": SYSTEM_PROMPT},
+    {"role": "system", "content": STATIC_INSTRUCTIONS},
+)
+
+PREFIX_FINGERPRINT = hashlib.sha256(
+    json.dumps({"messages": PREFIX_MESSAGES, "tools": TOOLS}, sort_keys=True, separators=(",", ":")).encode("utf-8")
+).hexdigest()[:12]
@@ -0,0 +1,101 @@
+"""
+Response Cache - LRU+TTL cache of completed LLM turns keyed on normalized dialogue state
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from app.data.dummy_dta import catalog_version
+
+load_dotenv()
+
+CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+
+# Slots that shape the answer; guest_name/booking_id turns are never cached
+KEY_SLOTS = ("intent", "check_in", "nights", "guests", "beds", "lounge", "selected_room")
+BOOKING_RE = re.compile(r"\b(book|booking|reserve|reservation|confirm|name is|my name|cancel|pay)\b")
+# Replies, confirmations and references to something said earlier only make sense in their own conversation
+ANAPHORA_RE = re.compile(
+    r"\b(yes|yeah|yep|sure|ok|okay|no|nope|that|this|it|those|these|them|one|other|same|first|second|last)\b"
+)
+MIN_WORDS = 3
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+class CachedTurn:
+    def __init__(self, reply: str, tool_calls: list[tuple[str, str]], stored_at: float):
+        self.reply = reply
+        self.tool_calls = tool_calls  # (tool name, JSON arguments) to replay through ToolRuntime
+        self.stored_at = stored_at
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict[str, CachedTurn] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, user_text: str, context: dict, flags: tuple, last_reply: str = "") -> str | None:
+        """Cache key for a turn, or None if it may mutate a booking or depends on earlier turns.
+
+        last_reply (the agent's previous spoken reply) is part of the key, so the same words
+        only replay an answer given at the same point of a conversation.
+        """
+        text = normalize_text(user_text)
+        if (
+            len(text.split()) < MIN_WORDS
+            or BOOKING_RE.search(text)
+            or ANAPHORA_RE.search(text)
+            or context.get("guest_name")
+            or context.get("booking_id")
+        ):
+            return None
+        state = {k: context.get(k) for k in KEY_SLOTS}
+        raw = json.dumps(
+            [text, state, list(flags), normalize_text(last_reply), catalog_version()],
+            sort_keys=True, separators=(",", ":"),
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> CachedTurn | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if time.monotonic() - entry.stored_at > self.ttl:
+            del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, reply: str, tool_calls: list[tuple[str, str]]):
+        if not reply.strip():
+            return
+        self.entries[key] = CachedTurn(reply, tool_calls, time.monotonic())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+response_cache = ResponseCache()
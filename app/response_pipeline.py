@@ -0,0 +1,103 @@
+"""
+Response Pipeline - overlaps LLM decoding, TTS synthesis and media send for one agent response
+"""
+import asyncio
+import time
+from app.log import get_logger
+
+log = get_logger("pipeline")
+
+TEXT_QUEUE_SIZE = 4    # sentences waiting for TTS
+AUDIO_QUEUE_SIZE = 32  # TTS chunks waiting to be sent
+
+_SENTENCE_END = object()
+
+
+class ResponsePipeline:
+    """Three stages joined by bounded queues: sentences -> synthesis -> send.
+
+    Each stage is a single task consuming its queue in order, so audio leaves in sentence
+    order while the LLM keeps decoding and TTS keeps synthesizing ahead of playback.
+    cancel() stops every stage at once (barge-in).
+    """
+
+    def __init__(self, text_stream, synthesize, send_audio, on_sentence_end=None, is_valid=None):
+        self.text_stream = text_stream
+        self.synthesize = synthesize
+        self.send_audio = send_audio
+        self.on_sentence_end = on_sentence_end
+        self.is_valid = is_valid or (lambda: True)
+        self.text_q: asyncio.Queue = asyncio.Queue(maxsize=TEXT_QUEUE_SIZE)
+        self.audio_q: asyncio.Queue = asyncio.Queue(maxsize=AUDIO_QUEUE_SIZE)
+        self.tasks: list[asyncio.Task] = []
+        self.cancelled = False
+        self.sentences = 0
+        self.gaps_ms: list[float] = []
+
+    async def _segment(self):
+        async for sentence in self.text_stream:
+            if not self.is_valid():
+                break
+            log.debug("llm chunk", text=sentence)
+            await self.text_q.put(sentence)
+        await self.text_q.put(None)
+
+    async def _synthesize(self):
+        while True:
+            sentence = await self.text_q.get()
+            if sentence is None or not self.is_valid():
+                break
+            async for audio in self.synthesize(sentence):
+                if not self.is_valid():
+                    break
+                await self.audio_q.put(audio)
+            await self.audio_q.put(_SENTENCE_END)
+        await self.audio_q.put(None)
+
+    async def _send(self):
+        last_sentence_done = None
+        first_chunk = True
+        while True:
+            item = await self.audio_q.get()
+            if item is None or not self.is_valid():
+                break
+            if item is _SENTENCE_END:
+                self.sentences += 1
+                if self.on_sentence_end:
+                    await self.on_sentence_end()
+                last_sentence_done = time.perf_counter()
+                first_chunk = True
+                continue
+            if first_chunk and last_sentence_done is not None:
+                self.gaps_ms.append((time.perf_counter() - last_sentence_done) * 1000)
+            first_chunk = False
+            await self.send_audio(item)
+
+    async def run(self):
+        """Run all stages to completion; returns False if the response was cancelled"""
+        self.tasks = [
+            asyncio.create_task(self._segment(), name="pipeline-segment"),
+            asyncio.create_task(self._synthesize(), name="pipeline-tts"),
+            asyncio.create_task(self._send(), name="pipeline-send"),
+        ]
+        try:
+            await asyncio.gather(*self.tasks)
+        except asyncio.CancelledError:
+            # Swallow our own cancel(); a cancel of the enclosing turn task must propagate
+            if not self.cancelled or asyncio.current_task().cancelling():
+                raise
+        finally:
+            for t in self.tasks:
+                t.cancel()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.gaps_ms:
+            log.info(
+                "inter-sentence gap", avg_ms=round(sum(self.gaps_ms) / len(self.gaps_ms), 1),
+                max_ms=round(max(self.gaps_ms), 1), sentences=self.sentences,
+            )
+        return not self.cancelled
+
+    def cancel(self):
+        self.cancelled = True
+        for t in self.tasks:
+            t.cancel()
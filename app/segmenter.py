@@ -0,0 +1,128 @@
+"""
+Segmenter - splits a streamed LLM reply into TTS-ready clauses and sentences
+"""
+import os
+import re
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FIRST_MIN_WORDS = int(os.getenv("SEGMENTER_FIRST_MIN_WORDS", "4"))
+MAX_WORDS = int(os.getenv("SEGMENTER_MAX_WORDS", "30"))
+MIN_CHARS = 6
+
+SENTENCE_END = ".?!"
+CLAUSE_END = ",;:"
+
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "st", "sr", "jr", "vs", "etc", "approx",
+    "e.g", "i.e", "rs", "inr", "usd", "apt",
+}
+# Also ordinary words ("Unfortunately, no.", "at 9 am."), so only abbreviations next to a number
+NUMBER_PREFIXES = {"no", "nos"}                          # "No. 5"
+UNIT_SUFFIXES = {"am", "pm", "a.m", "p.m", "min", "hrs"}  # "9 am. tomorrow", not "9 am. Breakfast"
+
+_WORD_BEFORE_RE = re.compile(r"([A-Za-z][A-Za-z.]*)$")
+_NUMBER_BEFORE_RE = re.compile(r"\d\s*$")
+
+
+def _is_abbreviation(text: str, dot: int) -> bool | None:
+    """Whether the dot at text[dot] ends an abbreviation; None until the next word has arrived"""
+    m = _WORD_BEFORE_RE.search(text, 0, dot)
+    if not m:
+        return False
+    word = m.group(1).lower().rstrip(".")
+    # Single letters are initials ("J. Smith") or spelled-out tokens
+    if word in ABBREVIATIONS or len(word) == 1:
+        return True
+    if word not in NUMBER_PREFIXES and word not in UNIT_SUFFIXES:
+        return False
+    rest = text[dot + 1:].lstrip()
+    if not rest:
+        return None
+    if word in NUMBER_PREFIXES:
+        return rest[0].isdigit()
+    return bool(_NUMBER_BEFORE_RE.search(text, 0, m.start())) and not rest[0].isupper()
+
+
+class Segmenter:
+    """Incremental segmenter.
+
+    Until the first segment is out it flushes at a clause boundary (",;:" or a dash) once
+    FIRST_MIN_WORDS words are buffered, so first audio starts early; afterwards it waits
+    for sentence boundaries, falling back to a clause boundary past MAX_WORDS.
+    A boundary only counts once the following character has arrived and is whitespace,
+    so "5.600", "16,800" and "Rs. 5600" never split and nothing flushes mid-token.
+    """
+
+    def __init__(self, first_min_words: int = FIRST_MIN_WORDS, max_words: int = MAX_WORDS, eager_first: bool = True):
+        self.first_min_words = first_min_words
+        self.max_words = max_words
+        self.eager_first = eager_first
+        self.buffer = ""
+        self.scan_from = 0
+        self.emitted = 0
+
+    def _boundary(self) -> int | None:
+        """Index just past the first confirmed boundary in the buffer, if any"""
+        buf = self.buffer
+        clause_ok = (self.eager_first and self.emitted == 0)
+        i = self.scan_from
+        # The last character can't be confirmed yet; stop one short
+        while i < len(buf) - 1:
+            ch = buf[i]
+            nxt = buf[i + 1]
+            if ch == "\n":
+                if buf[:i].strip():
+                    return i + 1
+            elif nxt.isspace():
+                if ch in SENTENCE_END and len(buf[:i + 1].strip()) >= MIN_CHARS:
+                    abbreviation = ch == "." and _is_abbreviation(buf, i)
+                    if abbreviation is None:
+                        self.scan_from = i  # decide once the next word arrives
+                        return None
+                    if not abbreviation:
+                        return i + 1
+                elif ch in CLAUSE_END or (ch in "-–—" and i > 0 and buf[i - 1] == " "):
+                    words = len(buf[:i].split())
+                    if (clause_ok and words >= self.first_min_words) or words >= self.max_words:
+                        return i + 1
+            i += 1
+        self.scan_from = max(self.scan_from, len(buf) - 1)
+        return None
+
+    def feed(self, text: str) -> list[str]:
+        """Add streamed text; return any segments that are now complete"""
+        self.buffer += text
+        segments = []
+        while True:
+            end = self._boundary()
+            if end is None:
+                break
+            segment = self.buffer[:end].strip()
+            self.buffer = self.buffer[end:]
+            self.scan_from = 0
+            if segment:
+                segments.append(segment)
+                self.emitted += 1
+        return segments
+
+    def flush(self) -> str | None:
+        """End of stream: return whatever is left"""
+        segment = self.buffer.strip()
+        self.buffer = ""
+        self.scan_from = 0
+        if segment:
+            self.emitted += 1
+            return segment
+        return None
+
+
+def segment_text(text: str) -> list[str]:
+    """Split a complete reply the same way a streamed one would be"""
+    segmenter = Segmenter()
+    segments = segmenter.feed(text)
+    tail = segmenter.flush()
+    if tail:
+        segments.append(tail)
+    return segments
@@ -0,0 +1,189 @@
+"""
+Speculator - starts the LLM turn on a stable interim transcript, commits it if the final matches
+"""
+import asyncio
+import os
+import re
+import time
+from difflib import SequenceMatcher
+from dotenv import load_dotenv
+from app.agent import HotelAgent, SpeculationAborted
+from app.log import get_logger
+
+load_dotenv()
+
+log = get_logger("speculate")
+
+SPECULATIVE_LLM = os.getenv("SPECULATIVE_LLM", "false").lower() == "true"
+STABLE_MS = float(os.getenv("SPECULATION_STABLE_MS", "300"))
+MATCH_THRESHOLD = float(os.getenv("SPECULATION_MATCH_THRESHOLD", "0.9"))
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def transcript_similarity(a: str, b: str) -> float:
+    a, b = _normalize(a), _normalize(b)
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+class _Speculation:
+    def __init__(self, agent: HotelAgent, text: str):
+        self.text = text
+        self.base_len = len(agent.messages)
+        self.fork = agent.fork()
+        self.chunks: asyncio.Queue[str | None] = asyncio.Queue()
+        self.started_at = time.perf_counter()
+        self.first_chunk_at: float | None = None
+        self.aborted = False
+        self.pending: SpeculationAborted | None = None  # the step the fork stopped at
+        self.task = asyncio.create_task(self._run(), name="llm-speculation")
+
+    async def _run(self):
+        try:
+            async for chunk in self.fork.handle_stream(self.text):
+                if self.first_chunk_at is None:
+                    self.first_chunk_at = time.perf_counter()
+                await self.chunks.put(chunk)
+        except SpeculationAborted as e:
+            log.info("aborted before mutating tool", tool=str(e))
+            self.aborted = True
+            self.pending = e
+        except Exception as e:
+            log.warning("generation failed", error=str(e))
+            self.aborted = True
+        finally:
+            await self.chunks.put(None)
+
+    def cancel(self):
+        self.task.cancel()
+
+
+class Speculator:
+    def __init__(
+        self,
+        agent: HotelAgent,
+        can_speculate=None,
+        stable_ms: float = STABLE_MS,
+        threshold: float = MATCH_THRESHOLD,
+    ):
+        self.agent = agent
+        self.can_speculate = can_speculate
+        self.stable_s = stable_ms / 1000
+        self.threshold = threshold
+        self.latest_interim = ""
+        self.timer: asyncio.Task | None = None
+        self.current: _Speculation | None = None
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms_total = 0.0
+
+    async def on_interim(self, text: str):
+        """Called for every non-final transcript; (re)arms the stability timer"""
+        if _normalize(text) == _normalize(self.latest_interim):
+            return
+        self.latest_interim = text
+        if self.timer:
+            self.timer.cancel()
+        if self.current and transcript_similarity(self.current.text, text) < self.threshold:
+            self._discard()
+        self.timer = asyncio.create_task(self._start_when_stable(text))
+
+    async def _start_when_stable(self, text: str):
+        await asyncio.sleep(self.stable_s)
+        if self.current or (self.can_speculate and not self.can_speculate()):
+            return
+        self.current = _Speculation(self.agent, text)
+        self.started += 1
+        log.debug("started on interim", text=text)
+
+    def _discard(self):
+        if self.current:
+            self.current.cancel()
+            self.current = None
+
+    def claim(self, final_text: str, sequence_id: int = 0, is_valid_fn=None):
+        """Return a chunk stream for the final transcript if the speculation matches, else None"""
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        self.latest_interim = ""
+        spec, self.current = self.current, None
+        if spec is None:
+            return None
+        now = time.perf_counter()
+        similarity = transcript_similarity(spec.text, final_text)
+        if (
+            (spec.aborted and spec.pending is None)
+            or similarity < self.threshold
+            or len(self.agent.messages) != spec.base_len
+        ):
+            spec.cancel()
+            self.misses += 1
+            log.info("miss", similarity=round(similarity, 2), hit_rate=round(self.hit_rate(), 2))
+            return None
+
+        self.hits += 1
+        head_start = min(now, spec.first_chunk_at or now) - spec.started_at
+        saved_ms = head_start * 1000
+        self.saved_ms_total += saved_ms
+        log.info("hit", saved_ms=round(saved_ms), hit_rate=round(self.hit_rate(), 2))
+        return self._replay(spec, final_text, sequence_id, is_valid_fn)
+
+    async def _replay(self, spec: _Speculation, final_text: str, sequence_id: int, is_valid_fn):
+        finished = False
+        taken_over = False
+        replayed = 0
+        try:
+            while True:
+                chunk = await spec.chunks.get()
+                if chunk is None:
+                    finished = not spec.aborted
+                    break
+                replayed += 1
+                yield chunk
+            valid = is_valid_fn is None or is_valid_fn(sequence_id)
+            if spec.pending is not None and valid:
+                # The fork stopped short of a mutating tool after saying its lead-in: adopt the
+                # history up to that step and run its calls for real, so nothing is said twice
+                self.agent.adopt(spec.fork, final_text)
+                taken_over = True
+                async for chunk in self.agent.resume_stream(final_text, spec.pending, sequence_id, is_valid_fn):
+                    yield chunk
+            elif spec.aborted and not replayed and valid:
+                # Generation failed before saying anything: run the turn from scratch
+                taken_over = True
+                async for chunk in self.agent.handle_stream(final_text, sequence_id, is_valid_fn):
+                    yield chunk
+        finally:
+            # Interrupted consumers stop the fork too; otherwise the fork becomes the conversation
+            spec.cancel()
+            if finished and (is_valid_fn is None or is_valid_fn(sequence_id)):
+                self.agent.adopt(spec.fork, final_text)
+            elif not taken_over:
+                # A fork cut off mid-turn may hold half a tool exchange; keep only the caller's words
+                self.agent.record_user_turn(final_text)
+
+    def cancel(self):
+        if self.timer:
+            self.timer.cancel()
+        self._discard()
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+            "avg_saved_ms": self.saved_ms_total / self.hits if self.hits else 0.0,
+        }
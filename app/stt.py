@@ -3,12 +3,18 @@ import json
 import os
 import websockets
 from dotenv import load_dotenv
+from app.log import get_logger
 
 
 load_dotenv()
 
+log = get_logger("stt")
+
+# Point at a local stand-in (see benchmarks/fakes.py) for load tests
+DEEPGRAM_WS_BASE = os.getenv("DEEPGRAM_WS_BASE", "wss://api.deepgram.com")
+
 DG_URL = (
-    "wss://api.deepgram.com/v1/listen"
+    f"{DEEPGRAM_WS_BASE}/v1/listen"
     "?model=nova-2"
     "&encoding=mulaw"
     "&sample_rate=8000"
@@ -23,25 +29,116 @@ DG_URL = (
 HEADERS = {"Authorization": f"Token {os.getenv('DEEPGRAM_API_KEY')}"}
 
 
-async def connect_stt(on_final, on_speech_started=None):
-    """Open a Deepgram streaming connection and return feed + closer."""
-    ws = await websockets.connect(DG_URL, extra_headers=HEADERS, ping_interval=None)
-    print("[stt] connected to Deepgram")
-    send_q: asyncio.Queue[bytes | None] = asyncio.Queue()
+KEEPALIVE_INTERVAL = 5.0
+KEEPALIVE_MSG = json.dumps({"type": "KeepAlive"})
+
+# Inbound 20 ms frames are coalesced into one websocket message of up to STT_BATCH_MS of audio;
+# no frame waits longer than STT_MAX_DELAY_MS for the rest of its batch. 20 sends every frame.
+STT_BATCH_MS = int(os.getenv("STT_BATCH_MS", "60"))
+STT_MAX_DELAY_MS = int(os.getenv("STT_MAX_DELAY_MS", "80"))
+BYTES_PER_MS = 8  # 8 kHz mu-law
+
+
+class STTSession:
+    """One Deepgram listen socket with its sender/receiver tasks already running.
+
+    Callbacks are attached when the session is handed to a call, so a session can be
+    opened ahead of time (see STTPool) and kept alive with KeepAlive messages.
+    """
+
+    def __init__(self, ws, batch_ms: int = STT_BATCH_MS, max_delay_ms: int = STT_MAX_DELAY_MS):
+        self.ws = ws
+        self.batch_bytes = batch_ms * BYTES_PER_MS
+        self.max_delay = max_delay_ms / 1000
+        self.messages = 0
+        self.keepalives = 0
+        self.send_q: asyncio.Queue[bytes | None] = asyncio.Queue()
+        self.on_final = None
+        self.on_speech_started = None
+        self.on_interim = None
+        self.trace = None
+        self.finals: list[str] = []  # is_final segments of the utterance in progress
+        self.closed = False
+        self.send_task = asyncio.create_task(self.sender(), name="deepgram-sender")
+        self.recv_task = asyncio.create_task(self.receiver(), name="deepgram-receiver")
+
+    @classmethod
+    async def open(cls):
+        ws = await websockets.connect(DG_URL, extra_headers=HEADERS, ping_interval=None)
+        log.info("connected to Deepgram")
+        return cls(ws)
+
+    @property
+    def is_open(self) -> bool:
+        return not self.closed and not self.ws.closed and not self.send_task.done() and not self.recv_task.done()
 
-    async def sender():
+    def attach(self, on_final, on_speech_started=None, on_interim=None, trace=None):
+        """Route transcript events to a call.
+
+        The receiver dispatches in socket order and must keep reading, or SpeechStarted
+        (barge-in) queues up behind whatever a callback awaits. on_final is therefore a
+        plain function that hands the transcript off (see TurnManager) rather than running
+        the turn; on_speech_started and on_interim are awaited and must stay short.
+
+        Deepgram finalizes a long utterance in several is_final segments; on_final gets the
+        whole utterance once, on speech_final or UtteranceEnd, so a pause mid-sentence
+        never starts (or supersedes) a turn on half of what the caller said.
+        """
+        self.on_final = on_final
+        self.on_speech_started = on_speech_started
+        self.on_interim = on_interim
+        self.trace = trace
+        self.finals.clear()
+
+    def _end_utterance(self):
+        text = " ".join(self.finals)
+        self.finals.clear()
+        if text and self.on_final:
+            if self.trace:
+                self.trace.final_transcript()
+            log.debug("final transcript", text=text)
+            self.on_final(text)
+
+    async def _coalesce(self, chunk: bytes, deadline: float) -> tuple[bytes, bool]:
+        """Append queued frames to chunk until a batch is full or deadline passes; (audio, closing)"""
+        buf = bytearray(chunk)
+        closing = False
+        try:
+            async with asyncio.timeout_at(deadline):
+                while len(buf) < self.batch_bytes:
+                    nxt = await self.send_q.get()
+                    if nxt is None:
+                        closing = True
+                        break
+                    buf += nxt
+        except TimeoutError:
+            pass
+        return bytes(buf), closing
+
+    async def sender(self):
+        ws = self.ws
+        loop = asyncio.get_running_loop()
         try:
             while True:
                 try:
-                    chunk = await asyncio.wait_for(send_q.get(), timeout=5)
-                except asyncio.TimeoutError:
-                    chunk = bytes([0xFF]) * 160
-                if chunk is None:
+                    async with asyncio.timeout(KEEPALIVE_INTERVAL):
+                        chunk = await self.send_q.get()
+                except TimeoutError:
+                    # Idle: Deepgram's KeepAlive message holds the socket open without fake audio
+                    await ws.send(KEEPALIVE_MSG)
+                    self.keepalives += 1
+                    continue
+                closing = chunk is None
+                if not closing:
+                    if len(chunk) < self.batch_bytes:
+                        chunk, closing = await self._coalesce(chunk, loop.time() + self.max_delay)
+                    await ws.send(chunk)
+                    self.messages += 1
+                if closing:
                     await ws.close(code=1000)
                     break
-                await ws.send(chunk)
         except websockets.ConnectionClosed as e:
-            print(f"[stt] sender closed code={e.code} reason={e.reason}")
+            log.info("sender closed", code=e.code, reason=e.reason)
             return
         
         #Deepgram return format
@@ -53,36 +150,56 @@ async def connect_stt(on_final, on_speech_started=None):
         #     ]
         #   }
         # }
-    async def receiver():
+    async def receiver(self):
+        """Event dispatcher: reads the socket continuously, never awaiting a whole turn"""
         try:
-            async for msg in ws:
+            async for msg in self.ws:
                 if not msg:
                     continue
                 data = json.loads(msg)
                 if data.get("type") == "SpeechStarted":
-                    if on_speech_started:
-                        await on_speech_started()
+                    if self.trace:
+                        self.trace.speech_started()
+                    if self.on_speech_started:
+                        await self.on_speech_started()
                 if data.get("is_final"):
                     text = data["channel"]["alternatives"][0].get("transcript", "")
                     if text:
-                        print(f"[stt] final transcript: {text}")
-                        await on_final(text)
+                        self.finals.append(text)
+                    if data.get("speech_final"):
+                        self._end_utterance()
+                elif data.get("type") == "UtteranceEnd":
+                    # Sent after utterance_end_ms of silence even when endpointing never fired
+                    self._end_utterance()
                 else:
+                    if self.on_interim and "channel" in data:
+                        text = data["channel"]["alternatives"][0].get("transcript", "")
+                        if text:
+                            # Interims only cover the current segment; speculate on the whole utterance
+                            await self.on_interim(" ".join([*self.finals, text]))
                     msg_type = data.get("type")
                     if msg_type:
-                        print(f"[stt] recv type={msg_type} msg={data}")
+                        # Interim results arrive several times a second per call; never dump payloads
+                        log.debug("recv", type=msg_type, every=20)
         except websockets.ConnectionClosed as e:
-            print(f"[stt] Deepgram connection closed code={e.code} reason={e.reason}")
+            log.info("Deepgram connection closed", code=e.code, reason=e.reason)
             return
 
-    send_task = asyncio.create_task(sender(), name="deepgram-sender")
-    recv_task = asyncio.create_task(receiver(), name="deepgram-receiver")
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        await self.send_q.put(None)
+        # close() may be reached from a callback running inside the receiver task
+        tasks = [t for t in (self.send_task, self.recv_task) if t is not asyncio.current_task()]
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if not self.ws.closed:
+            await self.ws.close(code=1000)
+        log.info("closed", audio_messages=self.messages, keepalives=self.keepalives)
 
-    async def close():
-        await send_q.put(None)
-        await asyncio.gather(send_task, recv_task, return_exceptions=True)
-        if not ws.closed:
-            await ws.close(code=1000)
-        print("[stt] closed")
 
-    return send_q, close
+async def connect_stt(on_final, on_speech_started=None):
+    """Open a Deepgram streaming connection and return feed + closer."""
+    session = await STTSession.open()
+    session.attach(on_final, on_speech_started)
+    return session.send_q, session.close
@@ -0,0 +1,148 @@
+"""
+STT Pool - pre-connected Deepgram listen sessions, kept alive until a call claims one
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from dotenv import load_dotenv
+from app.stt import STTSession
+from app.log import get_logger
+
+load_dotenv()
+
+log = get_logger("stt-pool")
+
+POOL_MIN_IDLE = int(os.getenv("STT_POOL_MIN_IDLE", "2"))
+POOL_MAX_IDLE = int(os.getenv("STT_POOL_MAX_IDLE", "20"))
+POOL_SPARE_RATIO = float(os.getenv("STT_POOL_SPARE_RATIO", "0.25"))
+POOL_CHECK_INTERVAL = float(os.getenv("STT_POOL_CHECK_INTERVAL", "1.0"))
+POOL_MAX_IDLE_AGE = float(os.getenv("STT_POOL_MAX_IDLE_AGE", "300"))
+
+
+class STTPool:
+    def __init__(
+        self,
+        min_idle: int = POOL_MIN_IDLE,
+        max_idle: int = POOL_MAX_IDLE,
+        spare_ratio: float = POOL_SPARE_RATIO,
+        check_interval: float = POOL_CHECK_INTERVAL,
+        max_idle_age: float = POOL_MAX_IDLE_AGE,
+    ):
+        self.min_idle = min_idle
+        self.max_idle = max_idle
+        self.spare_ratio = spare_ratio
+        self.check_interval = check_interval
+        self.max_idle_age = max_idle_age
+        self.idle: deque[tuple[float, STTSession]] = deque()
+        self.active = 0
+        self.monitor_task: asyncio.Task | None = None
+        self.closed = False
+        self.leases = 0
+        self.warm_leases = 0
+
+    def target_idle(self) -> int:
+        wanted = max(self.min_idle, math.ceil(self.active * self.spare_ratio))
+        return min(wanted, self.max_idle)
+
+    async def start(self):
+        self.closed = False
+        await self._fill()
+        self._ensure_monitor()
+        log.info("started", warm_sessions=len(self.idle))
+
+    def _ensure_monitor(self):
+        if self.monitor_task is None or self.monitor_task.done():
+            self.monitor_task = asyncio.create_task(self._monitor(), name="stt-pool-monitor")
+
+    async def _dial(self) -> STTSession | None:
+        try:
+            return await asyncio.wait_for(STTSession.open(), timeout=10.0)
+        except Exception as e:
+            log.warning("connect failed", error=str(e))
+            return None
+
+    async def _fill(self):
+        missing = self.target_idle() - len(self.idle)
+        if missing <= 0:
+            return
+        sessions = await asyncio.gather(*(self._dial() for _ in range(missing)))
+        for session in sessions:
+            if session is None:
+                continue
+            if self.closed:
+                await session.close()
+            else:
+                self.idle.append((time.monotonic(), session))
+
+    async def _monitor(self):
+        while not self.closed:
+            try:
+                now = time.monotonic()
+                stale = [
+                    entry for entry in self.idle
+                    if not entry[1].is_open or now - entry[0] > self.max_idle_age
+                ]
+                for entry in stale:
+                    self.idle.remove(entry)
+                    await entry[1].close()
+                while len(self.idle) > self.target_idle():
+                    await self.idle.pop()[1].close()
+                await self._fill()
+            except Exception as e:
+                log.error("monitor error", error=str(e))
+            await asyncio.sleep(self.check_interval)
+
+    async def connect(self, on_final, on_speech_started=None, on_interim=None, trace=None):
+        """Hand a running session to a call; same return shape as connect_stt (feed, closer)"""
+        self._ensure_monitor()
+        session = None
+        while self.idle:
+            _, candidate = self.idle.popleft()
+            if candidate.is_open:
+                session = candidate
+                self.warm_leases += 1
+                break
+            await candidate.close()
+        if session is None:
+            session = await STTSession.open()
+        session.attach(on_final, on_speech_started, on_interim, trace)
+        self.active += 1
+        self.leases += 1
+
+        released = False
+
+        async def close():
+            nonlocal released
+            if not released:
+                released = True
+                self.active -= 1
+            await session.close()
+
+        return session.send_q, close
+
+    async def close(self):
+        self.closed = True
+        if self.monitor_task:
+            self.monitor_task.cancel()
+            try:
+                await self.monitor_task
+            except asyncio.CancelledError:
+                pass
+            self.monitor_task = None
+        sessions = [s for _, s in self.idle]
+        self.idle.clear()
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "idle": len(self.idle),
+            "active": self.active,
+            "target_idle": self.target_idle(),
+            "leases": self.leases,
+            "warm_leases": self.warm_leases,
+        }
+
+
+stt_pool = STTPool()
@@ -1,71 +1,37 @@
-import re
-from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
-from app.data.dummy_dta import find_rooms, create_booking, ROOMS
+from app.data.dummy_dta import find_rooms, create_booking, extend_booking, resolve_check_in, HOLD_EXPIRY, ROOMS
+from app.tools.slot_extractor import slot_extractor
 
 
-def _parse_int(text: str) -> Optional[int]:
-    match = re.search(r"(\d+)", text)
-    if not match:
-        return None
-    try:
-        return int(match.group(1))
-    except ValueError:
-        return None
-
-
-def update_context_from_text(text: str, ctx: Dict) -> None:
-    lower = text.lower()
-
-    if "availability" in lower or "available" in lower:
-        ctx.setdefault("intent", "availability")
-    if "book" in lower or "reserve" in lower or "confirm" in lower:
-        ctx.setdefault("intent", "booking")
-    if "price" in lower or "rate" in lower:
-        ctx.setdefault("intent", "pricing")
+def update_context_from_text(text: str, ctx: Dict) -> Dict:
+    """Fill ctx from a final transcript; returns the slots heard in this utterance"""
+    slots = slot_extractor.extract(text)
+    if "intent" in slots:
+        ctx.setdefault("intent", slots["intent"])
+    for key in ("guests", "beds", "nights", "check_in", "guest_name", "selected_room"):
+        if slots.get(key):
+            ctx[key] = slots[key]
+    if "lounge" in slots:
+        ctx["lounge"] = slots["lounge"]
+    return slots
 
-    guests = _parse_int(lower) if "guest" in lower or "people" in lower or "person" in lower else None
-    if guests:
-        ctx["guests"] = guests
 
-    beds = None
-    if "single" in lower:
-        beds = 1
-    if "double" in lower or "two bed" in lower or "twin" in lower:
-        beds = 2
-    if beds:
-        ctx["beds"] = beds
-
-    if "lounge" in lower:
-        ctx["lounge"] = True
-    if "no lounge" in lower or "without lounge" in lower:
-        ctx["lounge"] = False
-
-    if "name is" in lower:
-        parts = lower.split("name is", 1)[1].strip()
-        ctx["guest_name"] = parts.split()[0].title() if parts else ctx.get("guest_name")
-
-    if "date" in lower or re.search(r"\d{1,2}/\d{1,2}", lower):
-        parsed = _parse_date(lower)
-        if parsed:
-            ctx["check_in"] = parsed
-
-    nights = _parse_int(lower) if "night" in lower or "nights" in lower else None
-    if nights:
-        ctx["nights"] = nights
-
-    for room in ROOMS:
-        if room["id"] in lower or room["name"].lower() in lower:
-            ctx["selected_room"] = room["id"]
-            break
-
-
-def compute_availability(ctx: Dict) -> List[Dict]:
+async def compute_availability(ctx: Dict) -> List[Dict]:
     guests = ctx.get("guests") or 1
     beds = ctx.get("beds")
     lounge = ctx.get("lounge")
-    rooms = find_rooms(guests=guests, beds=beds, lounge=lounge)
+    # Copies, so per-call totals never leak into the shared catalog
+    rooms = [
+        dict(r)
+        for r in await find_rooms(
+            guests=guests,
+            beds=beds,
+            lounge=lounge,
+            check_in=ctx.get("check_in"),
+            nights=max(1, ctx.get("nights") or 1),
+        )
+    ]
     for r in rooms:
         r["total_price"] = r["price"] * max(1, ctx.get("nights") or 1)
     return rooms
@@ -79,7 +45,7 @@ def select_room(ctx: Dict, room_id: str) -> Optional[Dict]:
     return None
 
 
-def finalize_booking(ctx: Dict) -> Optional[Dict]:
+async def finalize_booking(ctx: Dict) -> Optional[Dict]:
     room_id = ctx.get("selected_room")
     guest_name = ctx.get("guest_name")
     if not room_id or not guest_name:
@@ -87,14 +53,31 @@ def finalize_booking(ctx: Dict) -> Optional[Dict]:
     room = next((r for r in ROOMS if r["id"] == room_id), None)
     if not room:
         return None
-    booking_id = create_booking(guest_name, room)
+    nights = ctx.get("nights") or 1
+    try:
+        check_in = resolve_check_in(ctx.get("check_in"))
+    except ValueError:
+        return None
+    booking_id = None
+    if ctx.get("booking_id"):
+        # Same booking finalized again (caller re-confirming): extend the hold rather than take a second room
+        if await extend_booking(ctx["booking_id"], guest_name, room_id, check_in, nights):
+            booking_id = ctx["booking_id"]
+    if not booking_id:
+        booking_id = await create_booking(guest_name, room, check_in=check_in, nights=nights)
+    if not booking_id:
+        return None
     ctx["booking_id"] = booking_id
+    # Later re-confirmations compare against the date actually booked, not a fresh "today"
+    ctx["check_in"] = check_in
     
     # Return full booking details
-    nights = ctx.get("nights", 1)
     total_price = room["price"] * nights
     return {
         "booking_id": booking_id,
+        # Confirmed only once the payments portal reports the payment
+        "status": "held",
+        "pay_within_minutes": round(HOLD_EXPIRY.ttl / 60),
         "guest_name": guest_name,
         "room_id": room["id"],
         "room_name": room["name"],
@@ -104,21 +87,6 @@ def finalize_booking(ctx: Dict) -> Optional[Dict]:
         "price_per_night": room["price"],
         "nights": nights,
         "total_price": total_price,
-        "check_in": ctx.get("check_in", "TBD"),
+        "check_in": check_in,
         "max_guests": room["max_guests"],
     }
-
-
-def _parse_date(text: str) -> Optional[str]:
-    m = re.search(r"(\d{1,2})[/-](\d{1,2})", text)
-    if not m:
-        return None
-    month, day = m.groups()
-    year = datetime.utcnow().year
-    try:
-        dt = datetime(year, int(month), int(day))
-        if dt < datetime.utcnow():
-            dt = dt.replace(year=year + 1)
-        return dt.strftime("%Y-%m-%d")
-    except ValueError:
-        return None
@@ -0,0 +1,248 @@
+"""
+Slot Extractor - single-pass keyword/number grammar that fills booking slots from a transcript
+"""
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.data.dummy_dta import ROOMS
+
+# One flat character class keeps tokenization a single cheap C scan; hyphens split words.
+# Clause punctuation is kept as its own token so negation never reaches across a clause.
+TOKEN_RE = re.compile(r"[a-z0-9/']+|[,.;?!]")
+CLAUSE_ENDS = {",", ".", ";", "?", "!"}
+DIGITS_RE = re.compile(r"(\d+)(st|nd|rd|th)?$")
+SLASH_DATE_RE = re.compile(r"(\d{1,2})/(\d{1,2})$")
+
+UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13,
+    "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+    # Only count when a unit follows: "a night", "a couple of nights"
+    "a": 1, "an": 1, "single": 1, "couple": 2, "pair": 2,
+}
+TENS = {"twenty": 20, "thirty": 30, "forty": 40, "fifty": 50}
+ORDINALS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "sixth": 6, "seventh": 7,
+    "eighth": 8, "ninth": 9, "tenth": 10, "eleventh": 11, "twelfth": 12, "thirteenth": 13,
+    "fourteenth": 14, "fifteenth": 15, "sixteenth": 16, "seventeenth": 17, "eighteenth": 18,
+    "nineteenth": 19, "twentieth": 20, "thirtieth": 30,
+}
+MONTHS = {
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "april": 4, "apr": 4, "may": 5,
+    "june": 6, "july": 7, "august": 8, "aug": 8, "september": 9, "sept": 9, "sep": 9,
+    "october": 10, "oct": 10, "november": 11, "nov": 11, "december": 12, "dec": 12,
+}
+NEGATORS = {"no", "without", "not", "don't", "dont", "skip", "nope"}
+NEGATION_WINDOW = 3  # tokens either side of the word, within its clause
+# Spoken numbers too vague to be a bare guest count ("a room for a couple of nights")
+VAGUE_NUMBERS = {"a", "an", "single", "couple", "pair"}
+NAME_STOPWORDS = {"a", "the", "is", "and", "i", "it", "not", "uh", "um"}
+
+# Intent keywords in the priority the old substring checks applied them
+INTENT_PRIORITY = ("availability", "booking", "pricing")
+INTENT_RANK = {intent: rank for rank, intent in enumerate(INTENT_PRIORITY)}
+KEYWORDS: List[Tuple[str, str, object]] = [
+    ("availability", "intent", "availability"), ("available", "intent", "availability"),
+    ("book", "intent", "booking"), ("booking", "intent", "booking"), ("booked", "intent", "booking"),
+    ("reserve", "intent", "booking"), ("reservation", "intent", "booking"), ("reserved", "intent", "booking"),
+    ("confirm", "intent", "booking"), ("confirmed", "intent", "booking"),
+    ("price", "intent", "pricing"), ("prices", "intent", "pricing"), ("pricing", "intent", "pricing"),
+    ("rate", "intent", "pricing"), ("rates", "intent", "pricing"), ("tariff", "intent", "pricing"),
+    ("guest", "guests", "total"), ("guests", "guests", "total"), ("people", "guests", "total"),
+    ("person", "guests", "total"), ("persons", "guests", "total"), ("of us", "guests", "total"),
+    ("adult", "guests", "adults"), ("adults", "guests", "adults"),
+    ("child", "guests", "children"), ("children", "guests", "children"),
+    ("kid", "guests", "children"), ("kids", "guests", "children"),
+    ("night", "nights", 1), ("nights", "nights", 1), ("week", "nights", 7), ("weeks", "nights", 7),
+    ("bed", "beds", None), ("beds", "beds", None),
+    ("single bed", "beds", 1), ("single room", "beds", 1),
+    ("double", "beds", 2), ("twin", "beds", 2),
+    ("lounge", "lounge", None),
+    ("name is", "name", None), ("name's", "name", None),
+]
+
+
+class SlotExtractor:
+    """Tokenizes once, then walks the tokens with a phrase trie and a number grammar.
+
+    Numbers ("3", "three", "twenty one", "a couple") are remembered and bound to the unit
+    that follows them ("guests", "nights", "beds"), so "2 nights for 3 guests" fills both
+    slots correctly. A bare number after "for" that no unit claims is the party size
+    ("a room for 2 for 3 nights"). Room names from the catalog are phrases in the same trie.
+    """
+
+    def __init__(self, rooms: List[Dict]):
+        self.trie: Dict = {}
+        for phrase, slot, value in KEYWORDS:
+            self._add(phrase, slot, value)
+        for room in rooms:
+            self._add(room["name"].lower(), "room", room["id"])
+            self._add(room["id"].replace("-", " "), "room", room["id"])
+        # Everything that can start a phrase, a number or a date; other tokens are skipped unseen
+        self.starts = set(self.trie) | set(UNITS) | set(TENS) | set(ORDINALS) | set(MONTHS)
+
+    def _add(self, phrase: str, slot: str, value):
+        node = self.trie
+        for token in TOKEN_RE.findall(phrase):
+            node = node.setdefault(token, {})
+        node["$"] = (slot, value)
+
+    def _number(self, tokens: List[str], i: int) -> Tuple[Optional[int], bool, int]:
+        """(value, is_ordinal, next index) for a number starting at tokens[i]"""
+        tok = tokens[i]
+        m = DIGITS_RE.match(tok)
+        if m:
+            return int(m.group(1)), bool(m.group(2)), i + 1
+        if tok in TENS:
+            value = TENS[tok]
+            nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+            if nxt in UNITS and 0 < UNITS[nxt] < 10 and nxt not in VAGUE_NUMBERS:
+                return value + UNITS[nxt], False, i + 2
+            if nxt in ORDINALS and ORDINALS[nxt] < 10:
+                return value + ORDINALS[nxt], True, i + 2
+            return value, False, i + 1
+        if tok in ORDINALS:
+            return ORDINALS[tok], True, i + 1
+        if tok in UNITS:
+            return UNITS[tok], False, i + 1
+        return None, False, i
+
+    def _phrase(self, tokens: List[str], i: int):
+        node, k, match = self.trie, i, None
+        while k < len(tokens) and tokens[k] in node:
+            node = node[tokens[k]]
+            k += 1
+            if "$" in node:
+                match = (node["$"], k)
+        return match
+
+    def _negated(self, tokens: List[str], start: int, end: int) -> bool:
+        """Whether a negator near tokens[start:end] applies to it: before it in the same clause,
+        after it in the same clause, or opening the answer to a question about it ("lounge? no")"""
+        for k in range(start - 1, max(-1, start - 1 - NEGATION_WINDOW), -1):
+            if tokens[k] in CLAUSE_ENDS:
+                break
+            if tokens[k] in NEGATORS:
+                return True
+        for k in range(end, min(len(tokens), end + NEGATION_WINDOW)):
+            if tokens[k] in CLAUSE_ENDS:
+                return tokens[k] == "?" and k + 1 < len(tokens) and tokens[k + 1] in NEGATORS
+            if tokens[k] in NEGATORS:
+                return True
+        return False
+
+    def extract(self, text: str) -> Dict:
+        tokens = TOKEN_RE.findall(text.lower())
+        slots: Dict = {}
+        intent = None
+        total, adults, children = None, 0, 0
+        number = None  # (value, is_ordinal, index just past it)
+        month_at = None  # (month, index just past it)
+        month_date = None  # (index past the day number, previous check_in)
+        party = None  # (value, index just past it, earlier candidate) for "for 2" until a unit claims it
+        starts, trie = self.starts, self.trie
+        i, n = 0, len(tokens)
+        while i < n:
+            tok = tokens[i]
+            if tok not in starts:
+                if not tok[0].isdigit():
+                    i += 1
+                    continue
+                date = SLASH_DATE_RE.match(tok)
+                if date:
+                    slots["check_in"] = _date_from(int(date.group(1)), int(date.group(2)))
+                    i += 1
+                    continue
+
+            match = self._phrase(tokens, i) if tok in trie else None
+            if match is None:
+                value, ordinal, j = self._number(tokens, i)
+                if value is not None:
+                    number = (value, ordinal, j)
+                    if i and tokens[i - 1] == "for" and not ordinal and tok not in VAGUE_NUMBERS:
+                        party = (value, j, party)
+                    if month_at and month_at[1] == i:
+                        # "march 5"; undone below if a unit claims the number ("may 2 guests")
+                        month_date = (j, slots.get("check_in"))
+                        slots["check_in"] = _date_from(month_at[0], value)
+                    i = j
+                    continue
+            if match is None:
+                if tok in MONTHS:
+                    month = MONTHS[tok]
+                    month_at = (month, i + 1)
+                    # "5th of march", "5 march"
+                    if number and i - number[2] <= 1 and 1 <= number[0] <= 31:
+                        slots["check_in"] = _date_from(month, number[0])
+                        if party and party[1] == number[2]:
+                            party = party[2]
+                i += 1
+                continue
+
+            (slot, value), end = match
+            # A number binds to a unit right after it, allowing one filler word ("2 more nights")
+            bound = number[0] if number and not number[1] and i - number[2] <= 1 else None
+            if bound is not None and slot in ("guests", "nights", "beds") and month_date and month_date[0] == number[2]:
+                if month_date[1] is None:
+                    slots.pop("check_in", None)
+                else:
+                    slots["check_in"] = month_date[1]
+                month_date = None
+            if bound is not None and slot in ("guests", "nights", "beds") and party and party[1] == number[2]:
+                party = party[2]
+            if slot == "intent":
+                if intent is None or INTENT_RANK[value] < INTENT_RANK[intent]:
+                    intent = value
+            elif slot == "guests":
+                if bound is not None:
+                    if value == "total":
+                        total = bound
+                    elif value == "adults":
+                        adults += bound
+                    else:
+                        children += bound
+            elif slot == "nights":
+                if bound:
+                    slots["nights"] = bound * value
+            elif slot == "beds":
+                if value is not None:
+                    slots["beds"] = value
+                elif bound:
+                    slots["beds"] = bound
+            elif slot == "lounge":
+                slots["lounge"] = not self._negated(tokens, i, end)
+            elif slot == "name":
+                if end < n and tokens[end].isalpha() and tokens[end] not in NAME_STOPWORDS:
+                    slots["guest_name"] = tokens[end].title()
+                    end += 1
+            elif slot == "room":
+                slots["selected_room"] = value
+                if "lounge" in tokens[i:end]:
+                    slots["lounge"] = True
+            number = None
+            i = end
+
+        if total is not None:
+            slots["guests"] = total
+        elif adults or children:
+            slots["guests"] = adults + children
+        elif party:
+            slots["guests"] = party[0]
+        if intent:
+            slots["intent"] = intent
+        return slots
+
+
+def _date_from(month: int, day: int) -> Optional[str]:
+    year = datetime.utcnow().year
+    try:
+        dt = datetime(year, month, day)
+        if dt < datetime.utcnow():
+            dt = dt.replace(year=year + 1)
+        return dt.strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+slot_extractor = SlotExtractor(ROOMS)
@@ -0,0 +1,199 @@
+"""
+Tracing - per-call, per-turn stage timestamps, exported as Prometheus histograms on /metrics
+"""
+import time
+from contextvars import ContextVar
+from app.log import get_logger
+
+log = get_logger("trace")
+
+BUCKETS = (0.025, 0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+# Stages stamped on a turn, in the order they normally happen
+SPEECH_STARTED = "speech_started"
+FINAL_TRANSCRIPT = "final_transcript"
+FIRST_LLM_TOKEN = "first_llm_token"
+FIRST_TTS_BYTE = "first_tts_byte"
+FIRST_MEDIA = "first_media"
+MARK_ACK = "mark_ack"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one label, rendered in Prometheus text format"""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: tuple = BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self.series: dict[str, list] = {}  # label value -> [bucket counts..., sum, count]
+
+    def observe(self, label_value: str, seconds: float):
+        series = self.series.get(label_value)
+        if series is None:
+            series = self.series[label_value] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                series[i] += 1
+        series[-2] += seconds
+        series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for value, series in sorted(self.series.items()):
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{self.label}="{value}",le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{self.label}="{value}",le="+Inf"}} {series[-1]}')
+            lines.append(f'{self.name}_sum{{{self.label}="{value}"}} {series[-2]:.6f}')
+            lines.append(f'{self.name}_count{{{self.label}="{value}"}} {series[-1]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.values: dict[str, int] = {}
+
+    def inc(self, label_value: str, amount: int = 1):
+        self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for value, count in sorted(self.values.items()):
+            lines.append(f'{self.name}{{{self.label}="{value}"}} {count}')
+        return lines
+
+
+class Sampled:
+    """Gauge or counter kept by a component and read when /metrics is scraped.
+
+    read() returns a number, or {label value: number} when the metric has a label.
+    """
+
+    def __init__(self, name: str, kind: str, help_text: str, read, label: str | None = None):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.read = read
+        self.label = label
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        value = self.read()
+        if self.label is None:
+            lines.append(f"{self.name} {value}")
+        else:
+            for label_value, count in sorted(value.items()):
+                lines.append(f'{self.name}{{{self.label}="{label_value}"}} {count}')
+        return lines
+
+
+TURN_STAGE_SECONDS = Histogram(
+    "voice_turn_stage_seconds",
+    "Seconds from the caller's final transcript to each stage of the reply "
+    "(speech_to_final: from SpeechStarted to the final transcript)",
+    "stage",
+)
+TOOL_SECONDS = Histogram("voice_tool_seconds", "Tool execution time in seconds", "tool")
+TURNS_TOTAL = Counter("voice_turns_total", "Finished turns by outcome", "outcome")
+METRICS = [TURN_STAGE_SECONDS, TOOL_SECONDS, TURNS_TOTAL]
+
+
+def register(*metrics):
+    """Add metrics owned by other modules to /metrics"""
+    METRICS.extend(metrics)
+
+
+class Turn:
+    """Monotonic timestamps for one caller utterance and the reply to it"""
+
+    def __init__(self, final_at: float, speech_started_at: float | None = None):
+        self.stamps = {FINAL_TRANSCRIPT: final_at}
+        if speech_started_at is not None:
+            self.stamps[SPEECH_STARTED] = speech_started_at
+
+    def mark(self, stage: str):
+        """Record the first time a stage is reached; later calls are ignored"""
+        self.stamps.setdefault(stage, time.perf_counter())
+
+    def observe(self):
+        final = self.stamps[FINAL_TRANSCRIPT]
+        for stage, at in self.stamps.items():
+            if stage == SPEECH_STARTED:
+                TURN_STAGE_SECONDS.observe("speech_to_final", final - at)
+            elif stage != FINAL_TRANSCRIPT:
+                TURN_STAGE_SECONDS.observe(stage, at - final)
+
+    def summary(self) -> str:
+        final = self.stamps[FINAL_TRANSCRIPT]
+        return " ".join(
+            f"{stage}={(at - final) * 1000:+.0f}ms"
+            for stage, at in sorted(self.stamps.items(), key=lambda kv: kv[1])
+            if stage != FINAL_TRANSCRIPT
+        )
+
+
+class CallTrace:
+    """Turns of one call, keyed by the response sequence_id that answers them.
+
+    The STT receiver stamps SpeechStarted and the final transcript as they arrive; the
+    call binds that turn to its response sequence, and the turn is finished (and its
+    stages observed) on the mark ack, on barge-in, or when the call ends.
+    """
+
+    def __init__(self, call_id: str | None = None):
+        self.call_id = call_id
+        self.speech_started_at: float | None = None
+        self.pending: Turn | None = None
+        self.turns: dict[int, Turn] = {}
+
+    def speech_started(self):
+        if self.speech_started_at is None:
+            self.speech_started_at = time.perf_counter()
+
+    def final_transcript(self):
+        self.pending = Turn(time.perf_counter(), self.speech_started_at)
+        self.speech_started_at = None
+
+    def bind(self, sequence_id: int) -> Turn:
+        turn = self.pending or Turn(time.perf_counter())
+        self.pending = None
+        self.turns[sequence_id] = turn
+        return turn
+
+    def finish(self, sequence_id: int, outcome: str = "completed"):
+        turn = self.turns.pop(sequence_id, None)
+        if turn is None:
+            return
+        if outcome == "completed":
+            turn.mark(MARK_ACK)
+        turn.observe()
+        TURNS_TOTAL.inc(outcome)
+        log.info("turn", stream_sid=self.call_id, sequence_id=sequence_id, outcome=outcome, stages=turn.summary())
+
+    def close(self):
+        for sequence_id in list(self.turns):
+            self.finish(sequence_id, "abandoned")
+
+
+# The turn being answered, for code that runs inside the response (agent, TTS)
+current_turn: ContextVar[Turn | None] = ContextVar("current_turn", default=None)
+
+
+def mark(stage: str):
+    turn = current_turn.get()
+    if turn is not None:
+        turn.mark(stage)
+
+
+def observe_tool(name: str, seconds: float):
+    TOOL_SECONDS.observe(name, seconds)
+
+
+def render() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -1,11 +1,21 @@
 import os, websockets, json, asyncio
 from dotenv import load_dotenv
+from app.tts_cache import tts_cache
+from app import tracing
+from app.log import get_logger
 
 load_dotenv()
 
+log = get_logger("tts")
+
+VOICE_MODEL = os.getenv("VOICE_MODEL")
+CACHED_CHUNK_BYTES = 3200  # 400 ms of mu-law per yield when replaying cached audio
+
+DEEPGRAM_WS_BASE = os.getenv("DEEPGRAM_WS_BASE", "wss://api.deepgram.com")
+
 TTS_WS_URL = (
-    f"wss://api.deepgram.com/v1/speak"
-    f"?model={os.getenv('VOICE_MODEL')}"
+    f"{DEEPGRAM_WS_BASE}/v1/speak"
+    f"?model={VOICE_MODEL}"
     f"&encoding=mulaw"
     f"&sample_rate=8000"
 )
@@ -16,8 +26,20 @@ HEADERS = {"Authorization": f"Token {os.getenv('DEEPGRAM_API_KEY')}"}
 class TTSConnection:    
     def __init__(self):
         self.ws = None
-        self.monitor_task = None
         self.connection_closed = False
+        self.failures = 0
+        # A Speak whose Flushed has not been read, and Clears whose Cleared has not: while
+        # either is outstanding the next frames on the socket do not belong to a new Speak
+        self.speaking = False
+        self.pending_clears = 0
+
+    @property
+    def stale(self) -> bool:
+        return self.speaking or self.pending_clears > 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.ws is not None and self.ws.state is websockets.protocol.State.OPEN
         
     async def establish_connection(self):
         try:
@@ -25,62 +47,64 @@ class TTSConnection:
                 websockets.connect(TTS_WS_URL, extra_headers=HEADERS),
                 timeout=10.0
             )
-            print("[tts] Connected to Deepgram TTS WebSocket")
+            log.info("connected to Deepgram TTS WebSocket")
             return ws
         except asyncio.TimeoutError:
-            print("[tts] Timeout connecting to Deepgram TTS")
+            log.warning("timeout connecting to Deepgram TTS")
             return None
         except Exception as e:
-            print(f"[tts] Failed to connect: {e}")
+            log.warning("connect failed", error=str(e))
             return None
     
-    async def monitor_connection(self):
-        consecutive_failures = 0
-        max_failures = 3
-        
-        while consecutive_failures < max_failures and not self.connection_closed:
-            if self.ws is None or self.ws.state is websockets.protocol.State.CLOSED:
-                print("[tts] Re-establishing connection...")
-                result = await self.establish_connection()
-                if result is None:
-                    consecutive_failures += 1
-                    print(f"[tts] Connection failed (attempt {consecutive_failures}/{max_failures})")
-                    if consecutive_failures >= max_failures:
-                        print("[tts] Max failures reached - stopping reconnection")
-                        break
-                else:
-                    self.ws = result
-                    consecutive_failures = 0
-            await asyncio.sleep(1)
-    
     async def start(self):
         self.ws = await self.establish_connection()
-        if self.ws:
-            self.monitor_task = asyncio.create_task(self.monitor_connection())
         return self.ws is not None
+
+    async def reconnect(self):
+        """Replace a dropped socket; reconnect scheduling is owned by TTSPool"""
+        result = await self.establish_connection()
+        if result is None:
+            self.failures += 1
+            return False
+        self.ws = result
+        self.failures = 0
+        self.speaking = False
+        self.pending_clears = 0
+        return True
+
+    async def reset(self, timeout: float = 2.0):
+        """Clear any queued audio and drain until Deepgram acks, so the socket can be reused"""
+        if not self.is_open:
+            return False
+        try:
+            await self.ws.send(json.dumps({"type": "Clear"}))
+            self.pending_clears += 1
+            async with asyncio.timeout(timeout):
+                while self.pending_clears:
+                    msg = await self.ws.recv()
+                    if isinstance(msg, str) and json.loads(msg).get("type") == "Cleared":
+                        self.pending_clears -= 1
+            self.speaking = False
+            return True
+        except Exception as e:
+            log.warning("reset failed", error=str(e))
+            return False
     
     async def cleanup(self):
         self.connection_closed = True
         
-        if self.monitor_task:
-            self.monitor_task.cancel()
-            try:
-                await self.monitor_task
-            except asyncio.CancelledError:
-                pass
-        
         if self.ws:
             try:
                 await self.ws.send(json.dumps({"type": "Close"}))
-                print("[tts] Sent Close message")
+                log.debug("sent Close")
             except Exception as e:
-                print(f"[tts] Error sending Close: {e}")
+                log.debug("error sending Close", error=str(e))
             
             try:
                 await self.ws.close()
-                print("[tts] WebSocket closed")
+                log.debug("websocket closed")
             except Exception as e:
-                print(f"[tts] Error closing WebSocket: {e}")
+                log.debug("error closing websocket", error=str(e))
             
             self.ws = None
     
@@ -89,14 +113,30 @@ class TTSConnection:
         if self.ws and self.ws.state is websockets.protocol.State.OPEN:
             try:
                 await self.ws.send(json.dumps({"type": "Clear"}))
-                print("[tts] Sent Clear message - discarding buffered audio")
+                self.pending_clears += 1
+                log.info("sent Clear; discarding buffered audio")
             except Exception as e:
-                print(f"[tts] Error sending Clear: {e}")
+                log.warning("error sending Clear", error=str(e))
+
 
+async def speak_stream(tts_conn: TTSConnection, text: str, persist: bool = False):
+    """Yield mu-law audio for text, from the phrase cache when possible.
+
+    persist=True writes the phrase to the disk tier on first synthesis (e.g. the greeting).
+    If an earlier Speak was abandoned mid-stream (barge-in, superseded turn), the socket is
+    drained to Cleared first so its leftover audio is neither played nor cached as this text.
+    """
+    cached = tts_cache.get(VOICE_MODEL, text)
+    if cached is not None:
+        log.debug("cache hit", bytes=len(cached))
+        tracing.mark(tracing.FIRST_TTS_BYTE)
+        view = memoryview(cached)
+        for i in range(0, len(view), CACHED_CHUNK_BYTES):
+            yield view[i:i + CACHED_CHUNK_BYTES]
+        return
 
-async def speak_stream(tts_conn: TTSConnection, text: str):
     if not tts_conn or not tts_conn.ws:
-        print("[tts] No active connection")
+        log.warning("no active connection")
         return
     
     try:
@@ -104,9 +144,13 @@ async def speak_stream(tts_conn: TTSConnection, text: str):
         while tts_conn.ws is None or tts_conn.ws.state is websockets.protocol.State.CLOSED:
             await asyncio.sleep(0.1)
             if asyncio.get_event_loop().time() - wait_start > 5:
-                print("[tts] Timeout waiting for connection")
+                log.warning("timeout waiting for connection")
                 return
-        
+        if tts_conn.stale and not await tts_conn.reset():
+            log.warning("could not drain an abandoned Speak; skipping sentence")
+            return
+
+        tts_conn.speaking = True
         await tts_conn.ws.send(json.dumps({
             "type": "Speak",
             "text": text
@@ -116,20 +160,33 @@ async def speak_stream(tts_conn: TTSConnection, text: str):
             "type": "Flush"
         }))
         
+        collected = [] if tts_cache.cacheable(text) else None
         async for msg in tts_conn.ws:
             if isinstance(msg, bytes):
+                tracing.mark(tracing.FIRST_TTS_BYTE)
+                if collected is not None:
+                    collected.append(msg)
                 yield msg
             else:
                 data = json.loads(msg)
                 msg_type = data.get("type")
                 
                 if msg_type == "Flushed":
+                    tts_conn.speaking = False
+                    # Audio that raced a barge-in Clear may be cut short; do not cache it
+                    if collected and not tts_conn.pending_clears:
+                        tts_cache.put(VOICE_MODEL, text, b"".join(collected), persist=persist)
+                    break
+                elif msg_type == "Cleared":
+                    # A barge-in Clear overtook this Speak before its Flushed
+                    tts_conn.pending_clears = max(0, tts_conn.pending_clears - 1)
+                    tts_conn.speaking = False
                     break
                 elif msg_type == "Metadata":
-                    print(f"[tts] Metadata: {data.get('model_name')}")
+                    log.debug("metadata", model=data.get("model_name"), every=50)
                 elif msg_type == "Warning":
-                    print(f"[tts] Warning: {data.get('description')}")
+                    log.warning("Deepgram warning", description=data.get("description"), per_second=1)
                     
     except Exception as e:
-        print(f"[tts] Stream error: {e}")
+        log.error("stream error", error=str(e))
         raise
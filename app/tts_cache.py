@@ -0,0 +1,159 @@
+"""
+TTS Audio Cache - content-addressed mu-law audio for recurring phrases
+(in-memory LRU with a byte budget, backed by memory-mapped files on disk)
+"""
+import asyncio
+import hashlib
+import mmap
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from dotenv import load_dotenv
+from app import tracing
+from app.log import get_logger
+
+load_dotenv()
+
+log = get_logger("tts-cache")
+
+CACHE_DIR = os.getenv("TTS_CACHE_DIR", ".tts_cache")
+MEMORY_BUDGET = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(8 * 1024 * 1024)))
+MAX_PHRASE_CHARS = int(os.getenv("TTS_CACHE_MAX_CHARS", "200"))
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_phrase(text: str) -> str:
+    return _WS_RE.sub(" ", text).strip()
+
+
+def phrase_key(voice_model: str, text: str) -> str:
+    """Content address for a phrase: hash(voice model, normalized text)"""
+    raw = f"{voice_model}\0{normalize_phrase(text)}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+class TTSAudioCache:
+    def __init__(self, cache_dir: str | None = CACHE_DIR, memory_budget: int = MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self.memory: OrderedDict[str, bytes | memoryview] = OrderedDict()
+        self.memory_bytes = 0
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.on_disk: set[str] = set()  # written, or a write already scheduled
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def cacheable(self, text: str) -> bool:
+        return 0 < len(normalize_phrase(text)) <= MAX_PHRASE_CHARS
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.ulaw"
+
+    def _remember(self, key: str, audio: bytes | memoryview):
+        if len(audio) > self.memory_budget:
+            return
+        old = self.memory.pop(key, None)
+        if old is not None:
+            self.memory_bytes -= len(old)
+        self.memory[key] = audio
+        self.memory_bytes += len(audio)
+        while self.memory_bytes > self.memory_budget:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def _read_disk(self, key: str) -> memoryview | None:
+        """Map a cached phrase read-only; pages are faulted in as the audio is sent"""
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                # The mapping outlives the file descriptor and is unmapped with its last view
+                return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except (FileNotFoundError, ValueError):
+            # ValueError: zero-length file cannot be mapped
+            return None
+        except OSError as e:
+            log.warning("disk read failed", key=key[:12], error=str(e), per_second=1)
+            return None
+
+    def _write_disk(self, key: str, audio: bytes):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        if path.exists():
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(audio)
+            os.replace(tmp, path)
+        except OSError as e:
+            log.warning("disk write failed", key=key[:12], error=str(e), per_second=1)
+
+    def _promote(self, key: str, audio: bytes | memoryview):
+        """Write a phrase to the disk tier once, on a worker thread when called from the loop"""
+        if not self.cache_dir or key in self.on_disk:
+            return
+        self.on_disk.add(key)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_disk(key, audio)
+            return
+        loop.run_in_executor(None, self._write_disk, key, audio)
+
+    def get(self, voice_model: str, text: str) -> bytes | memoryview | None:
+        """Look up audio for a phrase; recurring phrases are promoted to disk"""
+        if not self.cacheable(text):
+            return None
+        key = phrase_key(voice_model, text)
+        audio = self.memory.get(key)
+        if audio is not None:
+            self.memory.move_to_end(key)
+            self.memory_hits += 1
+            self._promote(key, audio)
+            return audio
+        audio = self._read_disk(key)
+        if audio is not None:
+            self.disk_hits += 1
+            self.on_disk.add(key)
+            self._remember(key, audio)
+            return audio
+        self.misses += 1
+        return None
+
+    def put(self, voice_model: str, text: str, audio: bytes, persist: bool = False):
+        if not audio or not self.cacheable(text):
+            return
+        key = phrase_key(voice_model, text)
+        self._remember(key, audio)
+        if persist:
+            self._promote(key, audio)
+
+    def metrics(self) -> list:
+        """Hit-rate counters and memory tier size for /metrics"""
+        return [
+            tracing.Sampled(
+                "voice_tts_cache_lookups_total", "counter", "TTS phrase cache lookups by where they were answered",
+                lambda: {"memory": self.memory_hits, "disk": self.disk_hits, "miss": self.misses},
+                label="result",
+            ),
+            tracing.Sampled("voice_tts_cache_memory_bytes", "gauge", "Audio bytes held in the memory tier", lambda: self.memory_bytes),
+        ]
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_bytes,
+        }
+
+
+tts_cache = TTSAudioCache()
+tracing.register(*tts_cache.metrics())
@@ -0,0 +1,152 @@
+"""
+TTS Pool - process-wide pool of warm Deepgram TTS websocket connections
+"""
+import asyncio
+import math
+import os
+from collections import deque
+from dotenv import load_dotenv
+from app.tts import TTSConnection
+from app.log import get_logger
+
+load_dotenv()
+
+log = get_logger("tts-pool")
+
+POOL_MIN_IDLE = int(os.getenv("TTS_POOL_MIN_IDLE", "2"))
+POOL_MAX_SIZE = int(os.getenv("TTS_POOL_MAX_SIZE", "50"))
+POOL_SPARE_RATIO = float(os.getenv("TTS_POOL_SPARE_RATIO", "0.25"))
+POOL_CHECK_INTERVAL = float(os.getenv("TTS_POOL_CHECK_INTERVAL", "1.0"))
+MAX_RECONNECT_FAILURES = 3
+
+
+class TTSPool:
+    def __init__(
+        self,
+        min_idle: int = POOL_MIN_IDLE,
+        max_size: int = POOL_MAX_SIZE,
+        spare_ratio: float = POOL_SPARE_RATIO,
+        check_interval: float = POOL_CHECK_INTERVAL,
+    ):
+        self.min_idle = min_idle
+        self.max_size = max_size
+        self.spare_ratio = spare_ratio
+        self.check_interval = check_interval
+        self.idle: deque[TTSConnection] = deque()
+        self.leased: set[TTSConnection] = set()
+        self.monitor_task: asyncio.Task | None = None
+        self.closed = False
+        self.leases = 0
+        self.warm_leases = 0
+
+    def target_idle(self) -> int:
+        """Warm spares to keep, scaled by the number of calls in progress"""
+        wanted = max(self.min_idle, math.ceil(len(self.leased) * self.spare_ratio))
+        return max(0, min(wanted, self.max_size - len(self.leased)))
+
+    async def start(self):
+        """Pre-warm the pool and start the shared health-check loop"""
+        self.closed = False
+        await self._fill()
+        self._ensure_monitor()
+        log.info("started", warm_connections=len(self.idle))
+
+    def _ensure_monitor(self):
+        if self.monitor_task is None or self.monitor_task.done():
+            self.monitor_task = asyncio.create_task(self._monitor(), name="tts-pool-monitor")
+
+    async def _dial(self) -> TTSConnection | None:
+        conn = TTSConnection()
+        if await conn.start():
+            return conn
+        return None
+
+    async def _fill(self):
+        missing = self.target_idle() - len(self.idle)
+        if missing <= 0:
+            return
+        conns = await asyncio.gather(*(self._dial() for _ in range(missing)))
+        for conn in conns:
+            if conn is None:
+                continue
+            if self.closed:
+                await conn.cleanup()
+            else:
+                self.idle.append(conn)
+
+    async def _monitor(self):
+        while not self.closed:
+            try:
+                # Reconnect sockets that dropped mid-call
+                for conn in list(self.leased):
+                    if conn.is_open or conn.connection_closed:
+                        continue
+                    if conn.failures >= MAX_RECONNECT_FAILURES:
+                        continue
+                    log.info("re-establishing leased connection")
+                    if not await conn.reconnect():
+                        log.warning("reconnect failed", attempt=conn.failures, max_attempts=MAX_RECONNECT_FAILURES)
+
+                # Drop dead spares, trim excess, then top up
+                for conn in [c for c in self.idle if not c.is_open]:
+                    self.idle.remove(conn)
+                    await conn.cleanup()
+                while len(self.idle) > self.target_idle():
+                    await self.idle.pop().cleanup()
+                await self._fill()
+            except Exception as e:
+                log.error("monitor error", error=str(e))
+            await asyncio.sleep(self.check_interval)
+
+    async def acquire(self) -> TTSConnection | None:
+        """Lease a connection for one call; dials a fresh one if no warm spare is available"""
+        self._ensure_monitor()
+        conn = None
+        while self.idle:
+            candidate = self.idle.popleft()
+            if candidate.is_open:
+                conn = candidate
+                self.warm_leases += 1
+                break
+            await candidate.cleanup()
+        if conn is None:
+            conn = await self._dial()
+            if conn is None:
+                return None
+        self.leased.add(conn)
+        self.leases += 1
+        return conn
+
+    async def release(self, conn: TTSConnection):
+        """Return a leased connection; it is cleared and reused, or closed if unhealthy or surplus"""
+        self.leased.discard(conn)
+        if not self.closed and len(self.idle) < self.target_idle() and await conn.reset():
+            self.idle.append(conn)
+            return
+        await conn.cleanup()
+
+    async def close(self):
+        self.closed = True
+        if self.monitor_task:
+            self.monitor_task.cancel()
+            try:
+                await self.monitor_task
+            except asyncio.CancelledError:
+                pass
+            self.monitor_task = None
+        conns = list(self.idle) + list(self.leased)
+        self.idle.clear()
+        self.leased.clear()
+        await asyncio.gather(*(c.cleanup() for c in conns), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "idle": len(self.idle),
+            "leased": len(self.leased),
+            "target_idle": self.target_idle(),
+            "leases": self.leases,
+            "warm_leases": self.warm_leases,
+        }
+
+
+tts_pool = TTSPool()
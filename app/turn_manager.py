@@ -0,0 +1,56 @@
+"""
+Turn Manager - runs each caller turn as its own task so the STT receiver never waits on one
+"""
+import asyncio
+from app.log import get_logger
+
+log = get_logger("turns")
+
+
+class TurnManager:
+    """Per-call owner of the running turn task.
+
+    submit() returns immediately: the STT receiver only hands over the transcript and goes
+    back to reading the socket, so SpeechStarted and interim results keep flowing while a
+    reply is generated and played out. A newer transcript supersedes the running turn: its
+    task is cancelled, and the new turn waits for that cancellation to finish unwinding
+    before it starts, so the agent's history is only ever touched by one turn at a time.
+    """
+
+    def __init__(self, handle_turn):
+        self.handle_turn = handle_turn
+        self.current: asyncio.Task | None = None
+        self.tasks: set[asyncio.Task] = set()  # the current turn plus any still unwinding
+        self.started = 0
+        self.superseded = 0
+
+    @property
+    def busy(self) -> bool:
+        return self.current is not None and not self.current.done()
+
+    def submit(self, text: str) -> asyncio.Task:
+        if self.busy:
+            self.current.cancel()
+            self.superseded += 1
+            log.info("turn superseded by newer transcript")
+        self.started += 1
+        task = asyncio.create_task(self._run(text, set(self.tasks)), name=f"turn-{self.started}")
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        self.current = task
+        return task
+
+    async def _run(self, text: str, previous: set[asyncio.Task]):
+        # wait() rather than gather(): cancelling this turn must not cut short the others' cleanup
+        if previous:
+            await asyncio.wait(previous)
+        await self.handle_turn(text)
+
+    async def close(self):
+        self.current = None
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {"turns": self.started, "superseded": self.superseded}
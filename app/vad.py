@@ -0,0 +1,172 @@
+"""
+VAD - in-process energy / zero-crossing voice activity detection on inbound mu-law frames
+"""
+import os
+import time
+from collections import deque
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOCAL_VAD = os.getenv("LOCAL_VAD", "true").lower() == "true"
+VAD_ONSET_MS = int(os.getenv("VAD_ONSET_MS", "60"))         # speech needed before a start fires
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "300"))  # silence needed before an end fires
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", "12"))     # above the tracked noise floor
+VAD_MIN_DB = float(os.getenv("VAD_MIN_DB", "-45"))          # absolute floor for speech, dBFS
+VAD_MAX_ZCR = float(os.getenv("VAD_MAX_ZCR", "0.4"))        # broadband noise crosses zero more often
+VAD_CONFIRM_SECONDS = float(os.getenv("VAD_CONFIRM_SECONDS", "1.5"))
+FRAME_MS = 20
+NOISE_BLOCK_FRAMES = 25   # noise floor = quietest frame of the last few 0.5 s blocks
+NOISE_WINDOW_BLOCKS = 6
+
+
+def _mulaw_table() -> np.ndarray:
+    """G.711 mu-law byte -> linear sample in [-1, 1)"""
+    u = ~np.arange(256, dtype=np.uint8)
+    exponent = (u >> 4) & 0x07
+    mantissa = (u & 0x0F).astype(np.int32)
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return (np.where(u & 0x80, -magnitude, magnitude) / 32768.0).astype(np.float32)
+
+
+MULAW_TO_LINEAR = _mulaw_table()
+
+
+def frame_features(frame: bytes) -> tuple[float, float]:
+    """(energy in dBFS, zero-crossing rate) of one mu-law frame"""
+    if len(frame) < 2:
+        return -100.0, 0.0
+    x = MULAW_TO_LINEAR[np.frombuffer(frame, dtype=np.uint8)]
+    energy = float(np.dot(x, x)) / len(x)
+    db = 10.0 * np.log10(energy + 1e-10)
+    signs = np.signbit(x)
+    zcr = np.count_nonzero(signs[1:] != signs[:-1]) / (len(x) - 1)
+    return db, zcr
+
+
+class VoiceActivityDetector:
+    """Per-call speech detector with an adaptive noise floor and onset/hangover smoothing.
+
+    A frame counts as speech when its energy clears both VAD_MIN_DB and the noise floor
+    plus VAD_MARGIN_DB, and its zero-crossing rate is below VAD_MAX_ZCR. process()
+    returns "start" after VAD_ONSET_MS of consecutive speech and "end" after
+    VAD_HANGOVER_MS without any. The floor is the quietest frame of the last ~3 s
+    (minimum statistics): speech always has pauses, so it settles on the line noise
+    even if that noise is loud enough to pass as speech at first.
+
+    A local start used for barge-in is provisional: it only pauses playback. Deepgram's
+    SpeechStarted (or a transcript) within VAD_CONFIRM_SECONDS confirms it and the reply
+    is cut; otherwise reject() counts a false trigger, so thresholds can be tuned from
+    the stats, and playback resumes.
+    """
+
+    def __init__(
+        self,
+        onset_ms: int = VAD_ONSET_MS,
+        hangover_ms: int = VAD_HANGOVER_MS,
+        margin_db: float = VAD_MARGIN_DB,
+        min_db: float = VAD_MIN_DB,
+        max_zcr: float = VAD_MAX_ZCR,
+        confirm_seconds: float = VAD_CONFIRM_SECONDS,
+    ):
+        self.onset_frames = max(1, onset_ms // FRAME_MS)
+        self.hangover_frames = max(1, hangover_ms // FRAME_MS)
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.max_zcr = max_zcr
+        self.confirm_seconds = confirm_seconds
+        self.noise_db = -60.0
+        self.block_min = 0.0
+        self.block_frames = 0
+        self.block_minima: deque[float] = deque(maxlen=NOISE_WINDOW_BLOCKS)
+        self.speaking = False
+        self.run = 0
+        self.quiet = 0
+        self.frames = 0
+        self.speech_frames = 0
+        self.starts = 0
+        self.pending_since: float | None = None
+        self.barge_ins = 0
+        self.confirmed = 0
+        self.false_triggers = 0
+
+    def is_speech(self, db: float, zcr: float) -> bool:
+        return db > max(self.min_db, self.noise_db + self.margin_db) and zcr < self.max_zcr
+
+    def process(self, frame: bytes) -> str | None:
+        db, zcr = frame_features(frame)
+        self.frames += 1
+        self._track_noise(db)
+        if self.is_speech(db, zcr):
+            self.speech_frames += 1
+            self.run += 1
+            self.quiet = 0
+            # No starts until one noise block has been measured (the first 0.5 s of the call)
+            if not self.speaking and self.run >= self.onset_frames and self.block_minima:
+                self.speaking = True
+                self.starts += 1
+                return "start"
+            return None
+        self.run = 0
+        if self.speaking:
+            self.quiet += 1
+            if self.quiet >= self.hangover_frames:
+                self.speaking = False
+                self._expire()
+                return "end"
+        return None
+
+    def _track_noise(self, db: float):
+        if self.block_frames == 0 or db < self.block_min:
+            self.block_min = db
+        self.block_frames += 1
+        if db < self.noise_db:
+            self.noise_db = db
+        if self.block_frames == NOISE_BLOCK_FRAMES:
+            self.block_minima.append(self.block_min)
+            self.block_frames = 0
+            self.noise_db = min(self.block_minima)
+
+    def barged_in(self):
+        """A local start paused the agent; wait for Deepgram to confirm it"""
+        self.barge_ins += 1
+        self.pending_since = time.monotonic()
+
+    def confirm(self) -> bool:
+        """Deepgram heard speech too; True if that confirms a pending local barge-in"""
+        if self.pending_since is None:
+            return False
+        confirmed = time.monotonic() - self.pending_since <= self.confirm_seconds
+        self.pending_since = None
+        if confirmed:
+            self.confirmed += 1
+        else:
+            self.false_triggers += 1
+        return confirmed
+
+    def reject(self) -> bool:
+        """Nothing confirmed the pending barge-in in time; True if one was pending"""
+        if self.pending_since is None:
+            return False
+        self.pending_since = None
+        self.false_triggers += 1
+        return True
+
+    def _expire(self):
+        if self.pending_since is not None and time.monotonic() - self.pending_since > self.confirm_seconds:
+            self.pending_since = None
+            self.false_triggers += 1
+
+    def stats(self) -> dict:
+        self._expire()
+        return {
+            "frames": self.frames,
+            "speech_frames": self.speech_frames,
+            "starts": self.starts,
+            "barge_ins": self.barge_ins,
+            "confirmed": self.confirmed,
+            "false_triggers": self.false_triggers,
+            "noise_db": round(self.noise_db, 1),
+        }
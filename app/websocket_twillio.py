@@ -2,10 +2,21 @@ import asyncio, json, base64, os
 from fastapi import APIRouter, WebSocket
 from starlette.websockets import WebSocketDisconnect, WebSocketState
 from app.agent import HotelAgent
-from app.stt import connect_stt
-from app.tts import TTSConnection, speak_stream
+from app.stt_pool import stt_pool
+from app.tts import speak_stream
+from app.tts_pool import tts_pool
 from app.interruption_manager import InterruptionManager
+from app.speculation import Speculator, SPECULATIVE_LLM
+from app.audio_buffer import AudioFrameBuffer
+from app.response_pipeline import ResponsePipeline
+from app.media_encoder import MediaEncoder, BYTES_PER_SECOND, loads
+from app.playout import PlayoutScheduler
+from app.vad import VoiceActivityDetector, LOCAL_VAD
+from app.turn_manager import TurnManager
+from app import tracing
+from app.log import get_logger, bind_context, reset_context
 
+log = get_logger("twilio")
 router = APIRouter()
 ECHO_BACK = os.getenv("ECHO_BACK", "false").lower() == "true"
 
@@ -13,219 +24,302 @@ ECHO_BACK = os.getenv("ECHO_BACK", "false").lower() == "true"
 @router.websocket("/ws/twilio")
 async def twilio_ws(ws: WebSocket):
     await ws.accept()
-    print("[twilio] websocket accepted")
+    log.info("websocket accepted")
 
     agent = HotelAgent()
     stream_sid: str | None = None
+    media: MediaEncoder | None = None
     bg_tasks: set[asyncio.Task] = set()
     interruption_mgr = InterruptionManager()
+    speculator = (
+        Speculator(agent, can_speculate=lambda: not interruption_mgr.is_agent_speaking)
+        if SPECULATIVE_LLM else None
+    )
 
     greeted = False
     call_ended = False
     pending_marks = {}  
-    
-    tts_conn = TTSConnection()
-    tts_ready = await tts_conn.start()
-    if not tts_ready:
-        print("[twilio] Failed to establish TTS connection")
-        await ws.close()
-        return
+    active_pipelines: set[ResponsePipeline] = set()
+    # Keeps the STT receiver free to deliver SpeechStarted while a turn is playing
+    turns = TurnManager(lambda text: run_turn(text))
+    call_trace = tracing.CallTrace()
+    # Paces media at real time so Twilio only ever holds the look-ahead window
+    playout = PlayoutScheduler(ws.send_text)
+    # Detects barge-in on inbound frames without waiting for Deepgram's SpeechStarted round trip
+    vad = VoiceActivityDetector() if LOCAL_VAD else None
+    vad_hold: asyncio.Task | None = None
     
     async def on_speech_started():
         """Called when user starts speaking - interrupt agent"""
-        nonlocal audio_buffer
-        print(f"[twilio] SpeechStarted detected, is_agent_speaking={interruption_mgr.is_agent_speaking}")
+        # Runs on the STT receiver task, which may predate this call (pooled sessions)
+        log_token = bind_context(stream_sid=stream_sid)
+        try:
+            log.debug("SpeechStarted", is_agent_speaking=interruption_mgr.is_agent_speaking)
+            if vad and vad.confirm():
+                log.debug("local barge-in confirmed by Deepgram")
+            await barge_in("deepgram")
+        finally:
+            reset_context(log_token)
+
+    async def barge_in(source: str):
         if interruption_mgr.is_agent_speaking:
-            print("[twilio] 🔴 User interrupted agent!")
-            interruption_mgr.interrupt()
-            
-            pending_marks.clear()
-            
-            # Clear audio buffer 
-            audio_buffer.clear()
-            print("[twilio] Cleared audio buffer")
-            
-            await tts_conn.handle_interruption()
-            if stream_sid:
-                try:
-                    await ws.send_text(json.dumps({
-                        "event": "clear",
-                        "streamSid": stream_sid
-                    }))
-                    print("[twilio] Sent clear to Twilio")
-                except Exception as e:
-                    print(f"[twilio] Failed to send clear: {e}")
-    
-    async def on_final(text: str):
-        nonlocal call_ended
+            log.info("caller interrupted agent", source=source)
+            await cut_playback()
+        playout.resume()
+
+    def hold_playback():
+        """Local VAD heard the caller over the agent: pause sending until Deepgram agrees"""
+        nonlocal vad_hold
+        vad.barged_in()
+        playout.pause()
+        if vad_hold:
+            vad_hold.cancel()
+        vad_hold = asyncio.create_task(release_hold(), name="vad-hold")
+        bg_tasks.add(vad_hold)
+
+    async def release_hold():
+        await asyncio.sleep(vad.confirm_seconds)
+        if vad.reject():
+            log.info("local barge-in not confirmed; resuming playback")
+        playout.resume()
+
+    async def cut_playback():
+        """Stop every reply in flight: pipelines, queued audio here, at Deepgram and at Twilio"""
+        positions = playout.interrupt()
+        interruption_mgr.interrupt(positions)
+        for seq_id in positions:
+            cut = interruption_mgr.cut_reply(seq_id)
+            if cut and agent.trim_reply(*cut):
+                log.debug("trimmed reply to what was heard", sequence_id=seq_id, heard=cut[1])
+        for pipeline in list(active_pipelines):
+            pipeline.cancel()
+        for seq_id in list(call_trace.turns):
+            call_trace.finish(seq_id, "interrupted")
+        
+        pending_marks.clear()
+        
+        # Clear audio buffer 
+        audio_buffer.clear()
+        log.debug("cleared audio buffer")
+        
+        await tts_conn.handle_interruption()
+        if stream_sid:
+            try:
+                await ws.send_text(media.clear())
+                log.debug("sent clear to Twilio")
+            except Exception as e:
+                log.warning("failed to send clear", error=str(e))
+
+    def on_final(text: str):
+        """Called on the STT receiver for each final transcript; the turn runs on its own task"""
         if call_ended:
             return
-        
+        if vad and vad.confirm():
+            # A transcript also confirms a local barge-in; cut before the new turn starts
+            bg_tasks.add(asyncio.create_task(barge_in("local-vad")))
+        turns.submit(text)
+
+    async def run_turn(text: str):
+        nonlocal call_ended
         # Start new response sequence
         sequence_id = interruption_mgr.start_response()
+        # Agent and TTS code running for this response stamp its stages via the context
+        trace_token = tracing.current_turn.set(call_trace.bind(sequence_id))
+        log_token = bind_context(stream_sid=stream_sid, sequence_id=sequence_id)
             
-        print(f"[twilio] transcript: {text} (sequence_id={sequence_id})")
+        log.info("transcript", text=text)
+        llm_stream = None
         try:
-            async for llm_chunk in agent.handle_stream(
-                text, 
-                sequence_id=sequence_id, 
-                is_valid_fn=interruption_mgr.is_valid
-            ):
-                # Check if interrupted
-                if not interruption_mgr.is_valid(sequence_id):
-                    print(f"[twilio] Sequence {sequence_id} stopped by interruption")
-                    break
-                    
-                if call_ended:
-                    break
-                
-                print(f"[twilio] LLM chunk: {llm_chunk}")
-                
-                async for audio_chunk in speak_stream(tts_conn, llm_chunk):
-                    if not interruption_mgr.is_valid(sequence_id):
-                        print(f"[twilio] Audio interrupted for sequence {sequence_id}")
-                        break
-                        
-                    if call_ended:
-                        break
-                    await stream_audio_to_twilio(audio_chunk, sequence_id)
-                
+            llm_stream = speculator.claim(text, sequence_id, interruption_mgr.is_valid) if speculator else None
+            if llm_stream is None:
+                llm_stream = agent.handle_stream(
+                    text, 
+                    sequence_id=sequence_id, 
+                    is_valid_fn=interruption_mgr.is_valid
+                )
+
+            sentences: list[str] = []  # synthesized, waiting for their last audio to go out
+
+            def synthesize(sentence: str):
+                sentences.append(sentence)
+                return speak_stream(tts_conn, sentence)
+
+            async def flush_tail():
                 if audio_buffer and stream_sid and interruption_mgr.is_valid(sequence_id):
-                    payload = base64.b64encode(bytes(audio_buffer)).decode()
+                    tail = audio_buffer.flush()
                     try:
-                        await ws.send_text(json.dumps({
-                            "event": "media",
-                            "streamSid": stream_sid,
-                            "media": {"payload": payload}
-                        }))
+                        await playout.send(
+                            media.media(tail), len(tail) / BYTES_PER_SECOND, sequence_id,
+                            lambda: interruption_mgr.is_valid(sequence_id),
+                        )
                     except Exception:
                         pass
-                    audio_buffer.clear()
+                if sentences:
+                    interruption_mgr.sentence_sent(sequence_id, sentences.pop(0), playout.sent.get(sequence_id, 0.0))
+
+            pipeline = ResponsePipeline(
+                llm_stream,
+                synthesize=synthesize,
+                send_audio=lambda audio: stream_audio_to_twilio(audio, sequence_id),
+                on_sentence_end=flush_tail,
+                is_valid=lambda: interruption_mgr.is_valid(sequence_id) and not call_ended,
+            )
+            active_pipelines.add(pipeline)
+            try:
+                await pipeline.run()
+            finally:
+                active_pipelines.discard(pipeline)
+
+            if agent.completed and interruption_mgr.is_valid(sequence_id):
+                call_ended = True
+                log.info("conversation complete; closing call")
+                await asyncio.sleep(0.5)
                 
-                if agent.completed:
-                    call_ended = True
-                    print("[twilio] conversation complete; closing call")
-                    await asyncio.sleep(0.5)
-                    
-                    try:
-                        await ws.send_text(json.dumps({"event": "stop", "streamSid": stream_sid}))
-                    except Exception as e:
-                        print(f"[twilio] stop event failed: {e}")
-                    
-                    await close_stt()
-                    if ws.client_state == WebSocketState.CONNECTED:
-                        await ws.close()
-                    break
+                try:
+                    await ws.send_text(json.dumps({"event": "stop", "streamSid": stream_sid}))
+                except Exception as e:
+                    log.warning("stop event failed", error=str(e))
+                
+                await close_stt()
+                if ws.client_state == WebSocketState.CONNECTED:
+                    await ws.close()
+                interruption_mgr.finish_response(sequence_id)
+                call_trace.finish(sequence_id, "ended")
+                return
                     
             if stream_sid and interruption_mgr.is_valid(sequence_id):
                 mark_name = f"end-{sequence_id}"
                 pending_marks[mark_name] = sequence_id
                 try:
-                    await ws.send_text(json.dumps({
-                        "event": "mark",
-                        "streamSid": stream_sid,
-                        "mark": {"name": mark_name}
-                    }))
-                    print(f"[twilio] Sent end mark for sequence {sequence_id}")
+                    await ws.send_text(media.mark(mark_name))
+                    log.debug("sent end mark")
                 except Exception:
                     interruption_mgr.finish_response(sequence_id)
+                    call_trace.finish(sequence_id, "failed")
             else:
                 interruption_mgr.finish_response(sequence_id)
-                print(f"[twilio] Response sequence {sequence_id} finished (interrupted or no stream)")
+                call_trace.finish(sequence_id, "interrupted")
+                log.info("response finished (interrupted or no stream)")
                 
+        except asyncio.CancelledError:
+            # Superseded by a newer transcript, or the call is closing. If no barge-in cut
+            # this reply first, clean up the same way, and leave the TTS socket drained so
+            # the next turn's audio is not preceded by the tail of this one
+            call_trace.finish(sequence_id, "cancelled")
+            try:
+                if interruption_mgr.is_valid(sequence_id):
+                    await cut_playback()
+                if tts_conn.stale:
+                    await tts_conn.reset()
+            finally:
+                interruption_mgr.finish_response(sequence_id)
+            raise
         except Exception as e:
-            print(f"[twilio] error in on_final: {e}")
-            import traceback
-            traceback.print_exc()
+            log.error("error in turn", error=str(e), exc_info=True)
             interruption_mgr.finish_response(sequence_id)
+            call_trace.finish(sequence_id, "failed")
+        finally:
+            if llm_stream is not None:
+                await llm_stream.aclose()
+            tracing.current_turn.reset(trace_token)
+            reset_context(log_token)
 
-    send_q, close_stt = await connect_stt(on_final, on_speech_started)
-    print("[twilio] connected to Deepgram STT")
+    # STT and TTS handshakes (or pool leases) run concurrently on the call-setup path
+    tts_conn, stt = await asyncio.gather(
+        tts_pool.acquire(),
+        stt_pool.connect(
+            on_final, on_speech_started, speculator.on_interim if speculator else None, trace=call_trace
+        ),
+        return_exceptions=True,
+    )
+    if isinstance(tts_conn, BaseException):
+        tts_conn = None
+    if isinstance(stt, BaseException):
+        log.error("failed to connect Deepgram STT", error=str(stt))
+        if tts_conn:
+            await tts_pool.release(tts_conn)
+        await ws.close()
+        return
+    send_q, close_stt = stt
+    log.info("connected to Deepgram STT")
+    if tts_conn is None:
+        log.error("failed to establish TTS connection")
+        await close_stt()
+        await ws.close()
+        return
 
-    audio_buffer = bytearray()
+    audio_buffer = AudioFrameBuffer()
     
     def buffer_and_yield_frames(audio: bytes):
         """Buffer audio and yield aligned 160-byte frames for Twilio."""
-        nonlocal audio_buffer
-        audio_buffer.extend(audio)
-        
-        frames = []
-        while len(audio_buffer) >= 160:
-            frames.append(bytes(audio_buffer[:160]))
-            audio_buffer = audio_buffer[160:]
-        
-        return frames
+        audio_buffer.write(audio)
+        return audio_buffer.frames()
     
     async def stream_audio_to_twilio(audio: bytes, sequence_id: int):
-        nonlocal stream_sid
         if not stream_sid:
             return
         
-        for frame in buffer_and_yield_frames(audio):
-            if not interruption_mgr.is_valid(sequence_id):
-                print(f"[twilio] Stopping frame send - sequence {sequence_id} invalidated")
-                break
-                
-            payload = base64.b64encode(frame).decode()
+        is_valid = lambda: interruption_mgr.is_valid(sequence_id)
+        for message, seconds in media.messages(buffer_and_yield_frames(audio)):
             try:
-                await ws.send_text(
-                    json.dumps(
-                        {
-                            "event": "media",
-                            "streamSid": stream_sid,
-                            "media": {"payload": payload},
-                        }
-                    )
-                )
+                # Waits while more than the look-ahead window is already queued at Twilio
+                if not await playout.send(message, seconds, sequence_id, is_valid):
+                    log.debug("stopping frame send; sequence invalidated", sequence_id=sequence_id)
+                    break
+                tracing.mark(tracing.FIRST_MEDIA)
             except Exception as e:
-                print(f"[twilio] send media failed: {e}")
+                log.warning("send media failed", error=str(e), per_second=1)
                 break
 
+    async def send_greeting():
+        greeting = (
+            "Hi, I am Alisha, your hotel enquiry agent. "
+            "I can help with availability, rates, and reservations. "
+            "How may I assist you today?"
+        )
+        greeting_seq = interruption_mgr.start_response()
+        try:
+            async for audio_chunk in speak_stream(tts_conn, greeting, persist=True):
+                if not interruption_mgr.is_valid(greeting_seq):
+                    break
+                await stream_audio_to_twilio(audio_chunk, greeting_seq)
+            if not interruption_mgr.is_valid(greeting_seq):
+                return
+
+            # Send mark to know when audio finishes playing
+            mark_name = f"end-{greeting_seq}"
+            pending_marks[mark_name] = greeting_seq
+            await ws.send_text(media.mark(mark_name))
+            log.info("sent startup greeting and mark")
+        except Exception as e:
+            log.error("greeting TTS failed", error=str(e))
+            interruption_mgr.finish_response(greeting_seq)
+
     try:
         while True:
             try:
                 raw = await ws.receive_text()
             except WebSocketDisconnect:
-                print("[twilio] websocket disconnect")
+                log.info("websocket disconnect")
                 break
 
             try:
-                msg = json.loads(raw)
+                msg = loads(raw)
             except json.JSONDecodeError:
-                print(f"[twilio] non-json frame: {raw[:50]}")
+                log.warning("non-json frame", frame=raw[:50], per_second=1)
                 continue
 
             evt = msg.get("event")
             if evt == "start":
                 stream_sid = msg.get("start", {}).get("streamSid")
-                print(f"[twilio] start streamSid={stream_sid}")
-                await send_q.put(bytes([0xFF]) * 160)
+                call_trace.call_id = stream_sid
+                media = MediaEncoder(stream_sid)
+                bind_context(stream_sid=stream_sid)
+                log.info("start")
                 if not greeted:
                     greeted = True
-                    greeting = (
-                        "Hi, I am Alisha, your hotel enquiry agent. "
-                        "I can help with availability, rates, and reservations. "
-                        "How may I assist you today?"
-                    )
-                    greeting_seq = interruption_mgr.start_response()
-                    try:
-                        async for audio_chunk in speak_stream(tts_conn, greeting):
-                            if not interruption_mgr.is_valid(greeting_seq):
-                                break
-                            await stream_audio_to_twilio(audio_chunk, greeting_seq)
-                        
-                        # Send mark to know when audio finishes playing
-                        mark_name = f"end-{greeting_seq}"
-                        pending_marks[mark_name] = greeting_seq
-                        await ws.send_text(json.dumps({
-                            "event": "mark",
-                            "streamSid": stream_sid,
-                            "mark": {"name": mark_name}
-                        }))
-                        print(f"[twilio] sent startup greeting + mark (streamed)")
-                    except Exception as e:
-                        print(f"[twilio] greeting TTS failed: {e}")
-                        interruption_mgr.finish_response(greeting_seq)
+                    # Paced playout takes as long as the greeting itself; keep reading inbound audio meanwhile
+                    bg_tasks.add(asyncio.create_task(send_greeting(), name="greeting"))
             elif evt == "media":
                 m = msg.get("media", {})
                 track = m.get("track", "inbound")
@@ -236,6 +330,10 @@ async def twilio_ws(ws: WebSocket):
                     continue
                 audio = base64.b64decode(payload)
                 await send_q.put(audio)
+                if vad and vad.process(audio) == "start":
+                    call_trace.speech_started()
+                    if interruption_mgr.is_agent_speaking:
+                        hold_playback()
                 if ECHO_BACK:
                     bg_tasks.add(asyncio.create_task(stream_audio_to_twilio(audio)))
 
@@ -244,16 +342,28 @@ async def twilio_ws(ws: WebSocket):
                 if mark_name in pending_marks:
                     seq_id = pending_marks.pop(mark_name)
                     interruption_mgr.finish_response(seq_id)
-                    print(f"[twilio] Mark received - audio playback complete for sequence {seq_id}")
+                    playout.finish(seq_id)
+                    call_trace.finish(seq_id)
+                    log.debug("mark received; playback complete", sequence_id=seq_id)
 
             elif evt == "stop":
-                print("[twilio] stop event")
+                log.info("stop event")
                 break
 
     finally:
-        print("[twilio] closing STT, TTS and websocket")
+        log.info("closing STT, TTS and websocket")
+        call_trace.close()
+        if speculator:
+            speculator.cancel()
+            log.info("speculation stats", stats=speculator.stats())
+        if media:
+            log.info("media stats", stats={**media.stats(), **playout.stats()})
+        if vad:
+            log.info("vad stats", stats=vad.stats())
+        log.info("turn stats", stats=turns.stats())
+        await turns.close()
         await close_stt()
-        await tts_conn.cleanup()
+        await tts_pool.release(tts_conn)
         for t in bg_tasks:
             t.cancel()
         await asyncio.gather(*bg_tasks, return_exceptions=True)
@@ -261,4 +371,4 @@ async def twilio_ws(ws: WebSocket):
             try:
                 await ws.close()
             except Exception as e:
-                print(f"[twilio] ws.close suppressed error: {e}")
+                log.debug("ws.close suppressed error", error=str(e))
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark: legacy bytearray reslicing vs AudioFrameBuffer for outbound Twilio frames.
+
+Reports bytes copied and allocations per second of speech (8000 bytes of mu-law) and wall time.
+Run from the repo root: python -m benchmarks.bench_audio_buffer
+"""
+import time
+
+from app.audio_buffer import AudioFrameBuffer, FRAME_SIZE
+
+SECONDS = 60
+BYTES_PER_SECOND = 8000
+CHUNK_SIZES = [480, 3200, 16000]
+
+
+class Legacy:
+    """The old buffer_and_yield_frames, instrumented"""
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.copied = 0
+        self.allocs = 0
+
+    def push(self, audio: bytes):
+        self.buf.extend(audio)
+        self.copied += len(audio)
+        frames = []
+        while len(self.buf) >= FRAME_SIZE:
+            frames.append(bytes(self.buf[:FRAME_SIZE]))  # slice + bytes()
+            self.copied += 2 * FRAME_SIZE
+            self.allocs += 2
+            self.buf = self.buf[FRAME_SIZE:]  # new bytearray with the remainder
+            self.copied += len(self.buf)
+            self.allocs += 1
+        self.allocs += 1  # frames list
+        return frames
+
+
+class Ring:
+    """AudioFrameBuffer, with the same accounting"""
+
+    def __init__(self):
+        self.buf = AudioFrameBuffer()
+        self.copied = 0
+        self.allocs = 0
+
+    def push(self, audio: bytes):
+        cap = self.buf.capacity
+        self.buf.write(audio)
+        self.copied += len(audio)
+        if self.buf.capacity != cap:
+            self.allocs += 1
+        self.allocs += 1  # generator
+        for frame in self.buf.frames():
+            self.allocs += 1  # memoryview slice, no data copied
+            yield frame
+
+
+def run(impl, chunk_size: int):
+    chunk = bytes(range(256)) * (chunk_size // 256 + 1)
+    chunk = chunk[:chunk_size]
+    total = SECONDS * BYTES_PER_SECOND
+    start = time.perf_counter()
+    sent = 0
+    while sent < total:
+        for _ in impl.push(chunk):
+            pass
+        sent += chunk_size
+    elapsed = time.perf_counter() - start
+    secs = sent / BYTES_PER_SECOND
+    return impl.copied / secs, impl.allocs / secs, elapsed / secs * 1e6
+
+
+def main():
+    print(f"{'chunk':>6} {'impl':>7} {'copied B/s':>12} {'allocs/s':>9} {'us/s speech':>12}")
+    for size in CHUNK_SIZES:
+        for name, impl in (("legacy", Legacy()), ("ring", Ring())):
+            copied, allocs, us = run(impl, size)
+            print(f"{size:>6} {name:>7} {copied:>12,.0f} {allocs:>9,.0f} {us:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
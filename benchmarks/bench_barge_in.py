@@ -0,0 +1,195 @@
+"""
+Barge-in reaction time while a long reply is playing, against the real app with faked providers.
+
+Starts benchmarks.fakes and the app (as bench_concurrent_calls does), then each fake call asks
+a question, lets the agent's reply play for a moment and talks over it. Measured from the
+caller's first voiced frame to:
+  - clear: the Twilio "clear" event (the app has cut the reply)
+  - silence: the last agent media frame received after that point
+Run once with the local VAD and once with Deepgram's SpeechStarted as the only trigger.
+Run from the repo root: python -m benchmarks.bench_barge_in
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import websockets
+
+from benchmarks.bench_concurrent_calls import free_port, percentile, wait_healthy
+from benchmarks.fakes import FRAME_BYTES
+
+FRAME_SECONDS = 0.02
+QUESTION_FRAMES = 60   # 1.2 s of speech
+BARGE_IN_FRAMES = 40   # 0.8 s of speech over the reply
+TIMEOUT = 20.0
+
+
+class BargeInCall:
+    def __init__(self, url: str, index: int, barge_ins: int):
+        self.url = url
+        self.index = index
+        self.stream_sid = f"MZB{index:05d}"
+        self.barge_ins = barge_ins
+        self.speech_frames = 0
+        self.voiced_at: float | None = None
+        self.first_media = asyncio.Event()
+        self.greeted = asyncio.Event()
+        self.cleared = asyncio.Event()
+        self.cleared_at: float | None = None
+        self.last_media_at = 0.0
+        self.clear_ms: list[float] = []
+        self.silence_ms: list[float] = []
+        self.missed = 0
+        self.ended = False
+
+    async def pump(self, ws):
+        rng = random.Random(self.index)
+        silence = base64.b64encode(bytes([0xFF]) * FRAME_BYTES).decode()
+        voiced = [
+            base64.b64encode(bytes(rng.randrange(0x10, 0x70) for _ in range(FRAME_BYTES))).decode()
+            for _ in range(50)
+        ]
+        start = time.perf_counter()
+        n = 0
+        while not self.ended:
+            if self.speech_frames > 0:
+                if self.voiced_at is None:
+                    self.voiced_at = time.perf_counter()
+                payload = voiced[n % len(voiced)]
+                self.speech_frames -= 1
+            else:
+                payload = silence
+            await ws.send(json.dumps({
+                "event": "media", "streamSid": self.stream_sid,
+                "media": {"track": "inbound", "chunk": str(n), "timestamp": str(n * 20), "payload": payload},
+            }))
+            n += 1
+            await asyncio.sleep(max(0.0, start + n * FRAME_SECONDS - time.perf_counter()))
+
+    async def listen(self, ws):
+        async for raw in ws:
+            msg = json.loads(raw)
+            event = msg.get("event")
+            if event == "media":
+                self.last_media_at = time.perf_counter()
+                self.first_media.set()
+            elif event == "clear":
+                self.cleared_at = time.perf_counter()
+                self.cleared.set()
+            elif event == "mark":
+                await ws.send(json.dumps({"event": "mark", "streamSid": self.stream_sid, "mark": msg.get("mark", {})}))
+                self.greeted.set()
+
+    async def speak(self, frames: int):
+        self.voiced_at = None
+        self.speech_frames = frames
+
+    async def run(self):
+        async with websockets.connect(self.url, max_size=None, ping_interval=None) as ws:
+            await ws.send(json.dumps({"event": "start", "streamSid": self.stream_sid, "start": {"streamSid": self.stream_sid}}))
+            listener = asyncio.create_task(self.listen(ws))
+            pump = asyncio.create_task(self.pump(ws))
+            try:
+                await asyncio.wait_for(self.greeted.wait(), TIMEOUT)
+                await self.speak(QUESTION_FRAMES)
+                for _ in range(self.barge_ins):
+                    # Wait for the reply to start, let it play a little, then talk over it
+                    await asyncio.sleep(QUESTION_FRAMES * FRAME_SECONDS)
+                    self.first_media.clear()
+                    await asyncio.wait_for(self.first_media.wait(), TIMEOUT)
+                    await asyncio.sleep(random.uniform(1.0, 2.0))
+                    self.cleared.clear()
+                    await self.speak(BARGE_IN_FRAMES)
+                    try:
+                        await asyncio.wait_for(self.cleared.wait(), TIMEOUT)
+                    except asyncio.TimeoutError:
+                        self.missed += 1
+                        continue
+                    await asyncio.sleep(0.5)  # catch media still in flight after the clear
+                    self.clear_ms.append((self.cleared_at - self.voiced_at) * 1000)
+                    self.silence_ms.append(max(0.0, self.last_media_at - self.voiced_at) * 1000)
+            finally:
+                self.ended = True
+                for task in (pump, listener):
+                    task.cancel()
+                await asyncio.gather(pump, listener, return_exceptions=True)
+
+
+async def drive(port: int, calls: int, barge_ins: int):
+    group = [BargeInCall(f"ws://127.0.0.1:{port}/ws/twilio", i, barge_ins) for i in range(calls)]
+    results = await asyncio.gather(*(c.run() for c in group), return_exceptions=True)
+    return group, sum(isinstance(r, BaseException) for r in results)
+
+
+def measure(local_vad: bool, calls: int, barge_ins: int, app_log: str):
+    ws_port, llm_port, app_port = free_port(), free_port(), free_port()
+    tmp = tempfile.mkdtemp(prefix="bargebench-")
+    env = dict(
+        os.environ,
+        DEEPGRAM_WS_BASE=f"ws://127.0.0.1:{ws_port}",
+        DEEPGRAM_API_KEY="fake",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{llm_port}/v1",
+        OPENAI_API_KEY="fake",
+        BOOKING_DB_PATH=os.path.join(tmp, "bookings.db"),
+        RESPONSE_CACHE_SIZE="0", TTS_CACHE_MEMORY_BYTES="0", TTS_CACHE_DIR="",
+        LOCAL_VAD="true" if local_vad else "false",
+        PYTHONUNBUFFERED="1",
+    )
+    fakes = subprocess.Popen(
+        [sys.executable, "-c",
+         "import asyncio; from benchmarks.fakes import serve_fakes, Latency; "
+         f"asyncio.run(serve_fakes({ws_port}, {llm_port}, Latency()))"],
+        stdout=subprocess.DEVNULL,
+    )
+    log = open(app_log, "a")
+    app = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_concurrent_calls", "--serve", str(app_port),
+         "--lag-out", os.path.join(tmp, "lag.json")],
+        env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    try:
+        asyncio.run(wait_healthy(app_port, app))
+        return asyncio.run(drive(app_port, calls, barge_ins))
+    finally:
+        app.send_signal(signal.SIGINT)
+        try:
+            app.wait(15)
+        except subprocess.TimeoutExpired:
+            app.kill()
+        fakes.terminate()
+        fakes.wait()
+        log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=4)
+    parser.add_argument("--barge-ins", type=int, default=3, help="per call")
+    parser.add_argument("--app-log", default=os.devnull)
+    args = parser.parse_args()
+    print(f"{args.calls} calls x {args.barge_ins} barge-ins into a playing reply")
+    for name, local_vad in (("local VAD", True), ("Deepgram only", False)):
+        group, errors = measure(local_vad, args.calls, args.barge_ins, args.app_log)
+        clear = [v / 1000 for c in group for v in c.clear_ms]
+        silence = [v / 1000 for c in group for v in c.silence_ms]
+        missed = sum(c.missed for c in group) + errors
+        if not clear:
+            print(f"  {name:<14} no barge-in was acted on ({missed} missed)")
+            continue
+        print(
+            f"  {name:<14} clear p50 {percentile(clear, 50) * 1e3:6.0f} ms  max {max(clear) * 1e3:6.0f} ms   "
+            f"agent audio stops p50 {percentile(silence, 50) * 1e3:6.0f} ms  max {max(silence) * 1e3:6.0f} ms   "
+            f"missed {missed}"
+        )
+
+
+if __name__ == "__main__":
+    main()
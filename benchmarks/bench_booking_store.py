@@ -0,0 +1,65 @@
+"""
+Benchmark: BookingStore group commit vs one transaction per booking.
+
+Fires CONCURRENT coroutines that each insert BOOKINGS_PER_TASK rows into a fresh SQLite
+file in a temp directory, once with batch_size=1 (every booking is its own commit) and
+once with the default group commit, and reports bookings/s and average batch size.
+Run from the repo root: python -m benchmarks.bench_booking_store
+"""
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from app.data.booking_store import BookingStore, BATCH_SIZE
+
+CONCURRENT = 200
+BOOKINGS_PER_TASK = 20
+
+
+def record(i):
+    return {
+        "booking_id": f"RP-{uuid.uuid4().hex[:10].upper()}",
+        "name": f"Guest {i}",
+        "room_id": "deluxe",
+        "check_in": "2026-11-01",
+        "nights": 2,
+        "hold_id": uuid.uuid4().hex,
+        "status": "held",
+        "created_at": datetime.utcnow().isoformat(),
+        "expires_at": None,
+    }
+
+
+async def run(path, batch_size):
+    store = BookingStore(path=path, batch_size=batch_size)
+    await store.start()
+
+    async def worker(t):
+        for i in range(BOOKINGS_PER_TASK):
+            await store.insert(record(t * BOOKINGS_PER_TASK + i))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(t) for t in range(CONCURRENT)))
+    elapsed = time.perf_counter() - start
+    stats = store.stats()
+    await store.close()
+    return elapsed, stats
+
+
+async def main():
+    total = CONCURRENT * BOOKINGS_PER_TASK
+    print(f"{total} bookings from {CONCURRENT} concurrent callers")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, batch_size in (("per-row commit", 1), (f"group commit ({BATCH_SIZE})", BATCH_SIZE)):
+            elapsed, stats = await run(os.path.join(tmp, f"bench-{batch_size}.db"), batch_size)
+            print(
+                f"  {label:22s}: {total / elapsed:9.0f} bookings/s, "
+                f"{stats['batches']} commits, avg batch {stats['avg_batch']:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,312 @@
+"""
+Load test: N simultaneous phone calls against one app process, with every provider faked.
+
+Starts benchmarks.fakes (Deepgram listen/speak + OpenAI-compatible LLM) and the app under
+uvicorn in separate processes, then opens N fake Twilio media streams to /ws/twilio. Each
+call streams 20 ms mu-law frames in real time, speaks the fakes.SCRIPT turns, and acks
+marks like a phone would. Reported:
+  - turn latency: end of caller speech -> first agent audio frame (p50/p95/p99)
+  - app event-loop lag, sampled inside the app process (p50/p99/max)
+  - app CPU and RSS, total and per call (read from /proc, so Linux only)
+Response and TTS phrase caches are off unless --warm-caches, so every turn does real work.
+The driver and the fakes are real processes too; give them their own cores (or compare
+against app cpu) before reading high latencies as app limits.
+Run from the repo root: python -m benchmarks.bench_concurrent_calls --calls 20
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import websockets
+
+from benchmarks.fakes import FRAME_BYTES, SCRIPT
+
+FRAME_SECONDS = 0.02
+SPEECH_SECONDS_PER_WORD = 0.3
+TURN_TIMEOUT = 60.0  # includes playback: media is paced at real time, so the mark acks after the reply plays
+LAG_INTERVAL = 0.05
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def proc_usage(pid: int) -> tuple[float, int]:
+    """(CPU seconds, RSS bytes) of a process, from /proc"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    with open(f"/proc/{pid}/status") as f:
+        rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+    return cpu, rss
+
+
+class Call:
+    """One fake Twilio media stream"""
+
+    def __init__(self, url: str, index: int):
+        self.url = url
+        self.index = index
+        self.stream_sid = f"MZ{index:06d}"
+        self.speech_frames = 0
+        self.spoke_at = None
+        self.first_audio = asyncio.Event()
+        self.turn_done = asyncio.Event()
+        self.latencies: list[float] = []
+        self.failed = 0
+        self.ended = False
+
+    async def pump(self, ws):
+        """Send a frame every 20 ms on an absolute schedule, voiced while speech_frames > 0"""
+        rng = random.Random(self.index)
+        silence = base64.b64encode(bytes([0xFF]) * FRAME_BYTES).decode()
+        # Precomputed so the client's own CPU doesn't skew what it measures
+        voiced = [
+            base64.b64encode(bytes(rng.randrange(0x10, 0x70) for _ in range(FRAME_BYTES))).decode()
+            for _ in range(50)
+        ]
+        start = time.perf_counter()
+        n = 0
+        while not self.ended:
+            if self.speech_frames > 0:
+                payload = voiced[n % len(voiced)]
+                self.speech_frames -= 1
+                if self.speech_frames == 0:
+                    self.spoke_at = time.perf_counter()
+            else:
+                payload = silence
+            await ws.send(json.dumps({
+                "event": "media",
+                "streamSid": self.stream_sid,
+                "media": {"track": "inbound", "chunk": str(n), "timestamp": str(n * 20), "payload": payload},
+            }))
+            n += 1
+            await asyncio.sleep(max(0.0, start + n * FRAME_SECONDS - time.perf_counter()))
+
+    async def listen(self, ws):
+        async for raw in ws:
+            msg = json.loads(raw)
+            event = msg.get("event")
+            if event == "media":
+                if self.spoke_at is not None and not self.first_audio.is_set():
+                    self.latencies.append(time.perf_counter() - self.spoke_at)
+                    self.first_audio.set()
+            elif event == "mark":
+                # A phone acks once the audio before the mark has played; ack immediately
+                await ws.send(json.dumps({"event": "mark", "streamSid": self.stream_sid, "mark": msg.get("mark", {})}))
+                self.turn_done.set()
+            elif event == "stop":
+                self.ended = True
+                self.turn_done.set()
+                return
+
+    async def run(self):
+        async with websockets.connect(self.url, max_size=None, ping_interval=None) as ws:
+            await ws.send(json.dumps({"event": "connected", "protocol": "Call", "version": "1.0.0"}))
+            await ws.send(json.dumps({"event": "start", "streamSid": self.stream_sid, "start": {"streamSid": self.stream_sid}}))
+            listener = asyncio.create_task(self.listen(ws))
+            pump = asyncio.create_task(self.pump(ws))
+            try:
+                # Greeting
+                await asyncio.wait_for(self.turn_done.wait(), TURN_TIMEOUT)
+                for text in SCRIPT:
+                    if self.ended:
+                        break
+                    self.turn_done.clear()
+                    self.first_audio.clear()
+                    self.spoke_at = None
+                    self.speech_frames = max(10, int(len(text.split()) * SPEECH_SECONDS_PER_WORD / FRAME_SECONDS))
+                    try:
+                        await asyncio.wait_for(self.turn_done.wait(), TURN_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        self.failed += 1
+                        break
+            except asyncio.TimeoutError:
+                self.failed += 1
+            finally:
+                self.ended = True
+                for task in (pump, listener):
+                    task.cancel()
+                await asyncio.gather(pump, listener, return_exceptions=True)
+
+
+async def sample_usage(pid: int, samples: list, stop: asyncio.Event):
+    while not stop.is_set():
+        samples.append(proc_usage(pid))
+        try:
+            await asyncio.wait_for(stop.wait(), 0.25)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def drive(port: int, calls: int, ramp: float, pid: int):
+    url = f"ws://127.0.0.1:{port}/ws/twilio"
+    cpu0, rss0 = proc_usage(pid)
+    samples: list[tuple[float, int]] = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_usage(pid, samples, stop))
+    group = [Call(url, i) for i in range(calls)]
+
+    async def staggered(call):
+        await asyncio.sleep(random.uniform(0, ramp))
+        await call.run()
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(staggered(c) for c in group), return_exceptions=True)
+    wall = time.perf_counter() - start
+    stop.set()
+    await sampler
+    cpu1, _ = proc_usage(pid)
+    peak_rss = max([rss for _, rss in samples] or [rss0])
+    errors = sum(isinstance(r, BaseException) for r in results)
+    return group, wall, cpu1 - cpu0, rss0, peak_rss, errors
+
+
+def serve(port: int, lag_out: str):
+    """App process: uvicorn with an event-loop lag sampler wrapped around the app lifespan"""
+    import uvicorn
+    from contextlib import asynccontextmanager
+    from app.main import app
+
+    inner = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(a):
+        lags = []
+
+        async def sample():
+            loop = asyncio.get_running_loop()
+            while True:
+                t = loop.time()
+                await asyncio.sleep(LAG_INTERVAL)
+                lags.append(loop.time() - t - LAG_INTERVAL)
+
+        task = asyncio.create_task(sample())
+        async with inner(a):
+            yield
+        task.cancel()
+        with open(lag_out, "w") as f:
+            json.dump(lags, f)
+
+    app.router.lifespan_context = lifespan
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", ws_max_size=2**24)
+
+
+async def wait_healthy(port: int, proc: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError("app process exited during startup")
+            try:
+                if (await client.get(f"http://127.0.0.1:{port}/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("app did not become healthy")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which calls start")
+    parser.add_argument("--stt-ms", type=float, default=150)
+    parser.add_argument("--tts-ms", type=float, default=120)
+    parser.add_argument("--llm-ttft-ms", type=float, default=250)
+    parser.add_argument("--llm-tokens-per-s", type=float, default=200)
+    parser.add_argument("--warm-caches", action="store_true")
+    parser.add_argument("--app-log", default=os.devnull, help="where the app's stdout goes")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--lag-out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve, args.lag_out)
+        return
+
+    ws_port, app_port = free_port(), free_port()
+    llm_port = free_port()
+    tmp = tempfile.mkdtemp(prefix="callbench-")
+    lag_out = os.path.join(tmp, "lag.json")
+    env = dict(
+        os.environ,
+        DEEPGRAM_WS_BASE=f"ws://127.0.0.1:{ws_port}",
+        DEEPGRAM_API_KEY="fake",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{llm_port}/v1",
+        OPENAI_API_KEY="fake",
+        BOOKING_DB_PATH=os.path.join(tmp, "bookings.db"),
+        TTS_CACHE_DIR=os.path.join(tmp, "tts"),
+        PYTHONUNBUFFERED="1",
+    )
+    if not args.warm_caches:
+        env.update(RESPONSE_CACHE_SIZE="0", TTS_CACHE_MEMORY_BYTES="0", TTS_CACHE_DIR="")
+
+    fakes = subprocess.Popen(
+        [sys.executable, "-c",
+         "import asyncio, sys; from benchmarks.fakes import serve_fakes, Latency; "
+         f"asyncio.run(serve_fakes({ws_port}, {llm_port}, Latency({args.stt_ms}, {args.tts_ms}, {args.llm_ttft_ms}, {args.llm_tokens_per_s})))"],
+        stdout=subprocess.DEVNULL,
+    )
+    log = open(args.app_log, "w")
+    app = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_concurrent_calls", "--serve", str(app_port), "--lag-out", lag_out],
+        env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    try:
+        asyncio.run(wait_healthy(app_port, app))
+        group, wall, cpu, rss0, peak_rss, errors = asyncio.run(drive(app_port, args.calls, args.ramp, app.pid))
+        metrics = httpx.get(f"http://127.0.0.1:{app_port}/metrics").text
+    finally:
+        app.send_signal(signal.SIGINT)
+        try:
+            app.wait(15)
+        except subprocess.TimeoutExpired:
+            app.kill()
+        fakes.terminate()
+        fakes.wait()
+        log.close()
+
+    latencies = [l for c in group for l in c.latencies]
+    failed = sum(c.failed for c in group) + errors
+    lags = []
+    if os.path.exists(lag_out):
+        with open(lag_out) as f:
+            lags = json.load(f)
+    print(f"{args.calls} concurrent calls x {len(SCRIPT)} turns in {wall:.1f}s "
+          f"(stt {args.stt_ms:.0f} ms, tts {args.tts_ms:.0f} ms, llm ttft {args.llm_ttft_ms:.0f} ms)")
+    print(f"  turns       : {len(latencies)} answered, {failed} failed")
+    print(f"  turn latency: p50 {percentile(latencies, 50) * 1e3:6.0f} ms  p95 {percentile(latencies, 95) * 1e3:6.0f} ms  "
+          f"p99 {percentile(latencies, 99) * 1e3:6.0f} ms")
+    if lags:
+        print(f"  loop lag    : p50 {percentile(lags, 50) * 1e3:6.1f} ms  p99 {percentile(lags, 99) * 1e3:6.1f} ms  "
+              f"max {max(lags) * 1e3:6.1f} ms")
+    traced = sum(
+        int(float(line.rsplit(" ", 1)[1])) for line in metrics.splitlines() if line.startswith("voice_turns_total{")
+    )
+    print(f"  /metrics    : {traced} turns traced by the app")
+    print(f"  app cpu     : {cpu / wall:6.1%} of one core, {cpu / args.calls * 1e3:.0f} ms CPU per call")
+    print(f"  app rss     : {rss0 / 2**20:.0f} MiB idle, {peak_rss / 2**20:.0f} MiB peak, "
+          f"{(peak_rss - rss0) / args.calls / 2**10:.0f} KiB per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: InventoryEngine range queries and holds vs a linear per-night scan.
+
+Builds ROOM_TYPES synthetic room types over a 365-day horizon, then times availability
+searches for random stays and concurrent hold() throughput from several threads.
+Run from the repo root: python -m benchmarks.bench_inventory
+"""
+import random
+import threading
+import time
+from datetime import timedelta
+
+from app.data.inventory import InventoryEngine
+
+ROOM_TYPES = 5000
+HORIZON = 365
+QUERIES = 2000
+THREADS = 8
+HOLDS_PER_THREAD = 2000
+
+
+def make_rooms(n):
+    rng = random.Random(7)
+    return [
+        {
+            "id": f"type-{i}",
+            "name": f"Type {i}",
+            "beds": rng.choice([1, 2, 3]),
+            "lounge": rng.random() < 0.4,
+            "price": rng.randrange(3000, 20000, 100),
+            "max_guests": rng.randint(1, 8),
+            "inventory": rng.randint(1, 20),
+        }
+        for i in range(n)
+    ]
+
+
+def linear_search(rooms, nightly, guests, beds, lounge, d0, nights):
+    """What a dict-per-night scan over the catalog would do"""
+    out = []
+    for r in rooms:
+        if r["max_guests"] < guests or (beds and r["beds"] != beds) or (lounge is not None and r["lounge"] != lounge):
+            continue
+        if all(nightly[r["id"]][d] > 0 for d in range(d0, d0 + nights)):
+            out.append(r)
+    return out
+
+
+def main():
+    rooms = make_rooms(ROOM_TYPES)
+    engine = InventoryEngine(rooms, horizon_days=HORIZON)
+    nightly = {r["id"]: [r["inventory"]] * HORIZON for r in rooms}
+    rng = random.Random(1)
+    queries = [
+        (rng.randint(1, 6), rng.choice([None, 1, 2, 3]), rng.choice([None, True, False]), rng.randrange(0, HORIZON - 14), rng.randint(1, 14))
+        for _ in range(QUERIES)
+    ]
+
+    start = time.perf_counter()
+    for guests, beds, lounge, d0, nights in queries:
+        linear_search(rooms, nightly, guests, beds, lounge, d0, nights)
+    linear = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for guests, beds, lounge, d0, nights in queries:
+        engine.search(guests, beds, lounge, check_in=engine.start + timedelta(days=d0), nights=nights)
+    vectorized = time.perf_counter() - start
+
+    print(f"{ROOM_TYPES} room types x {HORIZON} nights, {QUERIES} range queries")
+    print(f"  linear scan : {linear / QUERIES * 1e6:9.1f} us/query")
+    print(f"  engine      : {vectorized / QUERIES * 1e6:9.1f} us/query")
+
+    ids = [r["id"] for r in rooms]
+    granted = [0] * THREADS
+
+    def worker(t):
+        local = random.Random(t)
+        for _ in range(HOLDS_PER_THREAD):
+            d0 = local.randrange(0, HORIZON - 7)
+            if engine.hold(local.choice(ids), check_in=engine.start + timedelta(days=d0), nights=local.randint(1, 7)):
+                granted[t] += 1
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(THREADS)]
+    start = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    elapsed = time.perf_counter() - start
+    total = THREADS * HOLDS_PER_THREAD
+    oversold = int((engine.available < 0).sum())
+    print(f"  holds       : {total / elapsed:9.0f} holds/s across {THREADS} threads, {sum(granted)} granted, oversold nights={oversold}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: event-loop stalls from synchronous print vs the queued logger, behind a slow stdout.
+
+stdout is replaced by a sink that behaves like a pipe to a slow log collector: writes land
+in an 8 KiB buffer and filling it blocks the writer for as long as the collector needs to
+drain it. CALLS simulated calls each log EVENTS_PER_S lines per second while a 20 ms pacer
+(standing in for Twilio media frames) records how late each tick fires.
+Run from the repo root: python -m benchmarks.bench_logging
+"""
+import asyncio
+import sys
+import time
+
+from app import log as applog
+
+CALLS = 50
+EVENTS_PER_S = 10
+DURATION_S = 5.0
+PIPE_BUFFER = 8192
+DRAIN_BYTES_PER_S = 256 * 1024
+FRAME_S = 0.020
+
+
+class SlowPipe:
+    def __init__(self):
+        self.pending = 0
+        self.written = 0
+
+    def write(self, text: str) -> int:
+        self.pending += len(text)
+        if self.pending >= PIPE_BUFFER:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self.pending:
+            time.sleep(self.pending / DRAIN_BYTES_PER_S)
+            self.written += self.pending
+            self.pending = 0
+
+
+def _pct(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def scenario(emit) -> tuple[list[float], list[float]]:
+    lags: list[float] = []
+    costs: list[float] = []
+    stop = time.perf_counter() + DURATION_S
+
+    async def pacer():
+        due = time.perf_counter() + FRAME_S
+        while due < stop:
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            lags.append(max(0.0, time.perf_counter() - due) * 1000)
+            due += FRAME_S
+
+    async def call(i: int):
+        sid = f"MZ{i:06d}"
+        n = 0
+        while time.perf_counter() < stop:
+            n += 1
+            start = time.perf_counter()
+            emit(sid, n)
+            costs.append((time.perf_counter() - start) * 1e6)
+            await asyncio.sleep(1 / EVENTS_PER_S)
+
+    await asyncio.gather(pacer(), *(call(i) for i in range(CALLS)))
+    return lags, costs
+
+
+def via_print(sid: str, n: int):
+    print(f"[stt] recv type=Results stream_sid={sid} seq={n} transcript=\"do you have a room for two\"")
+
+
+stt_log = applog.get_logger("stt")
+
+
+def via_logger(sid: str, n: int):
+    stt_log.info("recv", type="Results", stream_sid=sid, seq=n, transcript="do you have a room for two")
+
+
+def main():
+    real_stdout = sys.stdout
+    results = []
+    for name, emit in (("print", via_print), ("queued logger", via_logger)):
+        sys.stdout = SlowPipe()
+        try:
+            lags, costs = asyncio.run(scenario(emit))
+            applog.writer.flush()
+        finally:
+            sys.stdout = real_stdout
+        results.append((name, lags, costs))
+
+    lines = CALLS * EVENTS_PER_S
+    print(f"{CALLS} calls x {EVENTS_PER_S} lines/s ({lines} lines/s) into a pipe draining "
+          f"{DRAIN_BYTES_PER_S // 1024} KiB/s, {DURATION_S:.0f}s each")
+    for name, lags, costs in results:
+        print(
+            f"  {name:<14} frame lag p50 {_pct(lags, 0.5):5.1f} ms  p99 {_pct(lags, 0.99):5.1f} ms  "
+            f"max {max(lags):5.1f} ms   on-loop cost p50 {_pct(costs, 0.5):6.1f} us  "
+            f"p99 {_pct(costs, 0.99):8.1f} us"
+        )
+    print(f"  logger stats: {applog.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Micro-benchmark: Twilio media message encoding, legacy json.dumps per frame vs MediaEncoder.
+
+Encodes SECONDS of outbound speech (20 ms, 160-byte mu-law frames) and reports messages and
+frames per second on one core, plus websocket sends per second of speech. Also times parsing
+an inbound media message with the configured loads() (orjson when installed) vs json.loads.
+Run from the repo root: python -m benchmarks.bench_media_encoder
+"""
+import base64
+import json
+import time
+
+from app.audio_buffer import FRAME_SIZE
+from app.media_encoder import MediaEncoder, loads, orjson
+
+SECONDS = 600
+STREAM_SID = "MZ18ad3ab5a668481ce02b83e7395059f0"
+
+
+def legacy(frames):
+    for frame in frames:
+        payload = base64.b64encode(frame).decode()
+        yield json.dumps({"event": "media", "streamSid": STREAM_SID, "media": {"payload": payload}})
+
+
+def run(name, encode, frames):
+    start = time.perf_counter()
+    messages = sum(1 for _ in encode(frames))
+    elapsed = time.perf_counter() - start
+    print(
+        f"  {name:<22} {messages / elapsed:>10,.0f} msg/s {len(frames) / elapsed:>10,.0f} frames/s "
+        f"{messages / SECONDS:>6.1f} sends per s of speech"
+    )
+    return messages
+
+
+def main():
+    audio = bytes((i * 37) & 0xFF for i in range(FRAME_SIZE * 50))
+    frames = [memoryview(audio)[i % 50 * FRAME_SIZE:(i % 50 + 1) * FRAME_SIZE] for i in range(SECONDS * 50)]
+
+    reference = next(legacy(frames[:1]))
+    assert json.loads(next(MediaEncoder(STREAM_SID).messages(frames[:1]))[0]) == json.loads(reference)
+
+    print(f"outbound: {len(frames):,} frames ({SECONDS}s of speech), one core")
+    run("legacy json.dumps", legacy, frames)
+    run("template, 20 ms/msg", MediaEncoder(STREAM_SID, batch_ms=20).messages, frames)
+    run("template, 100 ms/msg", MediaEncoder(STREAM_SID, batch_ms=100).messages, frames)
+
+    inbound = json.dumps({
+        "event": "media", "sequenceNumber": "42", "streamSid": STREAM_SID,
+        "media": {"track": "inbound", "chunk": "41", "timestamp": "820", "payload": base64.b64encode(audio[:FRAME_SIZE]).decode()},
+    })
+    n = 200_000
+    print(f"inbound parse ({'orjson' if orjson else 'orjson not installed, loads is json.loads'}):")
+    for name, parse in (("json.loads", json.loads), ("media_encoder.loads", loads)):
+        start = time.perf_counter()
+        for _ in range(n):
+            parse(inbound)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<22} {n / elapsed:>10,.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
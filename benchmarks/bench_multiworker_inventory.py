@@ -0,0 +1,119 @@
+"""
+Load test: several worker processes booking the same rooms through one shared inventory.
+
+Each of WORKERS processes opens its own SQLiteInventory on a common temp file (as uvicorn
+workers would with STATE_BACKEND=sqlite) and races HOLDS_PER_WORKER holds for overlapping
+stays on a small catalog, releasing a share of them again. Afterwards every (room, night)
+counter is checked against the surviving holds; any negative count or mismatch is an
+oversell. The same workload on per-process InventoryEngines shows what the shared store
+prevents.
+Run from the repo root: python -m benchmarks.bench_multiworker_inventory
+"""
+import multiprocessing as mp
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import timedelta
+
+from app.data.inventory import InventoryEngine
+from app.data.shared_state import SQLiteInventory
+
+WORKERS = 8
+HOLDS_PER_WORKER = 400
+RELEASE_SHARE = 0.3
+HORIZON = 60
+ROOMS = [
+    {"id": "small", "name": "Small", "beds": 1, "lounge": False, "price": 4000, "max_guests": 2, "inventory": 5},
+    {"id": "large", "name": "Large", "beds": 2, "lounge": True, "price": 9000, "max_guests": 4, "inventory": 3},
+]
+
+
+def stays(seed):
+    rng = random.Random(seed)
+    # Everyone wants the same fortnight, so most nights sell out
+    return [
+        (rng.choice(ROOMS)["id"], rng.randrange(0, 14), rng.randint(1, 4), rng.random() < RELEASE_SHARE)
+        for _ in range(HOLDS_PER_WORKER)
+    ]
+
+
+def shared_worker(path, seed, out):
+    engine = SQLiteInventory(ROOMS, path=path, horizon_days=HORIZON)
+    granted = 0
+    for room_id, d0, nights, give_back in stays(seed):
+        hold_id = engine.hold(room_id, check_in=engine.start + timedelta(days=d0), nights=nights)
+        if hold_id:
+            granted += 1
+            if give_back:
+                engine.release(hold_id)
+    engine.close()
+    out.put(granted)
+
+
+def memory_worker(seed, out):
+    engine = InventoryEngine(ROOMS, horizon_days=HORIZON)
+    taken = {}
+    for room_id, d0, nights, give_back in stays(seed):
+        hold_id = engine.hold(room_id, check_in=engine.start + timedelta(days=d0), nights=nights)
+        if hold_id and not give_back:
+            for d in range(d0, d0 + nights):
+                taken[(room_id, d)] = taken.get((room_id, d), 0) + 1
+    out.put(taken)
+
+
+def audit(path):
+    conn = sqlite3.connect(path)
+    base = {r["id"]: r["inventory"] for r in ROOMS}
+    held = {}
+    for room_id, n0, n1, qty in conn.execute("SELECT room_id, night_from, night_to, qty FROM holds"):
+        for night in range(n0, n1):
+            held[(room_id, night)] = held.get((room_id, night), 0) + qty
+    negative = mismatched = sold_out = 0
+    for room_id, night, available in conn.execute("SELECT room_id, night, available FROM inventory"):
+        taken = held.get((room_id, night), 0)
+        negative += available < 0
+        mismatched += available != base[room_id] - taken
+        sold_out += available == 0
+    conn.close()
+    return negative, mismatched, sold_out
+
+
+def run(target, args_for):
+    out = mp.Queue()
+    procs = [mp.Process(target=target, args=(*args_for(w), out)) for w in range(WORKERS)]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return time.perf_counter() - start, results
+
+
+def main():
+    total = WORKERS * HOLDS_PER_WORKER
+    print(f"{WORKERS} worker processes x {HOLDS_PER_WORKER} hold attempts on {len(ROOMS)} room types")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.db")
+        SQLiteInventory(ROOMS, path=path, horizon_days=HORIZON).close()
+        elapsed, granted = run(shared_worker, lambda w: (path, w))
+        negative, mismatched, sold_out = audit(path)
+        print(
+            f"  sqlite shared : {total / elapsed:7.0f} attempts/s, {sum(granted)} granted, "
+            f"{sold_out} sold-out nights, negative={negative}, mismatched={mismatched}"
+        )
+
+    _, maps = run(memory_worker, lambda w: (w,))
+    base = {r["id"]: r["inventory"] for r in ROOMS}
+    combined = {}
+    for taken in maps:
+        for key, count in taken.items():
+            combined[key] = combined.get(key, 0) + count
+    oversold = sum(count > base[room_id] for (room_id, _), count in combined.items())
+    print(f"  per-process   : {oversold} room-nights oversold across workers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: unpaced media send vs PlayoutScheduler at barge-in.
+
+TTS delivers REPLY_SECONDS of audio in 400 ms chunks at BURST_X real time. A fake Twilio
+plays what it receives back to back; the caller barges in at a random point. Reports how
+much audio sits in Twilio's buffer at that moment (what a clear must discard, and what the
+caller keeps hearing until it lands) and the error in the "how much was heard" estimate:
+the sent total for the unpaced sender, PlayoutScheduler.interrupt() for the paced one.
+Trials run concurrently in real time. Run from the repo root: python -m benchmarks.bench_playout
+"""
+import asyncio
+import random
+import statistics
+import time
+
+from app.audio_buffer import AudioFrameBuffer
+from app.media_encoder import MediaEncoder, BYTES_PER_SECOND
+from app.playout import PlayoutScheduler
+
+TRIALS = 40
+REPLY_SECONDS = 4.0
+CHUNK_BYTES = 3200
+BURST_X = 8.0
+LOOKAHEAD = 0.2
+
+
+class FakeTwilio:
+    """Plays received media back to back, as Twilio does"""
+
+    def __init__(self):
+        self.play_end = 0.0
+        self.received = 0.0
+        self.sends = 0
+
+    async def send_text(self, message: str):
+        self.sends += 1
+
+    def receive(self, seconds: float):
+        now = time.monotonic()
+        self.play_end = max(self.play_end, now) + seconds
+        self.received += seconds
+
+    def buffered(self) -> float:
+        return max(0.0, self.play_end - time.monotonic())
+
+
+async def trial(paced: bool, barge_in_at: float) -> tuple[float, float, int]:
+    twilio = FakeTwilio()
+    scheduler = PlayoutScheduler(twilio.send_text, lookahead=LOOKAHEAD)
+    encoder = MediaEncoder("MZtrial")
+    frames = AudioFrameBuffer()
+    chunk = bytes([0x55]) * CHUNK_BYTES
+    valid = True
+
+    async def speak():
+        for _ in range(int(REPLY_SECONDS * BYTES_PER_SECOND / CHUNK_BYTES)):
+            await asyncio.sleep(CHUNK_BYTES / BYTES_PER_SECOND / BURST_X)
+            frames.write(chunk)
+            for message, seconds in encoder.messages(frames.frames()):
+                if paced:
+                    if not await scheduler.send(message, seconds, 1, lambda: valid):
+                        return
+                elif valid:
+                    await twilio.send_text(message)
+                else:
+                    return
+                twilio.receive(seconds)
+
+    speaker = asyncio.create_task(speak())
+    await asyncio.sleep(barge_in_at)
+    valid = False
+    buffered = twilio.buffered()
+    actual_heard = twilio.received - buffered
+    if paced:
+        estimate = scheduler.interrupt().get(1, (0.0, 0.0))[0]
+    else:
+        estimate = twilio.received  # all the sender knows is what it has sent
+    speaker.cancel()
+    await asyncio.gather(speaker, return_exceptions=True)
+    return buffered, abs(estimate - actual_heard), twilio.sends
+
+
+def report(name: str, results: list[tuple[float, float, int]]):
+    buffered = [r[0] * 1000 for r in results]
+    errors = [r[1] * 1000 for r in results]
+    print(
+        f"  {name:<8} buffered at Twilio avg {statistics.mean(buffered):6.0f} ms  max {max(buffered):6.0f} ms   "
+        f"heard-estimate error avg {statistics.mean(errors):6.1f} ms  max {max(errors):6.1f} ms"
+    )
+
+
+async def run():
+    rng = random.Random(11)
+    points = [rng.uniform(0.3, REPLY_SECONDS * 0.9) for _ in range(TRIALS)]
+    unpaced = await asyncio.gather(*(trial(False, t) for t in points))
+    paced = await asyncio.gather(*(trial(True, t) for t in points))
+    print(
+        f"{TRIALS} barge-ins into a {REPLY_SECONDS:.0f}s reply, TTS at {BURST_X:.0f}x real time, "
+        f"look-ahead {LOOKAHEAD * 1000:.0f} ms"
+    )
+    report("unpaced", unpaced)
+    report("paced", paced)
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,88 @@
+"""
+Benchmark: time to first audio per segmentation policy on simulated LLM token streams.
+
+Tokens arrive every TOKEN_MS; first audio is when the first segment is handed to TTS plus
+TTS_FIRST_BYTE_MS. Also counts splits that cut a number or abbreviation in half.
+Run from the repo root: python -m benchmarks.bench_segmenter
+"""
+import re
+
+from app.segmenter import Segmenter
+
+TOKEN_MS = 12
+TTS_FIRST_BYTE_MS = 150
+
+REPLIES = [
+    "Certainly, we have the Deluxe Two Bed available for those dates at 5.600 rupees per night, breakfast included. Would you like me to hold it?",
+    "For two guests with lounge access, the Deluxe Lounge works best, and it comes to 8,200 rupees per night. Shall I go ahead?",
+    "Thank you Mr. Sharma, your reservation is staged. Please pay on our payments portal within two hours to finalize.",
+    "The family suite sleeps up to six guests, has three beds and lounge access, and costs Rs. 9,800 per night.",
+    "Sure. What date would you like to check in?",
+    "Unfortunately, no. Room No. 12 is taken, but check-in opens at 2 pm. Breakfast is from 7 am.",
+]
+
+_TOKEN_RE = re.compile(r"\s?[A-Za-z]{1,5}|\s?\d{1,3}|\s?[^\sA-Za-z\d]")
+
+
+def tokens(text):
+    return _TOKEN_RE.findall(text)
+
+
+class Legacy:
+    """The original endswith rule from handle_stream"""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, text):
+        self.buffer += text
+        if self.buffer.endswith((".", "?", "!", "\n")) and len(self.buffer.strip()) > 5:
+            out, self.buffer = self.buffer.strip(), ""
+            return [out]
+        return []
+
+    def flush(self):
+        out, self.buffer = self.buffer.strip(), ""
+        return out or None
+
+
+POLICIES = {
+    "legacy": Legacy,
+    "sentence": lambda: Segmenter(eager_first=False),
+    "eager-first": Segmenter,
+}
+
+
+def run(policy_factory):
+    ttfa, bad, segments_total = [], 0, 0
+    for reply in REPLIES:
+        seg = policy_factory()
+        out, first_at = [], None
+        for i, tok in enumerate(tokens(reply)):
+            ready = seg.feed(tok)
+            if ready and first_at is None:
+                first_at = (i + 1) * TOKEN_MS
+            out.extend(ready)
+        tail = seg.flush()
+        if tail:
+            out.append(tail)
+        if first_at is None:
+            first_at = len(tokens(reply)) * TOKEN_MS
+        ttfa.append(first_at + TTS_FIRST_BYTE_MS)
+        segments_total += len(out)
+        bad += sum(
+            1 for a, b in zip(out, out[1:])
+            if re.search(r"\d[.,]$", a) and re.match(r"\d", b) or re.search(r"\b(Mr|Rs|Dr|No)\.$", a)
+        )
+    return sum(ttfa) / len(ttfa), max(ttfa), segments_total, bad
+
+
+def main():
+    print(f"{'policy':<12} {'avg ttfa ms':>12} {'max ttfa ms':>12} {'segments':>9} {'bad splits':>11}")
+    for name, factory in POLICIES.items():
+        avg, worst, n, bad = run(factory)
+        print(f"{name:<12} {avg:>12.0f} {worst:>12.0f} {n:>9} {bad:>11}")
+
+
+if __name__ == "__main__":
+    main()
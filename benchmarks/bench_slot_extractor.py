@@ -0,0 +1,146 @@
+"""
+Benchmark: single-pass SlotExtractor vs the old substring/regex update_context_from_text.
+
+Runs both over a labelled corpus of caller transcripts (digits, spoken numbers, mixed
+slots, dates, names, room names) and reports per-utterance time and slot accuracy.
+Run from the repo root: python -m benchmarks.bench_slot_extractor
+"""
+import re
+import time
+from datetime import datetime
+
+from app.data.dummy_dta import ROOMS
+from app.tools.slot_extractor import slot_extractor, _date_from
+
+ROUNDS = 2000
+SLOTS = ("guests", "nights", "beds", "lounge", "guest_name", "selected_room", "check_in", "intent")
+
+CORPUS = [
+    ("Do you have availability for 2 guests", {"guests": 2, "intent": "availability"}),
+    ("I need a room for two guests for three nights", {"guests": 2, "nights": 3}),
+    ("2 nights for 3 guests please", {"guests": 3, "nights": 2}),
+    ("we are four people staying five nights", {"guests": 4, "nights": 5}),
+    ("what's the price for a double room", {"beds": 2, "intent": "pricing"}),
+    ("a single room for one person", {"beds": 1, "guests": 1}),
+    ("two adults and one child for a week", {"guests": 3, "nights": 7}),
+    ("I'd like to book the deluxe lounge", {"selected_room": "deluxe-lounge", "lounge": True, "intent": "booking"}),
+    ("the deluxe lounge please", {"selected_room": "deluxe-lounge", "lounge": True}),
+    ("my name is Priya", {"guest_name": "Priya"}),
+    ("book the family suite, my name is Arjun", {"selected_room": "family-suite", "guest_name": "Arjun", "intent": "booking"}),
+    ("check in on 12/24 for a couple of nights", {"check_in": _date_from(12, 24), "nights": 2}),
+    ("arriving march fifth for three nights", {"check_in": _date_from(3, 5), "nights": 3}),
+    ("the 5th of march, two of us", {"check_in": _date_from(3, 5), "guests": 2}),
+    ("no lounge needed, twin beds", {"lounge": False, "beds": 2}),
+    ("with a lounge for six guests", {"lounge": True, "guests": 6}),
+    ("I don't need a lounge", {"lounge": False}),
+    ("is the deluxe two bed available for twenty one nights", {"selected_room": "deluxe-two-bed", "nights": 21, "intent": "availability"}),
+    ("three of us for the first night only", {"guests": 3}),
+    ("what are your rates for 10 nights", {"nights": 10, "intent": "pricing"}),
+    ("yes please confirm", {"intent": "booking"}),
+    ("hello, is anyone there", {}),
+    ("can you separate the bill", {}),
+    ("we'd like two rooms, sorry, one room for five people", {"guests": 5}),
+    ("a night for 1 guest", {"nights": 1, "guests": 1}),
+    ("I need a room for 2 for 3 nights", {"guests": 2, "nights": 3}),
+    ("a table for two on the 5th of march for a couple of nights", {"guests": 2, "check_in": _date_from(3, 5), "nights": 2}),
+    ("I have no preference, lounge is fine", {"lounge": True}),
+    ("is there a lounge? no thanks", {"lounge": False}),
+    ("a lounge is not needed", {"lounge": False}),
+    ("a lounge, no smoking please", {"lounge": True}),
+]
+
+
+def _parse_int(text):
+    match = re.search(r"(\d+)", text)
+    return int(match.group(1)) if match else None
+
+
+def _parse_date(text):
+    m = re.search(r"(\d{1,2})[/-](\d{1,2})", text)
+    if not m:
+        return None
+    month, day = m.groups()
+    year = datetime.utcnow().year
+    try:
+        dt = datetime(year, int(month), int(day))
+        if dt < datetime.utcnow():
+            dt = dt.replace(year=year + 1)
+        return dt.strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def legacy_update(text, ctx):
+    """update_context_from_text as it was before the extractor"""
+    lower = text.lower()
+    if "availability" in lower or "available" in lower:
+        ctx.setdefault("intent", "availability")
+    if "book" in lower or "reserve" in lower or "confirm" in lower:
+        ctx.setdefault("intent", "booking")
+    if "price" in lower or "rate" in lower:
+        ctx.setdefault("intent", "pricing")
+    guests = _parse_int(lower) if "guest" in lower or "people" in lower or "person" in lower else None
+    if guests:
+        ctx["guests"] = guests
+    beds = None
+    if "single" in lower:
+        beds = 1
+    if "double" in lower or "two bed" in lower or "twin" in lower:
+        beds = 2
+    if beds:
+        ctx["beds"] = beds
+    if "lounge" in lower:
+        ctx["lounge"] = True
+    if "no lounge" in lower or "without lounge" in lower:
+        ctx["lounge"] = False
+    if "name is" in lower:
+        parts = lower.split("name is", 1)[1].strip()
+        ctx["guest_name"] = parts.split()[0].title() if parts else ctx.get("guest_name")
+    if "date" in lower or re.search(r"\d{1,2}/\d{1,2}", lower):
+        parsed = _parse_date(lower)
+        if parsed:
+            ctx["check_in"] = parsed
+    nights = _parse_int(lower) if "night" in lower or "nights" in lower else None
+    if nights:
+        ctx["nights"] = nights
+    for room in ROOMS:
+        if room["id"] in lower or room["name"].lower() in lower:
+            ctx["selected_room"] = room["id"]
+            break
+
+
+def new_update(text, ctx):
+    ctx.update(slot_extractor.extract(text))
+
+
+def score(update):
+    exact = correct = total = 0
+    for text, expected in CORPUS:
+        ctx = {}
+        update(text, ctx)
+        got = {k: ctx.get(k) for k in SLOTS if ctx.get(k) is not None}
+        exact += got == expected
+        for k in SLOTS:
+            if k in expected or k in got:
+                total += 1
+                correct += got.get(k) == expected.get(k)
+    return exact, correct / total
+
+
+def timed(update):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for text, _ in CORPUS:
+            update(text, {})
+    return (time.perf_counter() - start) / (ROUNDS * len(CORPUS))
+
+
+def main():
+    print(f"{len(CORPUS)} labelled utterances, {ROUNDS} rounds")
+    for label, update in (("legacy", legacy_update), ("extractor", new_update)):
+        exact, accuracy = score(update)
+        print(f"  {label:10s}: {timed(update) * 1e6:6.1f} us/utterance, {exact}/{len(CORPUS)} exact, slot accuracy {accuracy:.0%}")
+
+
+if __name__ == "__main__":
+    main()
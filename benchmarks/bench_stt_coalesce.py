@@ -0,0 +1,74 @@
+"""
+Benchmark: inbound audio messages to Deepgram per call-minute, per-frame vs coalesced.
+
+CALLS STTSessions connect to a local counting websocket server and are fed one 160-byte
+frame every 20 ms, as twilio_ws does, for SECONDS of real time. Reports websocket messages
+per call-minute and the delay a frame picks up between send_q.put() and arrival at the
+server. Coalescing trades that delay (bounded by STT_MAX_DELAY_MS) for fewer messages.
+Run from the repo root: python -m benchmarks.bench_stt_coalesce
+"""
+import asyncio
+import statistics
+import time
+
+import websockets
+
+from app.stt import STTSession
+
+CALLS = 20
+SECONDS = 6.0
+FRAME = bytes([0x55]) * 160
+CONFIGS = [(20, 20), (60, 80), (100, 120)]  # (batch_ms, max_delay_ms)
+
+
+async def run(batch_ms: int, max_delay_ms: int) -> tuple[float, list[float]]:
+    arrivals: dict[int, list[tuple[float, int]]] = {}
+
+    async def count(ws, path=None):
+        call = int((path or ws.path).rsplit("/", 1)[-1])
+        received = arrivals.setdefault(call, [])
+        async for msg in ws:
+            if isinstance(msg, bytes):
+                received.append((time.perf_counter(), len(msg)))
+
+    async with websockets.serve(count, "127.0.0.1", 0, ping_interval=None) as server:
+        port = server.sockets[0].getsockname()[1]
+        sessions = [
+            STTSession(await websockets.connect(f"ws://127.0.0.1:{port}/{i}", ping_interval=None), batch_ms, max_delay_ms)
+            for i in range(CALLS)
+        ]
+        put_times: list[float] = []
+        start = time.perf_counter()
+        n = 0
+        while n * 0.02 < SECONDS:
+            put_times.append(time.perf_counter())
+            for session in sessions:
+                session.send_q.put_nowait(FRAME)
+            n += 1
+            await asyncio.sleep(max(0.0, start + n * 0.02 - time.perf_counter()))
+        await asyncio.gather(*(s.close() for s in sessions))
+
+    messages = sum(s.messages for s in sessions)
+    delays = []
+    for received in arrivals.values():
+        frame = 0
+        for at, size in received:
+            frames = size // len(FRAME)
+            delays.extend((at - put_times[i]) * 1000 for i in range(frame, min(frame + frames, len(put_times))))
+            frame += frames
+    return messages / CALLS / (SECONDS / 60), delays
+
+
+async def main():
+    print(f"{CALLS} calls, {SECONDS:.0f}s of 20 ms frames each")
+    for batch_ms, max_delay_ms in CONFIGS:
+        per_minute, delays = await run(batch_ms, max_delay_ms)
+        delays.sort()
+        print(
+            f"  STT_BATCH_MS={batch_ms:<4} STT_MAX_DELAY_MS={max_delay_ms:<4} {per_minute:7,.0f} msgs per call-minute  "
+            f"frame delay p50 {statistics.median(delays):5.1f} ms  p99 {delays[int(len(delays) * 0.99)]:5.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Benchmark: time to the first TTS-ready sentence per turn, legacy two-request flow vs single streaming request.
+
+The LLM is replaced by a local fake with a fixed request latency and per-token decode time,
+so the numbers isolate the request structure rather than provider speed.
+Run from the repo root: python -m benchmarks.bench_turn_ttft
+"""
+import asyncio
+import json
+import time
+import types
+
+import app.agent as agent_mod
+
+REQUEST_LATENCY = 0.25  # seconds until the first streamed token
+TOKEN_TIME = 0.01       # seconds per streamed token
+REPLY = "We have the Deluxe Two Bed at 5,600 rupees per night. Shall I hold it for you?".split(" ")
+TOOL_ARGS = json.dumps({"guests": 2, "beds": 2, "nights": 3})
+
+
+def _chunk(content=None, tool_calls=None):
+    delta = types.SimpleNamespace(content=content, tool_calls=tool_calls)
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta)])
+
+
+def _tool_delta(args_piece, first):
+    fn = types.SimpleNamespace(name="get_availability" if first else None, arguments=args_piece)
+    return types.SimpleNamespace(index=0, id="call_1" if first else None, type="function" if first else None, function=fn)
+
+
+def _wants_tool(messages):
+    return messages[-1]["role"] == "user" and "room" in messages[-1]["content"]
+
+
+async def fake_stream(messages, tools=None, **_):
+    await asyncio.sleep(REQUEST_LATENCY)
+    if tools and _wants_tool(messages):
+        pieces = [TOOL_ARGS[i:i + 8] for i in range(0, len(TOOL_ARGS), 8)]
+        for i, piece in enumerate(pieces):
+            await asyncio.sleep(TOKEN_TIME)
+            yield _chunk(tool_calls=[_tool_delta(piece, i == 0)])
+        return
+    for i, word in enumerate(REPLY):
+        await asyncio.sleep(TOKEN_TIME)
+        yield _chunk(content=word if i == 0 else " " + word)
+
+
+async def fake_chat(messages, tools=None, **_):
+    """Non-streaming call: full latency plus the whole decode before anything returns"""
+    content, tool_calls = "", None
+    async for chunk in fake_stream(messages, tools):
+        delta = chunk.choices[0].delta
+        content += delta.content or ""
+        if delta.tool_calls:
+            tool_calls = tool_calls or []
+            tool_calls.extend(delta.tool_calls)
+    calls = None
+    if tool_calls:
+        fn = types.SimpleNamespace(name="get_availability", arguments=TOOL_ARGS)
+        calls = [types.SimpleNamespace(id="call_1", type="function", function=fn)]
+    msg = types.SimpleNamespace(content=content, tool_calls=calls)
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(message=msg)])
+
+
+async def legacy_turn(agent, text):
+    """The previous handle_stream structure: generate_chat with tools, then a tool-less stream"""
+    agent.messages.append({"role": "user", "content": text})
+    while True:
+        res = await fake_chat(agent.messages, tools=agent.tools)
+        msg = res.choices[0].message
+        if msg.tool_calls:
+            agent.messages.append({"role": "assistant", "content": "", "tool_calls": []})
+            agent.messages.append({"role": "tool", "content": "{}"})
+            continue
+        buffer = ""
+        async for chunk in fake_stream(agent.messages, tools=None):
+            buffer += chunk.choices[0].delta.content
+            if buffer.endswith((".", "?", "!", "\n")) and len(buffer.strip()) > 5:
+                yield buffer.strip()
+                buffer = ""
+        break
+
+
+async def ttft(gen):
+    start = time.perf_counter()
+    async for _ in gen:
+        return (time.perf_counter() - start) * 1000
+    return float("nan")
+
+
+async def main():
+    agent_mod.generate_chat_stream = fake_stream
+    print(f"{'turn':<40} {'legacy ms':>10} {'single ms':>10}")
+    for text in ("what time is check out", "do you have a double room for 2 guests"):
+        legacy = await ttft(legacy_turn(agent_mod.HotelAgent(), text))
+        single = await ttft(agent_mod.HotelAgent().handle_stream(text))
+        print(f"{text:<40} {legacy:>10.0f} {single:>10.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+Benchmark: local VAD cost per concurrent call, onset latency and false starts on synthetic lines.
+
+Speech is modelled as a 4 Hz syllable-modulated harmonic series (f0 140 Hz) at -20 dBFS,
+mixed into a quiet line, a noisy line (white noise) and a line with 50 Hz hum, then
+mu-law encoded into 20 ms frames exactly as Twilio sends them. Onset latency is measured
+from the true speech start to the "start" event; false starts are counted over a minute
+of each line with no speech. Deepgram's SpeechStarted additionally pays the network round
+trip and its own detection delay, so it is not modelled here.
+Run from the repo root: python -m benchmarks.bench_vad
+"""
+import time
+
+import numpy as np
+
+from app.vad import VoiceActivityDetector, MULAW_TO_LINEAR
+
+RATE = 8000
+FRAME = 160
+TRIALS = 20
+
+
+def mulaw_encode(x: np.ndarray) -> bytes:
+    s = np.clip(np.round(x * 32768), -32635, 32635).astype(np.int32)
+    sign = (s < 0).astype(np.int32)
+    mag = np.abs(s) + 0x84
+    exponent = np.clip(np.floor(np.log2(mag)).astype(np.int32) - 7, 0, 7)
+    mantissa = (mag >> (exponent + 3)) & 0x0F
+    return (~((sign << 7) | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8).tobytes()
+
+
+def speech(seconds: float, rng: np.random.Generator, db: float = -20.0) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    f0 = 140 * (1 + 0.05 * np.sin(2 * np.pi * 0.7 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / RATE
+    voiced = sum(np.sin(k * phase + rng.uniform(0, 6.28)) / k for k in range(1, 12))
+    envelope = 0.55 + 0.45 * np.sin(2 * np.pi * 4 * t - np.pi / 2)
+    x = voiced * envelope
+    return x / np.sqrt(np.mean(x ** 2)) * 10 ** (db / 20)
+
+
+def line(kind: str, seconds: float, rng: np.random.Generator) -> np.ndarray:
+    n = int(seconds * RATE)
+    if kind == "quiet":
+        return rng.normal(0, 10 ** (-60 / 20), n)
+    if kind == "noisy":
+        return rng.normal(0, 10 ** (-38 / 20), n)
+    t = np.arange(n) / RATE
+    return 10 ** (-33 / 20) * np.sqrt(2) * np.sin(2 * np.pi * 50 * t) + rng.normal(0, 10 ** (-60 / 20), n)
+
+
+def frames(signal: np.ndarray) -> list[bytes]:
+    encoded = mulaw_encode(signal)
+    return [encoded[i:i + FRAME] for i in range(0, len(encoded) - FRAME + 1, FRAME)]
+
+
+def onset_latency(kind: str, rng: np.random.Generator) -> float | None:
+    lead = rng.uniform(1.0, 3.0)
+    signal = line(kind, lead + 1.0, rng)
+    start = int(lead * RATE)
+    signal[start:] += speech(1.0, rng)[: len(signal) - start]
+    vad = VoiceActivityDetector()
+    for i, frame in enumerate(frames(signal)):
+        if vad.process(frame) == "start":
+            return ((i + 1) * FRAME - start) / RATE * 1000
+    return None
+
+
+def main():
+    rng = np.random.default_rng(5)
+    decoded = MULAW_TO_LINEAR[np.frombuffer(mulaw_encode(np.linspace(-0.9, 0.9, 1000)), dtype=np.uint8)]
+    assert np.max(np.abs(decoded - np.linspace(-0.9, 0.9, 1000))) < 0.03, "mu-law round trip"
+
+    mixed = frames(np.concatenate([line("noisy", 30, rng), speech(30, rng) + line("noisy", 30, rng)]))
+    vad = VoiceActivityDetector()
+    start = time.perf_counter()
+    for frame in mixed:
+        vad.process(frame)
+    per_frame = (time.perf_counter() - start) / len(mixed)
+    per_call = per_frame * 50
+    print(f"cost: {per_frame * 1e6:.1f} us per 20 ms frame = {per_call * 100:.3f}% of one core per call "
+          f"(~{int(0.1 / per_call)} calls per 10% of a core)")
+
+    for kind in ("quiet", "noisy", "hum"):
+        latencies = [onset_latency(kind, rng) for _ in range(TRIALS)]
+        found = [l for l in latencies if l is not None]
+        idle = VoiceActivityDetector()
+        false_starts = sum(idle.process(frame) == "start" for frame in frames(line(kind, 60, rng)))
+        print(
+            f"  {kind:<6} onset p50 {np.median(found):5.0f} ms  max {max(found):5.0f} ms  "
+            f"missed {len(latencies) - len(found)}/{TRIALS}   false starts {false_starts} per idle minute"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Local stand-ins for Deepgram listen/speak and an OpenAI-compatible streaming endpoint.
+
+Used by bench_concurrent_calls, or on their own to run the real app without any API keys:
+    python -m benchmarks.fakes --port 9100
+then start the app with
+    DEEPGRAM_WS_BASE=ws://127.0.0.1:9100 OPENAI_BASE_URL=http://127.0.0.1:9101/v1 \
+    DEEPGRAM_API_KEY=fake OPENAI_API_KEY=fake uvicorn app.main:app
+Latencies are configurable so the harness can model slow or fast providers.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import uvicorn
+import websockets
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+FRAME_BYTES = 160  # 20 ms of 8 kHz mu-law
+SILENCE = (0xFF, 0x7F)
+ENDPOINT_MS = 400
+TTS_BYTES_PER_CHAR = 480  # ~60 ms of audio per character, close to natural speech
+TTS_CHUNK_BYTES = 3200
+
+# Caller turns, in order. The fake client speaks them and the fake STT "hears" them, so both
+# sides walk the same list per connection.
+SCRIPT = [
+    "Hi, I am looking for a room next weekend",
+    "Do you have availability for two guests for three nights",
+    "What does breakfast include with the deluxe lounge",
+    "Thank you, that is all",
+]
+
+LLM_REPLIES = {
+    "tool": "We have the Deluxe Two Bed at 5,600 rupees per night and the Deluxe Lounge at 8,200 rupees per night. Which one would you prefer?",
+    "default": "Of course. Could you tell me how many guests will be staying, and for how many nights, so I can check what we have for you?",
+    "breakfast": "Breakfast is included with every room and is served from seven to ten thirty in the restaurant. Is there anything else I can help with?",
+    "bye": "You're welcome. Thank you for calling, and have a wonderful day!",
+}
+
+
+class Latency:
+    def __init__(self, stt_ms: float = 150, tts_ms: float = 120, llm_ttft_ms: float = 250, llm_tokens_per_s: float = 200):
+        self.stt = stt_ms / 1000
+        self.tts = tts_ms / 1000
+        self.llm_ttft = llm_ttft_ms / 1000
+        self.llm_token_gap = 1 / llm_tokens_per_s if llm_tokens_per_s else 0.0
+
+
+def _is_speech(frame: bytes) -> bool:
+    return any(b not in SILENCE for b in frame[:32])
+
+
+async def fake_listen(ws, latency: Latency):
+    """Deepgram listen: SpeechStarted on voiced audio, a final transcript after ENDPOINT_MS of silence"""
+    turn = 0
+    speaking = False
+    silent_bytes = 0
+    endpoint_bytes = ENDPOINT_MS * 8
+    async for msg in ws:
+        if isinstance(msg, str):
+            continue  # KeepAlive / CloseStream
+        if _is_speech(msg):
+            if not speaking:
+                speaking = True
+                await ws.send(json.dumps({"type": "SpeechStarted", "timestamp": time.time()}))
+            silent_bytes = 0
+            continue
+        if not speaking:
+            continue
+        silent_bytes += len(msg)
+        if silent_bytes >= endpoint_bytes:
+            speaking = False
+            text = SCRIPT[turn % len(SCRIPT)]
+            turn += 1
+            await asyncio.sleep(latency.stt)
+            await ws.send(json.dumps({
+                "type": "Results",
+                "is_final": True,
+                "speech_final": True,
+                "channel": {"alternatives": [{"transcript": text, "confidence": 0.98}]},
+            }))
+
+
+async def fake_speak(ws, latency: Latency):
+    """Deepgram speak: audio proportional to the text after a fixed first-byte latency"""
+    pending = []
+    async for msg in ws:
+        if isinstance(msg, bytes):
+            continue
+        data = json.loads(msg)
+        kind = data.get("type")
+        if kind == "Speak":
+            pending.append(data.get("text", ""))
+        elif kind == "Flush":
+            text = " ".join(pending)
+            pending.clear()
+            await asyncio.sleep(latency.tts)
+            remaining = max(FRAME_BYTES, len(text) * TTS_BYTES_PER_CHAR)
+            while remaining > 0:
+                size = min(TTS_CHUNK_BYTES, remaining)
+                await ws.send(bytes([0x55]) * size)
+                remaining -= size
+                await asyncio.sleep(0)
+            await ws.send(json.dumps({"type": "Flushed", "sequence_id": 0}))
+        elif kind == "Clear":
+            pending.clear()
+            await ws.send(json.dumps({"type": "Cleared", "sequence_id": 0}))
+        elif kind == "Close":
+            break
+
+
+def _chunk(model: str, delta: dict, finish=None) -> str:
+    payload = {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def _plan(messages: list[dict]) -> tuple[str | None, str]:
+    """(tool to call, reply text) for the conversation so far"""
+    last = messages[-1]
+    if last.get("role") == "tool":
+        return None, LLM_REPLIES["tool"]
+    text = (last.get("content") or "").lower()
+    if "available" in text or "availability" in text:
+        return "get_availability", ""
+    if "breakfast" in text:
+        return None, LLM_REPLIES["breakfast"]
+    if "that is all" in text or "bye" in text:
+        return None, LLM_REPLIES["bye"]
+    return None, LLM_REPLIES["default"]
+
+
+def make_llm_app(latency: Latency) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "fake")
+        tool, reply = _plan(body.get("messages") or [{}])
+        usage = body.get("stream_options", {}).get("include_usage")
+
+        async def stream():
+            await asyncio.sleep(latency.llm_ttft)
+            if tool:
+                yield _chunk(model, {"role": "assistant", "tool_calls": [{
+                    "index": 0,
+                    "id": f"call_{uuid.uuid4().hex[:8]}",
+                    "type": "function",
+                    "function": {"name": tool, "arguments": json.dumps({"guests": 2, "nights": 3})},
+                }]})
+                yield _chunk(model, {}, "tool_calls")
+            else:
+                yield _chunk(model, {"role": "assistant", "content": ""})
+                for word in reply.split(" "):
+                    yield _chunk(model, {"content": word + " "})
+                    if latency.llm_token_gap:
+                        await asyncio.sleep(latency.llm_token_gap)
+                yield _chunk(model, {}, "stop")
+            if usage:
+                yield "data: " + json.dumps({
+                    "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": model, "choices": [],
+                    "usage": {"prompt_tokens": 900, "completion_tokens": 40, "total_tokens": 940},
+                }) + "\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+async def serve_fakes(ws_port: int, llm_port: int, latency: Latency):
+    async def route(ws, path=None):
+        path = path or ws.path
+        if path.startswith("/v1/listen"):
+            await fake_listen(ws, latency)
+        elif path.startswith("/v1/speak"):
+            await fake_speak(ws, latency)
+
+    server = uvicorn.Server(uvicorn.Config(make_llm_app(latency), host="127.0.0.1", port=llm_port, log_level="warning"))
+    async with websockets.serve(route, "127.0.0.1", ws_port, ping_interval=None, max_size=None):
+        print(f"[fakes] deepgram ws://127.0.0.1:{ws_port} llm http://127.0.0.1:{llm_port}/v1", flush=True)
+        await server.serve()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=9100, help="Deepgram port; the LLM listens on port + 1")
+    parser.add_argument("--stt-ms", type=float, default=150)
+    parser.add_argument("--tts-ms", type=float, default=120)
+    parser.add_argument("--llm-ttft-ms", type=float, default=250)
+    parser.add_argument("--llm-tokens-per-s", type=float, default=200)
+    args = parser.parse_args()
+    latency = Latency(args.stt_ms, args.tts_ms, args.llm_ttft_ms, args.llm_tokens_per_s)
+    asyncio.run(serve_fakes(args.port, args.port + 1, latency))
+
+
+if __name__ == "__main__":
+    main()